@@ -0,0 +1,300 @@
+import numpy as np
+import pandas as pd
+
+DIMENSIONS = ['province', 'disease_code', 'location', 'month']
+
+
+class CaseCube:
+    """Case reports summed by province x disease_code x location x month.
+
+    Each dimension is stored as integer codes into a sorted label index (-1 where the
+    raw value was missing), so queries group a few thousand small integer rows instead
+    of the raw reports. `case` holds the summed cases and `reports` the number of rows.
+    """
+
+    def __init__(self, frame, labels, location_coords):
+        self.frame = frame
+        self.labels = labels
+        self.location_coords = location_coords
+
+    @classmethod
+    def from_reports(cls, laos_data):
+        columns, labels = {}, {}
+        for dim in ['province', 'disease_code', 'location']:
+            categorical = pd.Categorical(laos_data[dim])
+            columns[dim] = categorical.codes
+            labels[dim] = categorical.categories
+
+        months = pd.Categorical(laos_data['reported_date'].dt.to_period('M'))
+        columns['month'] = months.codes
+        labels['month'] = months.categories
+
+        frame = (
+            pd.DataFrame(dict(columns, case=laos_data['case'].to_numpy(dtype=float)))
+            .groupby(DIMENSIONS, sort=True)
+            .agg(case=('case', 'sum'), reports=('case', 'size'))
+            .reset_index()
+        )
+        frame = frame.astype({dim: _code_dtype(len(labels[dim])) for dim in DIMENSIONS})
+
+        # One coordinate pair per location, as merged in from laos_regions
+        location_coords = (
+            pd.DataFrame({
+                'location': columns['location'],
+                'latitude': laos_data['latitude'].to_numpy(dtype=float),
+                'longitude': laos_data['longitude'].to_numpy(dtype=float),
+            })
+            .query('location >= 0')
+            .groupby('location')[['latitude', 'longitude']]
+            .first()
+        )
+
+        return cls(frame, labels, location_coords)
+
+    def to_shared(self):
+        """Frames and arrays a worker can map to get this cube back (see from_shared)."""
+        parts = {'frame': self.frame, 'location_coords': self.location_coords.reset_index()}
+        for dim in ['province', 'disease_code', 'location']:
+            parts[f"labels.{dim}"] = pd.DataFrame({dim: self.labels[dim]})
+        parts['labels.month'] = self.labels['month'].asi8
+        return parts
+
+    @classmethod
+    def from_shared(cls, parts):
+        labels = {dim: pd.Index(parts[f"labels.{dim}"][dim]).rename(None)
+                  for dim in ['province', 'disease_code', 'location']}
+        labels['month'] = pd.PeriodIndex.from_ordinals(parts['labels.month'], freq='M')
+        return cls(parts['frame'], labels, parts['location_coords'].set_index('location'))
+
+    def subset(self, **filters):
+        """Cube restricted to the given labels, e.g. subset(disease_code=["ND", "MG"])."""
+        mask = np.ones(len(self.frame), dtype=bool)
+        for dim, values in filters.items():
+            codes = self.labels[dim].get_indexer(pd.Index(values))
+            mask &= self.frame[dim].isin(codes[codes >= 0]).to_numpy()
+        return CaseCube(self.frame[mask], self.labels, self.location_coords)
+
+    def sum(self, by, column='case'):
+        """Sum of `column` grouped by labelled dimensions.
+
+        Like a groupby on the raw rows, rows whose key is missing are skipped and
+        the result is sorted by label. Months are labelled by their month-end date.
+        """
+        by = [by] if isinstance(by, str) else list(by)
+        frame = self.frame
+        for dim in by:
+            frame = frame[frame[dim] >= 0]
+
+        grouped = frame.groupby(by, sort=True)[column].sum()
+        levels = [self._label(dim, grouped.index.get_level_values(dim)) for dim in by]
+        grouped.index = levels[0] if len(by) == 1 else pd.MultiIndex.from_arrays(levels)
+        return grouped
+
+    def monthly(self, by=None, column='case'):
+        """Monthly sums over a continuous month-end range, like resample('ME').sum()."""
+        if by is None:
+            series = self.sum('month', column)
+            return series.reindex(self._month_range(series.index), fill_value=0)
+
+        table = self.sum(['month', by], column).unstack(fill_value=0)
+        table.columns.name = None
+        return table.reindex(self._month_range(table.index), fill_value=0)
+
+    def _label(self, dim, codes):
+        labels = self.labels[dim].take(np.asarray(codes))
+        if dim == 'month':
+            labels = labels.to_timestamp(how='end').normalize()
+        return pd.Index(labels, name=dim)
+
+    @staticmethod
+    def _month_range(index):
+        if len(index) == 0:
+            return index
+        return pd.date_range(index.min(), index.max(), freq='ME', name=index.name)
+
+
+def _code_dtype(n_labels):
+    return np.int16 if n_labels < np.iinfo(np.int16).max else np.int32
+
+
+
+class TimeIndex:
+    """Daily case and report totals per province x disease, stored as prefix sums.
+
+    Column `d` of `cases` holds each group's total over the days before `first_day + d`,
+    so the total over any day window is one subtraction per group, whatever the length
+    of the history. Reports without a date are left out.
+    """
+
+    def __init__(self, first_day, groups, cases, reports, province_centers):
+        self.first_day = first_day
+        self.groups = groups                      # province, disease_code label per row
+        self.cases = cases                        # (groups, days + 1) cumulative cases
+        self.reports = reports                    # (groups, days + 1) cumulative report counts
+        self.province_centers = province_centers  # province -> mean latitude / longitude
+
+    @classmethod
+    def from_reports(cls, laos_data):
+        dated = laos_data[laos_data['reported_date'].notna()]
+        days = dated['reported_date'].dt.normalize()
+        first_day = days.min() if len(days) else pd.Timestamp.today().normalize()
+        day = (days - first_day).dt.days.to_numpy()
+        n_days = int(day.max()) + 1 if len(day) else 1
+
+        province = pd.Categorical(dated['province'])
+        disease = pd.Categorical(dated['disease_code'])
+        # One integer per province x disease pair (codes are -1 for missing labels)
+        width = len(disease.categories) + 1
+        pair = (province.codes.astype(np.int64) + 1) * width + disease.codes + 1
+        unique_pairs, group = np.unique(pair, return_inverse=True)
+        n_groups = len(unique_pairs)
+
+        def prefix_sums(weights):
+            daily = np.bincount(group * n_days + day, weights=weights, minlength=n_groups * n_days)
+            cumulative = np.zeros((n_groups, n_days + 1))
+            np.cumsum(daily.reshape(n_groups, n_days), axis=1, out=cumulative[:, 1:])
+            return cumulative
+
+        groups = pd.DataFrame({
+            'province': pd.Categorical.from_codes(unique_pairs // width - 1, province.categories),
+            'disease_code': pd.Categorical.from_codes(unique_pairs % width - 1, disease.categories),
+        })
+
+        province_centers = (
+            dated.groupby('province', observed=True)[['latitude', 'longitude']].mean().dropna()
+        )
+        return cls(
+            first_day, groups,
+            prefix_sums(np.nan_to_num(dated['case'].to_numpy(dtype=float))),
+            prefix_sums(None),
+            province_centers,
+        )
+
+    def to_shared(self):
+        """Frames and arrays a worker can map to get this index back (see from_shared)."""
+        return {
+            'first_day': np.array([self.first_day.to_datetime64()]),
+            'groups': self.groups,
+            'cases': self.cases,
+            'reports': self.reports,
+            'province_centers': self.province_centers.reset_index(),
+        }
+
+    @classmethod
+    def from_shared(cls, parts):
+        return cls(pd.Timestamp(parts['first_day'][0]), parts['groups'], parts['cases'], parts['reports'],
+                   parts['province_centers'].set_index('province'))
+
+    @property
+    def last_day(self):
+        return self.first_day + pd.Timedelta(days=self.cases.shape[1] - 2)
+
+    def _position(self, day, end=False):
+        """Prefix column for the start of `day`, or for the end of it when `end`."""
+        offset = (pd.Timestamp(day).normalize() - self.first_day).days + (1 if end else 0)
+        return int(np.clip(offset, 0, self.cases.shape[1] - 1))
+
+    def _mask(self, provinces=None, diseases=None):
+        mask = np.ones(len(self.groups), dtype=bool)
+        if provinces is not None:
+            mask &= self.groups['province'].isin(provinces).to_numpy()
+        if diseases is not None:
+            mask &= self.groups['disease_code'].isin(diseases).to_numpy()
+        return mask
+
+    def window(self, start=None, end=None, provinces=None, diseases=None):
+        """Cases and reports per province x disease between `start` and `end` (inclusive days).
+
+        Only groups with at least one report in the window are returned.
+        """
+        lo = 0 if start is None else self._position(start)
+        hi = self.cases.shape[1] - 1 if end is None else self._position(end, end=True)
+        mask = self._mask(provinces, diseases)
+        reports = self.reports[mask, hi] - self.reports[mask, lo]
+        frame = self.groups[mask].assign(
+            case=self.cases[mask, hi] - self.cases[mask, lo],
+            reports=reports,
+        )
+        return frame[reports > 0].reset_index(drop=True)
+
+    def monthly(self, start=None, end=None, provinces=None, diseases=None):
+        """Monthly case totals over the window, labelled by month-end date like CaseCube.monthly().
+
+        The months run from the first to the last month with a report in the window.
+        """
+        lo = 0 if start is None else self._position(start)
+        hi = self.cases.shape[1] - 1 if end is None else self._position(end, end=True)
+        mask = self._mask(provinces, diseases)
+        cases = self.cases[mask].sum(axis=0)
+        reports = self.reports[mask].sum(axis=0)
+        if hi <= lo or reports[hi] == reports[lo]:
+            return pd.Series([], index=pd.DatetimeIndex([], name='month'), dtype=float)
+
+        # First and last day with a report, then month boundaries between them as prefix columns
+        first = lo + int(np.searchsorted(reports[lo:hi + 1], reports[lo], side='right')) - 1
+        last = lo + int(np.searchsorted(reports[lo:hi + 1], reports[hi], side='left')) - 1
+        months = pd.date_range((self.first_day + pd.Timedelta(days=first)).to_period('M').to_timestamp(),
+                               self.first_day + pd.Timedelta(days=last), freq='MS')
+        edges = np.clip((months - self.first_day).days.to_numpy(), lo, hi)
+        edges[0] = lo
+        edges = np.append(edges, hi)
+        totals = np.diff(cases[edges])
+        return pd.Series(totals, index=pd.DatetimeIndex(months + pd.offsets.MonthEnd(0), name='month'))
+
+    def periodic(self, edges):
+        """(groups, len(edges) - 1) case totals of every group between consecutive day `edges`.
+
+        Period i covers the days from edges[i] up to, not including, edges[i + 1].
+        """
+        offsets = (pd.DatetimeIndex(edges).normalize() - self.first_day).days.to_numpy()
+        return np.diff(self.cases[:, np.clip(offsets, 0, self.cases.shape[1] - 1)], axis=1)
+
+
+NEIGHBOUR_DIMENSIONS = ['Country', 'Year', 'Semester', 'Category', 'Disease status', 'Disease']
+
+
+class NeighbourRollup:
+    """Neighbour-country rows counted by Country x Year x Semester x Category x Disease status x Disease.
+
+    Built once per load; year-range queries (here or in the browser) filter these few
+    hundred rows instead of re-cleaning the raw sheet. `Semester` is 1 (Jan-Jun) or 2 (Jul-Dec).
+    """
+
+    def __init__(self, frame):
+        self.frame = frame
+
+    @classmethod
+    def from_records(cls, neighbours_data):
+        semester = neighbours_data['Semester'].astype(str)
+        # "Jan-Jun-2024" / "Jul-Dec-2024"; the year cell wins, the label fills blanks
+        year = pd.to_numeric(neighbours_data['Year'], errors='coerce')
+        year = year.fillna(pd.to_numeric(semester.str.extract(r'(\d{4})\s*$')[0], errors='coerce'))
+        half = np.select([semester.str.startswith('Jan'), semester.str.startswith('Jul')], [1, 2], 0)
+
+        frame = (
+            pd.DataFrame({
+                'Country': neighbours_data['Country'],
+                'Year': year,
+                'Semester': half,
+                'Category': neighbours_data['Category'],
+                'Disease status': neighbours_data['Disease status'],
+                'Disease': neighbours_data['Disease'],
+            })
+            .dropna(subset=['Country', 'Year'])
+            .astype({'Year': int})
+            .groupby(NEIGHBOUR_DIMENSIONS, sort=True, dropna=False, observed=True)
+            .size()
+            .reset_index(name='count')
+        )
+        return cls(frame)
+
+    def years(self):
+        """(first, last) year with data, or None when the sheet is empty."""
+        if self.frame.empty:
+            return None
+        return int(self.frame['Year'].min()), int(self.frame['Year'].max())
+
+    def records(self):
+        """Rollup as {'columns': [...], 'rows': [[...], ...]} for a dcc.Store."""
+        frame = self.frame.astype(object).where(self.frame.notna(), None)
+        return {'columns': list(frame.columns), 'rows': frame.to_numpy().tolist()}
@@ -1,10 +1,13 @@
 # app.py
 import os
-from flask import Flask
+from flask import Flask, jsonify
 from werkzeug.middleware.proxy_fix import ProxyFix
 import dash
 import dash_bootstrap_components as dbc
 
+import metrics
+import static_assets
+from data_store import DataStore
 from components.layout import create_layout
 from components.callbacks import register_callbacks
 
@@ -12,21 +15,36 @@ from components.callbacks import register_callbacks
 server = Flask(__name__)
 server.wsgi_app = ProxyFix(server.wsgi_app, x_proto=1, x_host=1)
 
+# 응답 압축 (레이아웃/콜백 JSON, index HTML): 1 KB 이상만 brotli, 없으면 gzip
+# Flask-Compress 는 초기화 때 설정을 읽으므로 Dash 생성 전에 지정
+server.config.update(
+    COMPRESS_ALGORITHM=["br", "gzip"],
+    COMPRESS_ALGORITHM_STREAMING=["br", "gzip"],
+    COMPRESS_MIN_SIZE=1024,
+    COMPRESS_BR_LEVEL=4,
+    COMPRESS_LEVEL=6,
+)
+
 # Dash 앱 (루트 경로 고정)
+# assets/ 의 CSS/JS 는 Dash 자동 포함 대신 지문(해시) URL 로 포함 → 브라우저 영구 캐시
 app = dash.Dash(
     __name__,
     server=server,
-    external_stylesheets=[dbc.themes.BOOTSTRAP],
+    external_stylesheets=[dbc.themes.BOOTSTRAP, *static_assets.urls(".css")],
+    external_scripts=static_assets.urls(".js"),
+    assets_ignore=r".*",
+    compress=True,
     suppress_callback_exceptions=True,
     requests_pathname_prefix="/",
     routes_pathname_prefix="/",
 )
 
-# 레이아웃/콜백
+# 레이아웃/콜백 (데이터는 백그라운드 스레드에서 불러옴)
+store = DataStore()
 app.layout = create_layout()
-register_callbacks(app)
+register_callbacks(app, store)
 
-# 헬스체크(두 경로 모두 지원) + 텍스트 핑
+# 헬스체크(두 경로 모두 지원) + 텍스트 핑 — 프로세스 생존 여부만 확인, 데이터 로딩과 무관
 @server.route("/health")
 def health():
     return "ok", 200, {"Content-Type": "text/plain"}
@@ -39,6 +57,25 @@ def healthz():
 def ping():
     return "ok", 200, {"Content-Type": "text/plain"}
 
+# 준비 상태: 첫 데이터셋이 로드되기 전에는 503
+@server.route("/ready")
+def ready():
+    status = store.status()
+    return jsonify(status), 200 if status['state'] == "ready" else 503
+
+# 지문 URL 정적 파일: 미리 압축해 둔 본문 + ETag + Cache-Control: immutable
+@server.route(static_assets.URL_PREFIX + "<name>")
+def static_file(name):
+    return static_assets.serve(name)
+
+# 콜백 지연시간/응답 크기 (Prometheus 텍스트 포맷)
+server.before_request(metrics.start_request)
+server.after_request(metrics.record_response)
+
+@server.route("/metrics")
+def metrics_endpoint():
+    return metrics.render(), 200, {"Content-Type": "text/plain; version=0.0.4"}
+
 # 로컬 실행 전용
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 8050))
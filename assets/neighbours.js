@@ -0,0 +1,71 @@
+// Neighboring Stats charts, redrawn in the browser from the rollup in the
+// "neighbour-chart-data" store (plots.neighbour_chart_data) whenever the
+// country selection or the year range changes.
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    neighbours: {
+        charts: function (countries, years, data) {
+            if (!data) {
+                return [window.dash_clientside.no_update, window.dash_clientside.no_update];
+            }
+            const selected = new Set(countries || []);
+            const [first, last] = years || [-Infinity, Infinity];
+            const col = {};
+            data.rollup.columns.forEach((name, i) => { col[name] = i; });
+
+            // Sum the rollup rows in range: rows per country x category, "Present" rows per disease
+            const byCategory = {};
+            const present = {};
+            const shown = new Set();
+            for (const row of data.rollup.rows) {
+                const country = row[col['Country']];
+                const year = row[col['Year']];
+                if (!selected.has(country) || year < first || year > last) {
+                    continue;
+                }
+                const count = row[col['count']];
+                const category = row[col['Category']];
+                // The rollup keeps blank labels (null); like a groupby, leave them out of the charts
+                if (category !== null) {
+                    shown.add(country);
+                    byCategory[category] = byCategory[category] || {};
+                    byCategory[category][country] = (byCategory[category][country] || 0) + count;
+                }
+                const disease = row[col['Disease']];
+                if (row[col['Disease status']] === 'Present' && disease !== null) {
+                    present[disease] = (present[disease] || 0) + count;
+                }
+            }
+
+            const x = Array.from(shown).sort();
+            const categoryTraces = data.categories
+                .filter(category => byCategory[category])
+                .map(category => ({
+                    type: 'bar',
+                    x: x,
+                    y: x.map(country => byCategory[category][country] || 0),
+                    name: category,
+                    marker: {color: data.colors[category]}
+                }));
+
+            const diseases = Object.keys(present).sort((a, b) => present[a] - present[b]);
+            const period = years ? (first === last ? `${first}` : `${first}-${last}`) : 'Recent Years';
+            const presentLayout = Object.assign({}, data.layouts.present, {
+                title: Object.assign({}, data.layouts.present.title, {text: `Reported Disease Counts, ${period}`})
+            });
+
+            return [
+                {data: categoryTraces, layout: data.layouts.category},
+                {
+                    data: [{
+                        type: 'bar',
+                        orientation: 'h',
+                        x: diseases.map(disease => present[disease]),
+                        y: diseases,
+                        marker: {color: data.colors.Present}
+                    }],
+                    layout: presentLayout
+                }
+            ];
+        }
+    }
+});
@@ -0,0 +1,13 @@
+// Age of the latest news article, worked out in the browser so the cached News tab
+// layout (which only holds the article's date) never goes stale.
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    news: {
+        age: function (latest) {
+            if (!latest) {
+                return "Recent";
+            }
+            const days = Math.floor((Date.now() - new Date(latest).getTime()) / 86400000);
+            return days > 0 ? `${days} days ago` : "Recent";
+        }
+    }
+});
@@ -0,0 +1,16 @@
+// Region spotlight rotation for the Overview and Weather tabs. Every 30 seconds the
+// spotlight cards show the next region's texts from the "spotlight-data" store
+// (views.spotlight_texts), without a request to the server.
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    spotlight: {
+        rotate: function (n_intervals, regions) {
+            const outputs = window.dash_clientside.callback_context.outputs_list;
+            if (!regions || !regions.length) {
+                return outputs.map(() => window.dash_clientside.no_update);
+            }
+            // Wall-clock slot, so every open tab shows the same region at the same time
+            const texts = regions[Math.floor(Date.now() / 30000) % regions.length];
+            return outputs.map(output => texts[output.id.field]);
+        }
+    }
+});
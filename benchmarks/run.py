@@ -0,0 +1,336 @@
+"""Time every figure builder, tab builder and callback against synthetic data.
+
+    python -m benchmarks.run --sizes 1k,100k,1M --repeat 5
+
+Each case reports the median and best wall time, the peak memory allocated while it
+runs (tracemalloc) and the size of its serialized output. Results are written to
+benchmarks/results/<timestamp>.json and compared with the previous run.
+"""
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+import platform
+import statistics
+import subprocess
+import tracemalloc
+import logging
+
+import dash
+import dash_bootstrap_components as dbc
+import numpy as np
+import pandas as pd
+import plotly.io.json as pio_json
+
+import plots
+from components import callbacks
+from components.layout import create_layout
+from data_loader import prepare_frames
+from aggregates import TimeIndex, NeighbourRollup
+from data_store import DataStore, Dataset
+from weather_history import WeatherHistory
+from weather_alerts import WeatherAlerts
+from correlations import OutbreakWeatherCorrelation, FREQUENCIES
+from benchmarks.synthetic import generate_frames, generate_weather_observations
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+REGRESSION_THRESHOLD = 0.10  # flag changes larger than 10% against the previous run
+
+
+class FixtureStore(DataStore):
+    """DataStore serving a prebuilt Dataset, never touching Sheets or the snapshot."""
+
+    def __init__(self, dataset):
+        super().__init__(source="snapshot")
+        self._fixture = dataset
+
+    def load(self):
+        self._publish(self._fixture)
+        return self._fixture
+
+    def start(self, interval=None):
+        self.load()
+
+
+class CallbackClient:
+    """Posts callback requests to a Dash app the way the browser does."""
+
+    def __init__(self, app):
+        self.app = app
+        self.client = app.server.test_client()
+
+    def __call__(self, output, inputs, state=None, triggered=None):
+        key = next(k for k in self.app.callback_map if output in k)
+        spec = self.app.callback_map[key]
+        if key.startswith(".."):
+            outputs = [dict(zip(("id", "property"), o.rsplit(".", 1))) for o in key.strip(".").split("...")]
+        else:
+            outputs = dict(zip(("id", "property"), key.rsplit(".", 1)))
+
+        def props(specs, values):
+            return [{**s, 'value': values.get(f"{s['id']}.{s['property']}")} for s in specs]
+
+        response = self.client.post("/_dash-update-component", json={
+            'output': key,
+            'outputs': outputs,
+            'inputs': props(spec['inputs'], inputs),
+            'state': props(spec['state'], state or {}),
+            'changedPropIds': triggered or list(inputs),
+        })
+        if response.status_code >= 400:
+            raise RuntimeError(f"{output} callback failed: {response.status_code}")
+        return response
+
+
+def parse_size(text):
+    multipliers = {'k': 1_000, 'm': 1_000_000}
+    text = text.strip().lower()
+    if text[-1] in multipliers:
+        return int(float(text[:-1]) * multipliers[text[-1]])
+    return int(text)
+
+
+def payload_size(result):
+    if result is None:
+        return None
+    if hasattr(result, 'get_data'):
+        return len(result.get_data())
+    return len(pio_json.to_json_plotly(result))
+
+
+def measure(fn, repeat, setup=None):
+    times = []
+    result = None
+    for _ in range(repeat):
+        if setup:
+            setup()
+        started = time.perf_counter()
+        result = fn()
+        times.append((time.perf_counter() - started) * 1000)
+
+    if setup:
+        setup()
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'median_ms': round(statistics.median(times), 3),
+        'min_ms': round(min(times), 3),
+        'peak_kb': round(peak / 1024, 1),
+        'payload_bytes': payload_size(result),
+    }
+
+
+def without_payload(fn):
+    def run():
+        fn()
+    return run
+
+
+def clear_caches():
+    callbacks.map_html_cache.clear()
+    callbacks.layout_cache.clear()
+    plots._kde_cache.clear()
+
+
+def benchmark_cases(raw_frames, dataset, call):
+    laos_data, cube, time_index = dataset.laos_data, dataset.cube, dataset.time_index
+    weather_history = dataset.weather_history
+    next_observations = dataset.weather_df.assign(timestamp=weather_history.latest + pd.Timedelta(hours=1))
+    year_ago = (time_index.last_day - pd.DateOffset(years=1)).timestamp()
+    key_data = laos_data[laos_data['disease_code'].isin(callbacks.KEY_DISEASES)]
+    key_cube = cube.subset(disease_code=callbacks.KEY_DISEASES)
+    weather_data = dataset.weather_df.set_index('region')
+    station_info = callbacks.station_summary(dataset.stations, dataset.location_stations)
+    rng = np.random.default_rng(0)
+    many_locations = pd.DataFrame({'latitude': rng.uniform(13.9, 22.5, len(laos_data)),
+                                   'longitude': rng.uniform(100.1, 107.7, len(laos_data))})
+    first_query = dataset.news_df['title'].iloc[0].split()[0] if len(dataset.news_df) else "avian"
+
+    # (group, name, fn, setup)
+    return [
+        ('load', 'prepare_frames', without_payload(lambda: prepare_frames(raw_frames)), None),
+        ('load', 'Dataset', without_payload(lambda: Dataset(dataset.frames)), None),
+        ('load', 'TimeIndex', without_payload(lambda: TimeIndex.from_reports(laos_data)), None),
+        ('load', 'NeighbourRollup', without_payload(lambda: NeighbourRollup.from_records(dataset.neighbours_data)), None),
+        ('load', 'StationIndex.assign[one per report]',
+         without_payload(lambda: dataset.stations.assign(many_locations)), None),
+        ('load', 'WeatherHistory.appended', without_payload(lambda: weather_history.appended(next_observations)), None),
+        ('load', 'WeatherAlerts[full]', without_payload(lambda: WeatherAlerts().updated(weather_history)), None),
+        ('load', 'WeatherAlerts[next hour]',
+         without_payload(lambda: dataset.weather_alerts.updated(weather_history.appended(next_observations))), None),
+        *[('load', f'OutbreakWeatherCorrelation.build[{freq}]',
+           without_payload(lambda freq=freq: OutbreakWeatherCorrelation.build(
+               time_index, weather_history, dataset.stations, freq)), None)
+          for freq in FREQUENCIES],
+
+        ('plot', 'disease_pie_map_html',
+         lambda: plots.disease_pie_map_html(time_index.window(), time_index.province_centers), None),
+        ('plot', 'plot_disease_outbreak_overtime',
+         lambda: plots.plot_disease_outbreak_overtime(time_index.monthly(), True), None),
+        ('plot', 'plot_key_disease_distribution', lambda: plots.plot_key_disease_distribution(key_cube), None),
+        ('plot', 'key_disease_reports_overtime', lambda: plots.key_disease_reports_overtime(key_cube), None),
+        ('plot', 'key_disease_dist_overtime', lambda: plots.key_disease_dist_overtime(key_cube), None),
+        ('plot', 'key_disease_kde_distribution', lambda: plots.key_disease_kde_distribution(key_data), None),
+        ('plot', 'key_disease_wrt_location', lambda: plots.key_disease_wrt_location(key_cube), None),
+        ('plot', 'plot_disease_code_map', lambda: plots.plot_disease_code_map(key_cube), None),
+        ('plot', 'neighbour_chart_data', lambda: plots.neighbour_chart_data(dataset.neighbour_rollup), None),
+        ('plot', 'create_weather_map', lambda: plots.create_weather_map(weather_data, station_info), None),
+        ('plot', 'create_weather_charts', lambda: plots.create_weather_charts(weather_data), None),
+        *[('plot', f'weather_trend_figure[{days}d]',
+           lambda days=days: callbacks.weather_trend_figure(weather_history, days=days), None)
+          for days in callbacks.TREND_WINDOWS.values()],
+
+        # Tab builders run cold: caches are emptied before every call
+        ('builder', 'create_overview_content',
+         lambda: callbacks.create_overview_content(time_index, dataset.weather_df, dataset.version), clear_caches),
+        ('builder', 'create_key_diseases_content',
+         lambda: callbacks.create_key_diseases_content(laos_data, cube, dataset.version), clear_caches),
+        ('builder', 'create_neighboring_stats_content',
+         lambda: callbacks.create_neighboring_stats_content(dataset.neighbour_rollup), clear_caches),
+        ('builder', 'create_weather_content',
+         lambda: callbacks.create_weather_content(dataset.weather_df, dataset.stations, dataset.location_stations,
+                                                  weather_history, dataset.weather_alerts),
+         clear_caches),
+        ('builder', 'create_correlation_content',
+         lambda: callbacks.create_correlation_content(time_index, dataset.correlations), clear_caches),
+        ('builder', 'create_news_content',
+         lambda: callbacks.create_news_content(dataset.news_df), clear_caches),
+
+        # Callbacks go through the Dash request path with warm caches, as users see them
+        *[('callback', f'render_content[{tab}]',
+           lambda tab=tab: call('content.children', {'tabs.value': tab}),
+           lambda: callbacks.warm_layout_cache(dataset))
+          for tab in callbacks.TABS],
+        # A window whose map is not cached yet, as when a user drags the slider
+        ('callback', 'update_overview[last year]',
+         lambda: call('laos-map', {'overview-date-range.value': [year_ago, time_index.last_day.timestamp()],
+                                   'overview-province.value': 'All', 'overview-disease.value': 'All'}),
+         clear_caches),
+        ('callback', 'update_overview[province]',
+         lambda: call('laos-map', {'overview-date-range.value': [year_ago, time_index.last_day.timestamp()],
+                                   'overview-province.value': time_index.groups['province'].iloc[0],
+                                   'overview-disease.value': 'All'}),
+         clear_caches),
+        ('callback', 'update_weather_trend[region]',
+         lambda: call('weather-trend-chart', {'weather-trend-region.value': 'Bokeo',
+                                              'weather-trend-metric.value': 'humidity',
+                                              'weather-trend-window.value': 30}), None),
+        ('callback', 'update_weather_trend[zoom to a day]',
+         lambda: call('weather-trend-chart', {'weather-trend-region.value': 'All',
+                                              'weather-trend-metric.value': 'temperature',
+                                              'weather-trend-window.value': 365,
+                                              'weather-trend-chart.relayoutData': {
+                                                  'xaxis.range[0]': str(weather_history.latest - pd.Timedelta(days=1)),
+                                                  'xaxis.range[1]': str(weather_history.latest)}},
+                      triggered=['weather-trend-chart.relayoutData']), None),
+        ('callback', 'update_correlations[monthly]',
+         lambda: call('correlation-heatmap', {'correlation-disease.value': 'ND',
+                                              'correlation-measure.value': 'humidity',
+                                              'correlation-frequency.value': 'M',
+                                              'correlation-heatmap.clickData': None}), None),
+        ('callback', 'update_article_cards[empty]',
+         lambda: call('news-articles-container', {'news-search.value': None}, {'news-page.data': 1},
+                      triggered=['news-search.value']), None),
+        ('callback', 'update_article_cards[query]',
+         lambda: call('news-articles-container', {'news-search.value': first_query}, {'news-page.data': 1},
+                      triggered=['news-search.value']), None),
+        ('callback', 'update_article_cards[load more]',
+         lambda: call('news-articles-container', {'news-search.value': None, 'news-load-more.n_clicks': 1},
+                      {'news-page.data': 1}, triggered=['news-load-more.n_clicks']), None),
+    ]
+
+
+def run_size(n_cases, repeat, only=None):
+    raw_frames = generate_frames(n_cases=n_cases, n_news=max(100, n_cases // 100), raw=True)
+    # A year of hourly observations, as the history holds after a year of refreshes
+    weather_history = WeatherHistory().appended(generate_weather_observations(days=365))
+    dataset = Dataset(prepare_frames(raw_frames), weather_history=weather_history)
+
+    app = dash.Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP], suppress_callback_exceptions=True)
+    app.layout = create_layout()
+    callbacks.register_callbacks(app, FixtureStore(dataset))
+    call = CallbackClient(app)
+
+    results = {}
+    for group, name, fn, setup in benchmark_cases(raw_frames, dataset, call):
+        if only and only not in name:
+            continue
+        results[f"{group}:{name}"] = result = measure(fn, repeat, setup)
+        print(f"  {group:<9}{name:<36}{result['median_ms']:>10.2f} ms{result['peak_kb']:>12.0f} KB"
+              f"{result['payload_bytes'] or 0:>12} B", flush=True)
+    return results
+
+
+def previous_results():
+    files = sorted(glob.glob(os.path.join(RESULTS_DIR, "*.json")))
+    if not files:
+        return None
+    with open(files[-1]) as f:
+        return json.load(f)
+
+
+def compare(current, previous):
+    for size, cases in current['results'].items():
+        before_cases = previous['results'].get(size, {})
+        for case, result in cases.items():
+            before = before_cases.get(case)
+            if not before:
+                continue
+            for metric in ['median_ms', 'payload_bytes']:
+                old, new = before.get(metric), result.get(metric)
+                if old and new is not None and abs(new - old) / old > REGRESSION_THRESHOLD:
+                    change = (new - old) / old * 100
+                    print(f"  {size:>9} {case:<46}{metric:<15}{old:>12} -> {new:<12} ({change:+.0f}%)")
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1k,10k,100k", help="comma separated case row counts, e.g. 1k,1M,5M")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--only", help="run only cases whose name contains this text")
+    parser.add_argument("--no-save", action="store_true")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    current = {
+        'meta': {
+            'started_at': time.strftime("%Y-%m-%dT%H:%M:%S"),
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'machine': platform.platform(),
+            'repeat': args.repeat,
+        },
+        'results': {},
+    }
+    for size in args.sizes.split(","):
+        n_cases = parse_size(size)
+        print(f"{n_cases:,} case rows")
+        current['results'][str(n_cases)] = run_size(n_cases, args.repeat, args.only)
+
+    previous = previous_results()
+    if previous:
+        print(f"Changes against {previous['meta'].get('revision')} ({previous['meta']['started_at']}):")
+        compare(current, previous)
+
+    if not args.no_save:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        path = os.path.join(RESULTS_DIR, time.strftime("%Y%m%d-%H%M%S") + ".json")
+        with open(path, "w") as f:
+            json.dump(current, f, indent=1)
+        print(f"Saved {path}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
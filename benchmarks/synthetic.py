@@ -0,0 +1,146 @@
+"""Synthetic worksheets with the same columns and cell formats as the `disease_stats` sheets."""
+import numpy as np
+import pandas as pd
+
+from data_loader import prepare_frames
+
+# province: (capital, latitude, longitude)
+PROVINCES = {
+    "Attapeu": ("Attapeu", 14.81, 106.83),
+    "Bokeo": ("Houayxay", 20.28, 100.41),
+    "Bolikhamxai": ("Paksan", 18.39, 103.66),
+    "Champasak": ("Pakse", 15.12, 105.80),
+    "Houaphanh": ("Xam Neua", 20.42, 104.05),
+    "Khammouane": ("Thakhek", 17.40, 104.80),
+    "Luang Namtha": ("Luang Namtha", 20.95, 101.40),
+    "Luang Prabang": ("Luang Prabang", 19.89, 102.13),
+    "Oudomxay": ("Muang Xay", 20.69, 101.98),
+    "Phongsaly": ("Phongsaly", 21.68, 102.11),
+    "Sainyabuli": ("Sainyabuli", 19.26, 101.71),
+    "Salavan": ("Salavan", 15.72, 106.42),
+    "Savannakhet": ("Kaysone Phomvihane", 16.56, 104.75),
+    "Sekong": ("Sekong", 15.35, 106.72),
+    "Vientiane": ("Phonhong", 18.48, 102.42),
+    "Vientiane Prefecture": ("Vientiane", 17.97, 102.63),
+    "Xaisomboun": ("Anouvong", 18.88, 102.99),
+    "Xiangkhouang": ("Phonsavan", 19.45, 103.19),
+}
+DISEASES = ["HPAI-P", "ND", "IBD", "MG", "FMD", "HS", "CSF", "ASF", "PRRS", "Rabies"]
+DISEASE_WEIGHTS = np.array([18, 22, 12, 10, 9, 8, 7, 6, 5, 3], dtype=float)
+NEWS_TAGS = ["Press Release", "Newsletter", "Statement", "Joint Statement", "News"]
+NEIGHBOUR_DISEASES = ["HPAI", "ND", "ASF", "FMD", "Rabies", "Anthrax", "PPR", "LSD", "CSF", "HS"]
+WORDS = (
+    "avian influenza outbreak poultry farm vaccination province district livestock surveillance "
+    "health ministry report cases confirmed swine fever cattle village response team sample "
+    "laboratory animal disease control movement restriction market border import risk season"
+).split()
+
+
+def generate_frames(n_cases=10_000, n_news=1_000, n_neighbours=2_000, years=5, seed=0, raw=False, end=None):
+    """Five worksheets shaped like load_data_from_gsheets' inputs.
+
+    With raw=True the frames hold cells as the sheets return them (dates as strings);
+    otherwise they are passed through prepare_frames like a real load. Dates run up
+    to `end` (default now); pass a fixed one for data that does not change by the day.
+    """
+    rng = np.random.default_rng(seed)
+    end = pd.Timestamp.now() if end is None else pd.Timestamp(end)
+    frames = {
+        'laos_data': _laos_data(rng, n_cases, years, end),
+        'laos_regions': _laos_regions(),
+        'weather_data': _weather_data(rng, end),
+        'news_data': _news_data(rng, n_news, end),
+        'neighbours_data': _neighbours_data(rng, n_neighbours),
+    }
+    return frames if raw else prepare_frames(frames)
+
+
+def _laos_data(rng, n, years, end):
+    end = end.normalize()
+    days = rng.integers(0, 365 * years, n)
+    capitals = np.array([capital for capital, _, _ in PROVINCES.values()])
+    return pd.DataFrame({
+        'reported_date': (end - pd.to_timedelta(days, unit='D')).strftime('%Y-%m-%d'),
+        'location': capitals[rng.integers(0, len(capitals), n)],
+        'disease_code': np.array(DISEASES)[rng.choice(len(DISEASES), n, p=DISEASE_WEIGHTS / DISEASE_WEIGHTS.sum())],
+        'case': rng.geometric(0.08, n).astype(float),
+    })
+
+
+def _laos_regions():
+    return pd.DataFrame(
+        [(province, capital, lat, lon) for province, (capital, lat, lon) in PROVINCES.items()],
+        columns=['province', 'capital', 'latitude', 'longitude'],
+    )
+
+
+def _weather_data(rng, end):
+    n = len(PROVINCES)
+    now = end.floor('h')
+    temperature = rng.uniform(12, 38, n)
+    return pd.DataFrame({
+        'region': list(PROVINCES),
+        'temperature': temperature.round(2),
+        'feels_like': (temperature + rng.normal(1, 1.5, n)).round(2),
+        'humidity': rng.integers(40, 99, n),
+        'pressure': rng.integers(995, 1020, n),
+        'wind_speed': rng.gamma(2, 1.6, n).round(2),
+        'visibility': rng.uniform(2, 10, n).round(1),
+        'description': rng.choice(["clear sky", "few clouds", "light rain", "overcast clouds"], n),
+        'timestamp': now.strftime('%d/%m/%Y %H:%M'),
+        'sunrise': now.replace(hour=5, minute=50).strftime('%d/%m/%Y %H:%M'),
+        'sunset': now.replace(hour=17, minute=45).strftime('%d/%m/%Y %H:%M'),
+    })
+
+
+def generate_weather_observations(days=365, hours=1, seed=0, end=None):
+    """Prepared weather_data rows for every region every `hours` over the `days` days up to `end` (default now)."""
+    rng = np.random.default_rng(seed)
+    end = pd.Timestamp.now() if end is None else pd.Timestamp(end)
+    stamps = pd.date_range(end=end.floor('h'), periods=days * 24 // hours, freq=f"{hours}h")
+    regions = np.repeat(list(PROVINCES), len(stamps))
+    timestamps = np.tile(stamps, len(PROVINCES))
+    n = len(regions)
+    hour = pd.DatetimeIndex(timestamps).hour.to_numpy()
+    temperature = 26 + 6 * np.sin((hour - 9) / 24 * 2 * np.pi) + rng.normal(0, 1.5, n)
+    frame = pd.DataFrame({
+        'region': regions,
+        'temperature': temperature.round(2),
+        'feels_like': (temperature + rng.normal(1, 1.5, n)).round(2),
+        'humidity': rng.integers(40, 99, n),
+        'pressure': rng.integers(995, 1020, n),
+        'wind_speed': rng.gamma(2, 1.6, n).round(2),
+        'visibility': rng.uniform(2, 10, n).round(1),
+        'description': rng.choice(["clear sky", "few clouds", "light rain", "overcast clouds"], n),
+        'timestamp': pd.DatetimeIndex(timestamps).strftime('%d/%m/%Y %H:%M'),
+        'sunrise': pd.DatetimeIndex(timestamps).normalize().strftime('%d/%m/%Y 05:50'),
+        'sunset': pd.DatetimeIndex(timestamps).normalize().strftime('%d/%m/%Y 17:45'),
+    })
+    return prepare_frames({'weather_data': frame})['weather_data']
+
+
+def _news_data(rng, n, end):
+    dates = end.normalize() - pd.to_timedelta(np.sort(rng.integers(0, 2000, n)), unit='D')
+    words = np.array(WORDS)
+    return pd.DataFrame({
+        'title': [" ".join(words[rng.integers(0, len(words), 8)]).capitalize() for _ in range(n)],
+        'main_text': [" ".join(words[rng.integers(0, len(words), 400)]) for _ in range(n)],
+        'date': dates.strftime('%Y-%m-%d'),
+        'date_text': dates.strftime('%d %B %Y'),
+        'image_url': [f"https://example.org/images/{i}.jpg" for i in range(n)],
+        'url': [f"https://example.org/news/{i}" for i in range(n)],
+        'tag': rng.choice(NEWS_TAGS, n),
+    })
+
+
+def _neighbours_data(rng, n):
+    years = rng.integers(2022, 2026, n)
+    halves = rng.choice(["Jan-Jun-", "Jul-Dec-"], n)
+    return pd.DataFrame({
+        'Country': rng.choice(["Thailand", "Vietnam", "Cambodia", "Myanmar", "China"], n),
+        'Year': years.astype(float),
+        'Semester': [f"{half}{year}" for half, year in zip(halves, years)],
+        'Category': rng.choice(["Wild", "Domestic"], n),
+        'Disease': rng.choice(NEIGHBOUR_DISEASES, n),
+        'Disease status': rng.choice(["Present", "Absent", "Suspected"], n, p=[0.5, 0.35, 0.15]),
+    })
@@ -1,89 +1,126 @@
+import json
 import time
+import logging
 import pandas as pd
-from dash import Input, Output
+import plotly.io.json as pio_json
+from dash import Input, Output, State, MATCH, ALL, Patch, ClientsideFunction, ctx, no_update
+from dash.exceptions import PreventUpdate
 import dash_bootstrap_components as dbc
 from dash import html, dcc
 
-from data_loader import load_data_from_gsheets
-from components.utils import create_metric_card, create_kpi_card, clean_neighbour_data
+from cache import LRUCache
+from metrics import instrument, watch_cache
+from data_store import DataStore
+from components.utils import create_metric_card, create_kpi_card, get_date_marks
 from components.views import calculate_news_metrics, \
-    make_article_card, generate_weather_alerts, \
-    create_weather_cards_column, create_alerts_column, create_weather_chart_column
+    make_article_card, create_spotlight_row, create_loading_placeholder, \
+    create_weather_cards_column, create_alerts_column, create_weather_chart_column, \
+    spotlight_texts, create_spotlight_store
 from plots import (
-    plot_disease_outbreak_overtime, plot_disease_pie_map, plot_key_disease_distribution,
+    plot_disease_outbreak_overtime, disease_pie_map_html, plot_key_disease_distribution,
     key_disease_dist_overtime, key_disease_kde_distribution, plot_disease_code_map,
-    key_disease_wrt_location, disease_category_by_country, present_diseases_chart,
-    create_weather_map, create_weather_charts
+    key_disease_wrt_location, neighbour_chart_data,
+    create_weather_map, create_weather_charts, create_weather_trend_chart, WEATHER_METRICS,
+    create_correlation_heatmap, create_correlation_timeline
 )
+from correlations import MEASURES, FREQUENCIES, MIN_PERIODS, shift_rows
+
+logger = logging.getLogger(__name__)
+
+TABS = ['Overview', 'Key Diseases', 'Neighboring Stats', 'Weather Information', 'Outbreak & Weather',
+        'Global Health News']
+NEWS_PAGE_SIZE = 20
+
+# Rendered folium documents, shared by every request of this process
+MAP_HTML_CACHE_BYTES = 32 * 1024 * 1024
+map_html_cache = watch_cache("map_html", LRUCache(max_items=64, max_bytes=MAP_HTML_CACHE_BYTES))
+
+# Serialized tab layouts keyed by (tab, dataset version); entries are (tree, json size)
+LAYOUT_CACHE_BYTES = 64 * 1024 * 1024
+layout_cache = watch_cache("layout", LRUCache(
+    max_items=4 * len(TABS), max_bytes=LAYOUT_CACHE_BYTES, sizeof=lambda entry: entry[1]))
+
 
 # ---------------------- Overview ---------------------------------------------
 
-def create_overview_content(laos_data, weather_df):
-    current_time = int(time.time())
-    region_index = (current_time // 30) % len(weather_df)
-    # region_index = 1
-    region_data = weather_df.iloc[region_index - 1]
+def overview_window(time_index, date_range=None, province='All', disease='All'):
+    """(start, end, provinces, diseases) for TimeIndex queries from the Overview controls."""
+    if date_range:
+        start, end = (pd.Timestamp(value, unit='s').normalize() for value in date_range)
+    else:
+        start, end = time_index.first_day, time_index.last_day
+    provinces = None if province in (None, 'All') else [province]
+    diseases = None if disease in (None, 'All') else [disease]
+    return start, end, provinces, diseases
+
+
+def get_pie_map_html(time_index, window, version=None):
+    start, end, provinces, diseases = window
+    render = lambda: disease_pie_map_html(
+        time_index.window(start, end, provinces, diseases), time_index.province_centers
+    )
+    if version is None:
+        return render()
+    key = (version, start.date(), end.date(), tuple(provinces or ()), tuple(diseases or ()))
+    return map_html_cache.get_or_create(key, render)
+
+
+def overview_kpis(time_index, window):
+    """Values of the three Overview KPI cards for `window`."""
+    sums = time_index.window(*window)
+    if sums.empty:
+        return "0", "-", "-"
+
+    cases_by_disease = sums.groupby('disease_code', observed=True)['case'].sum()
+    cases_by_province = sums.groupby('province', observed=True)['case'].sum()
+    return (
+        f"{sums['case'].sum():.0f}",
+        f"{cases_by_disease.idxmax()} ({cases_by_disease.max():.0f})" if len(cases_by_disease) else "-",
+        f"{cases_by_province.idxmax()} ({cases_by_province.max():.0f})" if len(cases_by_province) else "-",
+    )
 
-    timely_stats_graph = plot_disease_outbreak_overtime(laos_data, code_filter=True)
-    laos_map = plot_disease_pie_map(laos_data)
-    laos_map_html = laos_map._repr_html_()
 
-    total_cases = laos_data['case'].sum()
-    most_viral = laos_data.groupby('disease_code')['case'].sum().idxmax()
-    most_viral_cases = laos_data.groupby('disease_code')['case'].sum().max()
-    most_affected = laos_data.groupby('province')['case'].sum().idxmax()
-    most_affected_cases = laos_data.groupby('province')['case'].sum().max()
+def create_overview_content(time_index, weather_df, version=None):
+    window = overview_window(time_index)
+    spotlight = spotlight_regions(weather_df)
+    timely_stats_graph = plot_disease_outbreak_overtime(time_index.monthly(), code_filter=True)
+    laos_map_html = get_pie_map_html(time_index, window, version)
+    total_cases, most_viral, most_affected = overview_kpis(time_index, window)
 
     # Get default values
-    all_provinces = ['All'] + sorted(laos_data['province'].unique().tolist())
-    all_diseases = ['All'] + sorted(laos_data['disease_code'].unique().tolist())
+    all_provinces = ['All'] + time_index.groups['province'].dropna().unique().sort_values().tolist()
+    all_diseases = ['All'] + time_index.groups['disease_code'].dropna().unique().sort_values().tolist()
+    first_day, last_day = window[0], window[1]
 
 
     return html.Div([
-        # First row
+        # First row: region spotlight, rotated in the browser
+        create_spotlight_store('overview', spotlight),
+        create_spotlight_row(spotlight[0]) if spotlight else None,
+
+        # Filters for the map, KPIs and timeline
         dbc.Row([
-            # Weather cards
             dbc.Col([
-                dbc.Row([
-                    dbc.Col(dbc.Card([
-                        html.H2(f"{region_data['region']}",
-                                id='region-name', className='card-title'),
-                        html.P('🎯 Region Spotlight')
-                    ], body=True, color='#2a9d8f', inverse=True), width=2),
-
-                    dbc.Col(dbc.Card([
-                        html.H2(f"{region_data['temperature']:.1f}°C",
-                                id='region-temperature', className='card-title'),
-                        html.P("Temperature")
-                    ], body=True, color='#e76f51', inverse=True), width=2),
-
-                    dbc.Col(dbc.Card([
-                        html.H2(f"{region_data['humidity']}%",
-                                id='region-humidity', className='card-title'),
-                        html.P('Humidity')
-                    ], body=True, color='#5bc0be', inverse=True), width=2),
-
-                    dbc.Col(dbc.Card([
-                        html.H2(f"{region_data['pressure']} hPa",
-                                id='region-pressure', className='card-title'),
-                        html.P('Pressure')
-                    ], body=True, color='#56ab91', inverse=True), width=2),
-
-                    dbc.Col(dbc.Card([
-                        html.H2(f"{region_data['wind_speed']:.1f} m/s",
-                                id='region-windspeed', className='card-title'),
-                        html.P('Wind Speed')
-                    ], body=True, color='#83c5be', inverse=True), width=2),
-
-                    dbc.Col(dbc.Card([
-                        html.H2(f"{region_data['visibility']:.1f} km",
-                                id='region-visibility', className='card-title'),
-                        html.P('Visibility')
-                    ], body=True, color='#e9c46a', inverse=True), width=2),
-
-                ], className="mb-4")
-            ], width=12)
-        ]),
+                html.Label("Reported Between"),
+                dcc.RangeSlider(
+                    id='overview-date-range',
+                    min=first_day.timestamp(),
+                    max=last_day.timestamp(),
+                    step=24 * 3600,
+                    value=[first_day.timestamp(), last_day.timestamp()],
+                    marks=get_date_marks(first_day, last_day),
+                    updatemode='mouseup',
+                ),
+            ], width=6),
+            dbc.Col([
+                html.Label("Province"),
+                dcc.Dropdown(id='overview-province', options=all_provinces, value='All', clearable=False),
+            ], width=3),
+            dbc.Col([
+                html.Label("Disease"),
+                dcc.Dropdown(id='overview-disease', options=all_diseases, value='All', clearable=False),
+            ], width=3),
+        ], className="mb-2", style={"margin-top": "15px"}),
 
         # Second Row with map and stats
         dbc.Row([
@@ -100,9 +137,9 @@ def create_overview_content(laos_data, weather_df):
             dbc.Col([
                 # KPI cards row
                 dbc.Row([
-                    dbc.Col(create_kpi_card("Total Cases Reported", f"{total_cases:.0f}", card_id="total-cases-kpi"), width=4),
-                    dbc.Col(create_kpi_card("Most Viral Disease", f"{most_viral} ({most_viral_cases:.0f})", card_id="most-viral-kpi"), width=4),
-                    dbc.Col(create_kpi_card("Most Affected Province", f"{most_affected} ({most_affected_cases:.0f})", card_id="most-affected-kpi"), width=4),
+                    dbc.Col(create_kpi_card("Total Cases Reported", total_cases, card_id="total-cases-kpi"), width=4),
+                    dbc.Col(create_kpi_card("Most Viral Disease", most_viral, card_id="most-viral-kpi"), width=4),
+                    dbc.Col(create_kpi_card("Most Affected Province", most_affected, card_id="most-affected-kpi"), width=4),
                 ], className="g-2 mb-3"),
 
                 # Timely stats graph
@@ -113,34 +150,42 @@ def create_overview_content(laos_data, weather_df):
                     style={"height": "400px"}
                 ),
             ], width=6)
-        ], className="mb-2", style={"margin-top": "15px"})
+        ], className="mb-2")
     ])
 
 
 # ---------------------- Key Diseases ---------------------------------------------
 
-def create_key_diseases_content(laos_data):
-    key_diseases = ["HPAI-P", "ND", "IBD", "MG"]
-    data = laos_data[laos_data['disease_code'].isin(key_diseases)]
+KEY_DISEASES = ["HPAI-P", "ND", "IBD", "MG"]
+
+
+def create_key_diseases_content(laos_data, cube, version=None):
+    data = laos_data[laos_data['disease_code'].isin(KEY_DISEASES)]
+    key_cube = cube.subset(disease_code=KEY_DISEASES)
 
     return html.Div([
         dbc.Row([
-            dbc.Col(dcc.Graph(figure=plot_key_disease_distribution(data)), width=4),
-            dbc.Col(dcc.Graph(figure=key_disease_kde_distribution(data)), width=4),
-            dbc.Col(dcc.Graph(figure=key_disease_dist_overtime(data)), width=4),
+            dbc.Col(dcc.Graph(figure=plot_key_disease_distribution(key_cube)), width=4),
+            dbc.Col(dcc.Graph(figure=key_disease_kde_distribution(data, version)), width=4),
+            dbc.Col(dcc.Graph(figure=key_disease_dist_overtime(key_cube)), width=4),
         ], className="mb-2", style={"margin-top": "15px"}),
         
         dbc.Row([
-            dbc.Col(dcc.Graph(figure=plot_disease_code_map(data)), width=5),
-            dbc.Col(dcc.Graph(figure=key_disease_wrt_location(data)), width=7),
+            dbc.Col(dcc.Graph(figure=plot_disease_code_map(key_cube)), width=5),
+            dbc.Col(dcc.Graph(figure=key_disease_wrt_location(key_cube)), width=7),
         ], className="mb-2", style={"margin-top": "15px"})
     ])
 
 
 # ---------------------- Neighboring Stats ---------------------------------------------
 
-def create_neighboring_stats_content(neighbours_data):
+def create_neighboring_stats_content(rollup):
+    # The charts are drawn clientside (assets/neighbours.js) from the rollup in the store
+    years = rollup.years() or (0, 0)
+    first_year, last_year = years
+
     return html.Div([
+        dcc.Store(id='neighbour-chart-data', data=neighbour_chart_data(rollup)),
         dbc.Row([
             dbc.Col([
                 html.Label("Select Country"),
@@ -155,6 +200,15 @@ def create_neighboring_stats_content(neighbours_data):
                     multi=True,
                     style={"margin-bottom": "10px"}
                 ),
+                html.Label("Select Years"),
+                dcc.RangeSlider(
+                    id='neighbour-year-range',
+                    min=first_year,
+                    max=last_year,
+                    step=1,
+                    value=[max(first_year, last_year - 1), last_year],
+                    marks={year: str(year) for year in range(first_year, last_year + 1)},
+                ),
                 dcc.Graph(id='disease-category-by-country', style={"height": "100%"})
             ], width=4, style={"display": "flex", "flexDirection": "column"}),
 
@@ -168,25 +222,59 @@ def create_neighboring_stats_content(neighbours_data):
 
 # ---------------------- Weather Information ---------------------------------------------
 
-def create_weather_content(weather_df, laos_df):
-    # Data processing
-    weather_df['sunrise'] = pd.to_datetime(weather_df['sunrise'])
-    weather_df['sunset'] = pd.to_datetime(weather_df['sunset'])
-    
-    # Get current region data
-    current_time = int(time.time())
-    region_index = (current_time // 30) % len(weather_df)
-    region_data = weather_df.iloc[region_index - 1]
+# Trend window choices, in days back from the latest observation
+TREND_WINDOWS = {'24 Hours': 1, '7 Days': 7, '30 Days': 30, '1 Year': 365}
+
+
+def weather_trend_figure(weather_history, region='All', metric='temperature', days=7, start=None, end=None):
+    """Trend over the last `days` days, or between `start` and `end` when the chart is zoomed."""
+    if start is None or end is None:
+        end = weather_history.latest
+        start = None if end is None else end - pd.Timedelta(days=days)
+    regions = None if region in (None, 'All') else [region]
+    trend, resolution = weather_history.query(metric, start, end, regions)
+    fig = create_weather_trend_chart(trend, metric, resolution)
+    # Zooming keeps its range while the chart is re-fetched; a new selection resets it
+    fig.update_layout(uirevision=f"{region}|{metric}|{days}")
+    return fig
+
+
+def zoomed_range(relayout_data):
+    """(start, end) of the x axis from a chart's relayoutData.
+
+    (None, None) when the zoom was reset, None when the x axis did not change.
+    """
+    relayout_data = relayout_data or {}
+    if 'xaxis.range[0]' in relayout_data and 'xaxis.range[1]' in relayout_data:
+        return pd.Timestamp(relayout_data['xaxis.range[0]']), pd.Timestamp(relayout_data['xaxis.range[1]'])
+    if 'xaxis.range' in relayout_data:
+        return tuple(pd.Timestamp(value) for value in relayout_data['xaxis.range'][:2])
+    if relayout_data.get('xaxis.autorange'):
+        return None, None
+    return None
+
+
+def station_summary(stations, location_stations):
+    """Station coordinates by region, with the number of outbreak locations nearest to each."""
+    counts = location_stations['station'].value_counts()
+    return stations.stations.set_index('region').assign(
+        locations=counts.reindex(stations.stations['region'], fill_value=0).to_numpy()
+    )
+
 
+def create_weather_content(weather_df, stations, location_stations, weather_history, weather_alerts):
     # Prepare data for visualizations
-    weather_data = weather_df.set_index('region').to_dict(orient='index')
-    LAOS_REGIONS = laos_df.set_index('province').to_dict(orient='index')
+    weather_data = weather_df.set_index('region')
+    station_info = station_summary(stations, location_stations)
 
 
     # Create visualizations
-    weather_map = create_weather_map(weather_data, LAOS_REGIONS)
+    weather_map = create_weather_map(weather_data, station_info)
     temp_chart, humidity_chart = create_weather_charts(weather_data)
-    alerts = generate_weather_alerts(weather_data)
+    alerts = weather_alerts.messages()
+    trend_chart = weather_trend_figure(weather_history)
+    spotlight = spotlight_regions(weather_df)
+    trend_regions = ['All'] + sorted(weather_history.raw['region'].unique())
 
     return html.Div([
         # First row with map, weather cards, and alerts
@@ -201,8 +289,11 @@ def create_weather_content(weather_df, laos_df):
                 ),
                 width=6),
             
-            # Weather cards column
-            dbc.Col(create_weather_cards_column(region_data), width=3),
+            # Weather cards column, rotated in the browser
+            dbc.Col([
+                create_spotlight_store('weather', spotlight),
+                *(create_weather_cards_column(spotlight[0]) if spotlight else []),
+            ], width=3),
             
             # Alerts column
             dbc.Col(create_alerts_column(alerts), width=3)
@@ -212,19 +303,112 @@ def create_weather_content(weather_df, laos_df):
         dbc.Row([
             dbc.Col(create_weather_chart_column(temp_chart, "regional-temp-chart"), width=6),
             dbc.Col(create_weather_chart_column(humidity_chart, "regional-humidity-chart"), width=6),
-        ], className="mb-2", style={"margin-top": "15px"})
+        ], className="mb-2", style={"margin-top": "15px"}),
+
+        # Third row with trends from the weather history
+        dbc.Row([
+            dbc.Col([
+                html.Label("Region"),
+                dcc.Dropdown(id='weather-trend-region', options=trend_regions, value='All', clearable=False),
+            ], width=3),
+            dbc.Col([
+                html.Label("Measure"),
+                dcc.Dropdown(id='weather-trend-metric',
+                             options=[{'label': label, 'value': metric} for metric, label in WEATHER_METRICS.items()],
+                             value='temperature', clearable=False),
+            ], width=3),
+            dbc.Col([
+                html.Label("Period"),
+                dbc.RadioItems(id='weather-trend-window',
+                               options=[{'label': label, 'value': days} for label, days in TREND_WINDOWS.items()],
+                               value=7, inline=True),
+            ], width=6),
+        ], className="mb-2", style={"margin-top": "15px"}),
+        dbc.Row([
+            dbc.Col(create_weather_chart_column(trend_chart, "weather-trend-chart"), width=12),
+        ], className="mb-2")
+    ])
+
+
+# --------------------------- Outbreak & Weather ------------------------------------
+
+PERIOD_LABELS = {'W': 'Week', 'M': 'Month'}
+
+
+def correlation_view(correlations, freq='W', disease='HPAI-P', measure='temperature', province=None):
+    """Heatmap, timeline and note for one disease, read from the precomputed correlations.
+
+    The timeline shows `province`, or the province with the strongest correlation.
+    """
+    correlation = correlations[freq]
+    period_label = PERIOD_LABELS[freq]
+    rows = correlation.rows(disease)
+    provinces = correlation.groups.loc[rows, 'province'].astype(str).tolist()
+    if province not in provinces:
+        province = correlation.strongest(disease, measure)
+
+    heatmap = create_correlation_heatmap(correlation.lagged[measure][rows], provinces, measure, period_label)
+    if province is None:
+        timeline = create_correlation_timeline([], [], [], [], measure, 0, period_label, f"{disease}: no cases in the overlapping periods")
+    else:
+        row = rows[provinces.index(province)]
+        lag = int(correlation.best_lag[measure][row])
+        r = correlation.lagged[measure][row, lag]
+        timeline = create_correlation_timeline(
+            correlation.periods, correlation.cases[row],
+            shift_rows(correlation.weather[measure][[row]], [lag])[0],
+            correlation.rolling[measure][row], measure, lag, period_label,
+            f"{disease} in {province}" + ("" if pd.isna(r) else f" (r = {r:.2f} at lag {lag})"),
+        )
+
+    if len(correlation) < MIN_PERIODS:
+        note = (f"Not enough weather history yet: {len(correlation)} {FREQUENCIES[freq].lower()} periods overlap "
+                f"the case reports, correlations need at least {MIN_PERIODS}.")
+    else:
+        note = (f"{len(correlation)} {FREQUENCIES[freq].lower()} periods with both case reports and weather history, "
+                f"{correlation.periods[0]:%d %b %Y} to {correlation.periods[-1]:%d %b %Y}. "
+                f"Weather is taken from the station nearest to each province. Click a province to plot it.")
+    return heatmap, timeline, note
+
+
+def create_correlation_content(time_index, correlations):
+    diseases = time_index.groups['disease_code'].dropna().unique().sort_values().tolist()
+    disease = 'HPAI-P' if 'HPAI-P' in diseases else (diseases or [None])[0]
+    heatmap, timeline, note = correlation_view(correlations, disease=disease)
+
+    return html.Div([
+        dbc.Row([
+            dbc.Col([
+                html.Label("Disease"),
+                dcc.Dropdown(id='correlation-disease', options=diseases, value=disease, clearable=False),
+            ], width=3),
+            dbc.Col([
+                html.Label("Weather"),
+                dbc.RadioItems(id='correlation-measure',
+                               options=[{'label': label, 'value': measure} for measure, label in MEASURES.items()],
+                               value='temperature', inline=True),
+            ], width=4),
+            dbc.Col([
+                html.Label("Periods"),
+                dbc.RadioItems(id='correlation-frequency',
+                               options=[{'label': label, 'value': freq} for freq, label in FREQUENCIES.items()],
+                               value='W', inline=True),
+            ], width=3),
+        ], className="mb-2", style={"margin-top": "15px"}),
+        html.P(note, id='correlation-note', className="text-muted", style={"fontSize": "0.85rem"}),
+        dbc.Row([
+            dbc.Col(dcc.Graph(id='correlation-heatmap', figure=heatmap), width=5),
+            dbc.Col(dcc.Graph(id='correlation-timeline', figure=timeline), width=7),
+        ], className="mb-2"),
     ])
 
 
 # --------------------------- News ------------------------------------
 
 def create_news_content(news_df):
-    # Data processing
-    news_df['date'] = pd.to_datetime(news_df['date'], errors='coerce')
-    
     # Calculate metrics
     news_metrics = calculate_news_metrics(news_df)
-    articles = news_df.to_dict("records")
+    latest = news_metrics['latest_date']
 
     return html.Div([
         # Metrics row
@@ -238,15 +422,16 @@ def create_news_content(news_df):
             create_metric_card(str(news_metrics['newsletters']), "Newsletters", "#00b4d8", width=2),
             create_metric_card(str(news_metrics['statements']), "Statements", "#00b4d8", width=2),
             create_metric_card(
-                f"{news_metrics['days_ago']} days ago" if news_metrics['days_ago'] else "Recent",
+                html.Span(f"{latest:%d %b %Y}" if latest is not None else "Recent", id='news-latest-age'),
                 "Latest Article",
                 "#00b4d8",
                 width=2)
         ], className="mb-4"),
+        dcc.Store(id='news-latest-date', data=latest.isoformat() if latest is not None else None),
         
         # Articles row
         dbc.Row(dbc.Col([
-            html.H5(f"📰 Latest Articles ({len(articles)})", className="mb-3"),
+            html.H5(f"📰 Latest Articles ({len(news_df)})", className="mb-3"),
 
             dcc.Input(
                 id="news-search",
@@ -255,7 +440,12 @@ def create_news_content(news_df):
                 debounce=True,
                 className="form-control mb-3"
             ),
-            html.Div(id="news-articles-container")
+            html.Div(id="news-articles-container"),
+            dcc.Store(id="news-page", data=1),
+            html.Div([
+                dbc.Button("Load more", id="news-load-more", color="secondary", outline=True, size="sm"),
+                html.Span(id="news-shown-count", className="text-muted ms-3", style={"fontSize": "0.8rem"})
+            ], className="mb-3")
         ], width=12),
             className="mb-2",
             style={"margin-top": "15px"})
@@ -264,56 +454,207 @@ def create_news_content(news_df):
 
 
 
+# --------------------------- Region spotlight ------------------------------------
+
+def spotlight_regions(weather_df):
+    """Spotlight card texts of every region, for the store assets/spotlight.js rotates through."""
+    return [spotlight_texts(row) for row in weather_df.to_dict('records')]
+
+
+# --------------------------- Layout cache ------------------------------------
+
+def build_tab_content(tab, dataset):
+    if tab == 'Overview':
+        return create_overview_content(dataset.time_index, dataset.weather_df, dataset.version)
+    elif tab == 'Key Diseases':
+        return create_key_diseases_content(dataset.laos_data, dataset.cube, dataset.version)
+    elif tab == 'Neighboring Stats':
+        return create_neighboring_stats_content(dataset.neighbour_rollup)
+    elif tab == 'Weather Information':
+        return create_weather_content(dataset.weather_df, dataset.stations, dataset.location_stations,
+                                      dataset.weather_history, dataset.weather_alerts)
+    elif tab == 'Outbreak & Weather':
+        return create_correlation_content(dataset.time_index, dataset.correlations)
+    elif tab == 'Global Health News':
+        return create_news_content(dataset.news_df)
+    return None
+
+
+def get_tab_layout(tab, dataset):
+    """Tab layout as the JSON-ready tree Dash sends, built once per dataset version."""
+    def build():
+        serialized = pio_json.to_json_plotly(build_tab_content(tab, dataset))
+        return json.loads(serialized), len(serialized)
+
+    return layout_cache.get_or_create((tab, dataset.version), build)[0]
+
+
+def warm_layout_cache(dataset):
+    started = time.perf_counter()
+    for tab in TABS:
+        get_tab_layout(tab, dataset)
+    logger.info("Warmed tab layouts for dataset %s in %.0f ms", dataset.version, (time.perf_counter() - started) * 1000)
+
+
 # --------------------------- Callbacks ------------------------------------
 
-def register_callbacks(app):
-    laos_data, laos_df, weather_df, news_df, neighbours_data = load_data_from_gsheets()
+def register_callbacks(app, store=None):
+    store = store or DataStore()
+    store.add_listener(warm_layout_cache)
+    # The first load runs in the background thread too, so the server answers right away
+    store.start()
 
     @app.callback(
-        Output('content', 'children'),
-        [Input('tabs', 'value')]
+        [Output('dataset-version', 'data'),
+         Output('loading-poll', 'disabled')],
+        [Input('interval-refresh', 'n_intervals'),
+         Input('loading-poll', 'n_intervals')],
+        State('rendered-version', 'data'),
+        prevent_initial_call=True
     )
-    def render_content(tab):
-        if tab == 'Overview':
-            return create_overview_content(laos_data, weather_df)
-        elif tab == 'Key Diseases':
-            return create_key_diseases_content(laos_data)
-        elif tab == 'Neighboring Stats':
-            return create_neighboring_stats_content(neighbours_data)
-        elif tab == 'Weather Information':
-            return create_weather_content(weather_df, laos_df)
-        elif tab == 'Global Health News':
-            return create_news_content(news_df)
-        return html.Div([html.H3('Select a tab to see the content.')])
+    @instrument('check_for_new_data')
+    def check_for_new_data(_refresh_ticks, _loading_ticks, rendered_version):
+        # The refresh itself runs in the store's background thread; the tab is
+        # re-rendered on a later tick once a new dataset has been swapped in.
+        dataset = store.current
+        if dataset is None:
+            raise PreventUpdate
+        if ctx.triggered_id == 'interval-refresh':
+            store.request_refresh()
+        if dataset.version == rendered_version:
+            return no_update, True
+        return dataset.version, True
 
+    @app.callback(
+        [Output('content', 'children'),
+         Output('rendered-version', 'data')],
+        [Input('tabs', 'value'),
+         Input('dataset-version', 'data')]
+    )
+    @instrument('render_content', tab=lambda tab, *_: tab if tab in TABS else 'other')
+    def render_content(tab, _version):
+        dataset = store.current
+        if dataset is None:
+            return create_loading_placeholder(store.status()), None
+        if tab not in TABS:
+            return html.Div([html.H3('Select a tab to see the content.')]), dataset.version
+        return get_tab_layout(tab, dataset), dataset.version
 
     @app.callback(
-        [Output('disease-category-by-country', 'figure'),
-         Output('present-diseases-chart', 'figure')],
-        [Input('neighbour-country-dropdown', 'value')]
+        [Output('laos-map', 'srcDoc'),
+         Output('total-cases-kpi', 'children'),
+         Output('most-viral-kpi', 'children'),
+         Output('most-affected-kpi', 'children'),
+         Output('timely-stats', 'figure')],
+        [Input('overview-date-range', 'value'),
+         Input('overview-province', 'value'),
+         Input('overview-disease', 'value')],
+        prevent_initial_call=True
     )
-    def update_neighboring_charts(country):
-        data = clean_neighbour_data(neighbours_data)
+    @instrument('update_overview')
+    def update_overview(date_range, province, disease):
+        dataset = store.current
+        time_index = dataset.time_index
+        window = overview_window(time_index, date_range, province, disease)
+        total_cases, most_viral, most_affected = overview_kpis(time_index, window)
         return (
-            disease_category_by_country(data[data['Country'].isin(country)]),
-            present_diseases_chart(data[data['Country'].isin(country)])
+            get_pie_map_html(time_index, window, dataset.version),
+            create_kpi_card("Total Cases Reported", total_cases, card_id="total-cases-kpi").children,
+            create_kpi_card("Most Viral Disease", most_viral, card_id="most-viral-kpi").children,
+            create_kpi_card("Most Affected Province", most_affected, card_id="most-affected-kpi").children,
+            plot_disease_outbreak_overtime(time_index.monthly(*window), code_filter=True),
         )
-        
+
     @app.callback(
-        Output("news-articles-container", "children"),
-        Input("news-search", "value")
+        Output('weather-trend-chart', 'figure'),
+        [Input('weather-trend-region', 'value'),
+         Input('weather-trend-metric', 'value'),
+         Input('weather-trend-window', 'value'),
+         Input('weather-trend-chart', 'relayoutData')],
+        prevent_initial_call=True
     )
-    def update_article_cards(search_query):
-        filtered_articles = news_df.to_dict("records")
+    @instrument('update_weather_trend')
+    def update_weather_trend(region, metric, days, relayout_data):
+        # A zoom re-fetches the visible range, at the finer resolution a shorter range allows
+        start = end = None
+        if ctx.triggered_id == 'weather-trend-chart':
+            visible = zoomed_range(relayout_data)
+            if visible is None:
+                raise PreventUpdate
+            start, end = visible
+        return weather_trend_figure(store.current.weather_history, region, metric, days, start, end)
 
-        if search_query:
-            query = search_query.lower()
-            filtered_articles = [
-                a for a in filtered_articles
-                if query in a['title'].lower() or query in a['main_text'].lower()
-            ]
+    @app.callback(
+        [Output('correlation-heatmap', 'figure'),
+         Output('correlation-timeline', 'figure'),
+         Output('correlation-note', 'children')],
+        [Input('correlation-disease', 'value'),
+         Input('correlation-measure', 'value'),
+         Input('correlation-frequency', 'value'),
+         Input('correlation-heatmap', 'clickData')],
+        prevent_initial_call=True
+    )
+    @instrument('update_correlations')
+    def update_correlations(disease, measure, freq, click_data):
+        # A click on the heatmap picks the province; other changes go back to the strongest one
+        province = None
+        if ctx.triggered_id == 'correlation-heatmap' and click_data:
+            province = click_data['points'][0]['y']
+        return correlation_view(store.current.correlations, freq, disease, measure, province)
+
+    app.clientside_callback(
+        ClientsideFunction(namespace='spotlight', function_name='rotate'),
+        Output({'type': 'spotlight-value', 'tab': MATCH, 'field': ALL}, 'children'),
+        Input({'type': 'spotlight-interval', 'tab': MATCH}, 'n_intervals'),
+        State({'type': 'spotlight-data', 'tab': MATCH}, 'data')
+    )
+
+    app.clientside_callback(
+        ClientsideFunction(namespace='news', function_name='age'),
+        Output('news-latest-age', 'children'),
+        Input('news-latest-date', 'data')
+    )
 
-        if not filtered_articles:
-            return dbc.Alert("No articles found.", color="warning")
+    app.clientside_callback(
+        ClientsideFunction(namespace='neighbours', function_name='charts'),
+        [Output('disease-category-by-country', 'figure'),
+         Output('present-diseases-chart', 'figure')],
+        [Input('neighbour-country-dropdown', 'value'),
+         Input('neighbour-year-range', 'value'),
+         Input('neighbour-chart-data', 'data')]
+    )
 
-        return [make_article_card(article) for article in filtered_articles]      
+    @app.callback(
+        [Output("news-articles-container", "children"),
+         Output("news-page", "data"),
+         Output("news-shown-count", "children"),
+         Output("news-load-more", "style")],
+        [Input("news-search", "value"),
+         Input("news-load-more", "n_clicks")],
+        State("news-page", "data")
+    )
+    @instrument('update_article_cards')
+    def update_article_cards(search_query, _load_more_clicks, page):
+        dataset = store.current
+        articles = dataset.news_df
+        # Rows in display order; only the ones of the page being sent are taken from news_df
+        rows = dataset.search_news(search_query) if search_query else range(len(articles))
+
+        if not len(rows):
+            return dbc.Alert("No articles found.", color="warning"), 1, "", {"display": "none"}
+
+        if ctx.triggered_id == "news-load-more":
+            # Only the next page is built and sent; the browser appends it
+            page = (page or 1) + 1
+            cards = Patch()
+            cards.extend([
+                make_article_card(article)
+                for article in articles.iloc[rows[(page - 1) * NEWS_PAGE_SIZE:page * NEWS_PAGE_SIZE]].to_dict("records")
+            ])
+        else:
+            page = 1
+            cards = [make_article_card(article) for article in articles.iloc[rows[:NEWS_PAGE_SIZE]].to_dict("records")]
+
+        shown = min(page * NEWS_PAGE_SIZE, len(rows))
+        load_more_style = {"display": "none"} if shown >= len(rows) else {}
+        return cards, page, f"Showing {shown} of {len(rows)} articles", load_more_style
@@ -1,6 +1,9 @@
 import dash_bootstrap_components as dbc
 from dash import dcc, html
 
+import static_assets
+
+
 def create_tabs():
     return dcc.Tabs(
         id='tabs',
@@ -10,6 +13,7 @@ def create_tabs():
             dcc.Tab(label='Key Diseases', value='Key Diseases', className='custom-tab'),
             dcc.Tab(label='Neighboring Stats', value='Neighboring Stats', className='custom-tab'),
             dcc.Tab(label='Weather Information', value='Weather Information', className='custom-tab'),
+            dcc.Tab(label='Outbreak & Weather', value='Outbreak & Weather', className='custom-tab'),
             dcc.Tab(label='Global Health News', value='Global Health News', className='custom-tab'),
         ],
         className='custom-tabs-container',
@@ -23,11 +27,18 @@ def create_layout():
             interval=3600 * 1000,  # 1 hour = 3600000 ms
             n_intervals=0
         ),
+        dcc.Interval(
+            id='loading-poll',
+            interval=2 * 1000,  # until the first dataset is loaded, then disabled
+            n_intervals=0
+        ),
+        dcc.Store(id='dataset-version'),
+        dcc.Store(id='rendered-version'),
         dbc.Row([
             dbc.Col(html.H1("Disease Statistics in Laos"), width=9, className="text-center"),
-            dbc.Col(html.Img(src='./assets/logo/logo1.png', height='50px'), className="text-right", width=1),
-            dbc.Col(html.Img(src='./assets/logo/logo2.png', height='50px'), className="text-right", width=1),
-            dbc.Col(html.Img(src='./assets/logo/logo3.png', height='50px'), className="text-right", width=1),
+            dbc.Col(html.Img(src=static_assets.url('logo/logo1.png'), height='50px'), className="text-right", width=1),
+            dbc.Col(html.Img(src=static_assets.url('logo/logo2.png'), height='50px'), className="text-right", width=1),
+            dbc.Col(html.Img(src=static_assets.url('logo/logo3.png'), height='50px'), className="text-right", width=1),
         ], className="header"),
         dbc.Row([create_tabs()], className="mb-4"),
         dbc.Row([dbc.Col(html.Div(id='content'), width=12)]),
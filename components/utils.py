@@ -2,14 +2,6 @@ import pandas as pd
 import dash_bootstrap_components as dbc
 from dash import html
 
-def clean_neighbour_data(df):
-    df = df.copy()
-    df['Year'] = df['Year'].astype(int)
-    df['Semester'] = df['Semester'].str.replace('Jan-Jun-', 'S1-').str.replace('Jul-Dec-', 'S2-')
-    return df[df['Year'].isin([2024, 2025])]
-
-
-
 def create_kpi_card(title, value, card_id=None):
     return dbc.Card([
         dbc.CardBody([
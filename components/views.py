@@ -1,47 +1,107 @@
+import pandas as pd
 import dash_bootstrap_components as dbc
 from dash import html, dcc
-from datetime import datetime
 
-from components.utils import create_metric_card
 
+def spotlight_texts(region_data):
+    """Texts of the spotlight cards for one weather_df row, keyed by field."""
+    clock = lambda value: value.strftime('%H:%M') if pd.notna(value) else "--:--"
+    return {
+        'region': f"{region_data['region']}",
+        'temperature': f"{region_data['temperature']:.1f}°C",
+        'humidity': f"{region_data['humidity']}%",
+        'pressure': f"{region_data['pressure']} hPa",
+        'wind_speed': f"{region_data['wind_speed']:.1f} m/s",
+        'visibility': f"{region_data['visibility']:.1f} km",
+        'sunrise': f"Sunrise: {clock(region_data['sunrise'])}",
+        'sunset': f"Sunset: {clock(region_data['sunset'])}",
+    }
+
+
+def spotlight_id(tab, field):
+    # Every text the rotation updates (assets/spotlight.js) carries one of these ids
+    return {'type': 'spotlight-value', 'tab': tab, 'field': field}
+
+
+def create_spotlight_store(tab, regions):
+    """Card texts of every region plus the interval that rotates through them in the browser."""
+    return html.Div([
+        dcc.Store(id={'type': 'spotlight-data', 'tab': tab}, data=regions),
+        dcc.Interval(id={'type': 'spotlight-interval', 'tab': tab}, interval=30 * 1000, n_intervals=0),
+    ])
+
+
+def create_spotlight_card(tab, field, texts, title, color):
+    return dbc.Col([dbc.Card([
+        html.H2(texts[field], id=spotlight_id(tab, field), className='card-title'),
+        html.P(title)
+    ], body=True, color=color, inverse=True)])
 
-def create_weather_cards_column(region_data):
+
+def create_weather_cards_column(texts, tab='weather'):
     return [
         dbc.Row([
-            dbc.Col(create_weather_card("Region Spotlight", region_data['region']),
-                    width=12)
+            dbc.Col(dbc.Card([
+                dbc.CardBody([
+                    html.H6("Region Spotlight", className="card-title"),
+                    html.H4(texts['region'], id=spotlight_id(tab, 'region'), className="card-text")
+                ])
+            ], className="shadow-sm"), width=12)
         ], className="mb-2"),
 
         dbc.Row([
-            dbc.Col(create_metric_card(
-                f"{region_data['temperature']:.1f}°C", "Temperature", "#e76f51"),
-                width=6),
-            dbc.Col(create_metric_card(
-                f"{region_data['humidity']}%", "Humidity", "#f4a261"),
-                width=6),
+            dbc.Col(create_spotlight_card(tab, 'temperature', texts, "Temperature", "#e76f51"), width=6),
+            dbc.Col(create_spotlight_card(tab, 'humidity', texts, "Humidity", "#f4a261"), width=6),
         ], className="mb-4"),
 
         dbc.Row([
-            dbc.Col(create_metric_card(
-                f"{region_data['pressure']} hPa", "Pressure", "#e9c46a"),
-                width=6),
-            dbc.Col(create_metric_card(
-                f"{region_data['wind_speed']:.1f} m/s", "Wind Speed", "#e9c46a"),
-                width=6),
+            dbc.Col(create_spotlight_card(tab, 'pressure', texts, "Pressure", "#e9c46a"), width=6),
+            dbc.Col(create_spotlight_card(tab, 'wind_speed', texts, "Wind Speed", "#e9c46a"), width=6),
         ], className="mb-4"),
 
         dbc.Row([
-            dbc.Col(create_metric_card(
-                f"{region_data['visibility']:.1f} km", "Visibility", "#ffbf69"),
-                width=6),
+            dbc.Col(create_spotlight_card(tab, 'visibility', texts, "Visibility", "#ffbf69"), width=6),
             dbc.Col(dbc.Card([
-                html.H5(f"Sunrise: {region_data['sunrise'].strftime('%H:%M')}"),
-                html.H5(f"Sunset: {region_data['sunset'].strftime('%H:%M')}")
+                html.H5(texts['sunrise'], id=spotlight_id(tab, 'sunrise')),
+                html.H5(texts['sunset'], id=spotlight_id(tab, 'sunset'))
             ], body=True, color='#ffbf69', inverse=True), width=6),
         ], className="mb-4")
     ]
 
 
+def create_spotlight_row(texts, tab='overview'):
+    cards = [
+        ('region', '🎯 Region Spotlight', '#2a9d8f'),
+        ('temperature', "Temperature", '#e76f51'),
+        ('humidity', 'Humidity', '#5bc0be'),
+        ('pressure', 'Pressure', '#56ab91'),
+        ('wind_speed', 'Wind Speed', '#83c5be'),
+        ('visibility', 'Visibility', '#e9c46a'),
+    ]
+    return dbc.Row([
+        # Weather cards
+        dbc.Col([
+            dbc.Row([
+                dbc.Col(dbc.Card([
+                    html.H2(texts[field], id=spotlight_id(tab, field), className='card-title'),
+                    html.P(title)
+                ], body=True, color=color, inverse=True), width=2)
+                for field, title, color in cards
+            ], className="mb-4")
+        ], width=12)
+    ])
+
+
+def create_loading_placeholder(status):
+    failed = status['state'] == "failed"
+    return html.Div([
+        dbc.Spinner(color="info"),
+        html.H5("Loading data..." if not failed else "Data source unavailable, retrying...",
+                className="mt-3 text-muted"),
+        html.P(status['error'], className="text-muted small") if failed else None,
+    ], className="text-center p-5")
+
+
 def create_alerts_column(alerts):
     return html.Div([
         html.H5("⚠️ Weather Alerts"),
@@ -60,42 +120,14 @@ def create_weather_chart_column(chart, chart_id):
     )
 
 
-def create_weather_card(title, value):
-    return dbc.Card([
-        dbc.CardBody([
-            html.H6(title, className="card-title"),
-            html.H4(value, className="card-text")
-        ])
-    ], className="shadow-sm")
-
-
-def generate_weather_alerts(data):
-    alerts = []
-
-    for region, d in data.items():
-        if d:
-            if d['temperature'] > 35:
-                alerts.append(f"🔥 High Temperature Alert: {region} - {d['temperature']:.1f}°C")
-            elif d['temperature'] < 10:
-                alerts.append(f"🧊 Low Temperature Alert: {region} - {d['temperature']:.1f}°C")
-
-            if d['humidity'] > 90:
-                alerts.append(f"💧 High Humidity Alert: {region} - {d['humidity']}%")
-
-            if d['wind_speed'] > 10:
-                alerts.append(f"💨 Strong Wind Alert: {region} - {d['wind_speed']:.1f} m/s")
-
-    return alerts
-
-
-
 def calculate_news_metrics(news_df):
     return {
         'total_articles': len(news_df),
         'press_releases': len([a for a in news_df['tag'] if a == 'Press Release']),
         'newsletters': len([a for a in news_df['tag'] if a == 'Newsletter']),
         'statements': len([a for a in news_df['tag'] if a == 'Joint Statement' or a == 'Statement']),
-        'days_ago': (datetime.now() - (news_df.iloc[0]['date'] if not news_df.empty else datetime.today())).days
+        # Only the date: the age is worked out in the browser (assets/news.js), not in the cached layout
+        'latest_date': news_df.iloc[0]['date'] if not news_df.empty and pd.notna(news_df.iloc[0]['date']) else None
     }
 
 
@@ -0,0 +1,169 @@
+import numpy as np
+import pandas as pd
+
+MEASURES = {'temperature': 'Temperature (°C)', 'humidity': 'Humidity (%)'}
+FREQUENCIES = {'W': 'Weekly', 'M': 'Monthly'}
+MAX_LAG = {'W': 8, 'M': 3}          # periods the weather may lead the cases by
+ROLLING_WINDOW = {'W': 12, 'M': 6}  # periods per rolling correlation
+MIN_PERIODS = 6                     # fewer aligned periods than this give no correlation
+
+
+def pearson_rows(x, y, min_periods=MIN_PERIODS):
+    """Pearson correlation between each row of `x` and the same row of `y` (both (n, T)).
+
+    Columns where either value is NaN are left out of that row. Rows with fewer than
+    `min_periods` usable columns, or with no variation, get NaN.
+    """
+    valid = np.isfinite(x) & np.isfinite(y)
+    n = valid.sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        dx = np.where(valid, x - np.where(valid, x, 0).sum(axis=1, keepdims=True) / n[:, None], 0)
+        dy = np.where(valid, y - np.where(valid, y, 0).sum(axis=1, keepdims=True) / n[:, None], 0)
+        corr = (dx * dy).sum(axis=1) / np.sqrt((dx ** 2).sum(axis=1) * (dy ** 2).sum(axis=1))
+    corr[n < min_periods] = np.nan
+    return corr
+
+
+def lagged_correlations(x, y, max_lag, min_periods=MIN_PERIODS):
+    """(n, max_lag + 1) correlations of `y` with `x` taken `lag` periods earlier."""
+    periods = x.shape[1]
+    result = np.full((len(x), max_lag + 1), np.nan)
+    for lag in range(min(max_lag, periods - 1) + 1):
+        result[:, lag] = pearson_rows(x[:, :periods - lag], y[:, lag:], min_periods)
+    return result
+
+
+def shift_rows(x, lags):
+    """`x` with row i moved `lags[i]` periods later, NaN where nothing moved in."""
+    columns = np.arange(x.shape[1])[None, :] - np.asarray(lags)[:, None]
+    shifted = np.take_along_axis(x, np.clip(columns, 0, None), axis=1)
+    shifted[columns < 0] = np.nan
+    return shifted
+
+
+def rolling_correlations(x, y, window, min_periods=MIN_PERIODS):
+    """(n, T) correlation of each row pair over the (up to) `window` periods ending at every column.
+
+    Window sums come from cumulative sums along the rows, so the cost does not depend
+    on the window length.
+    """
+    valid = np.isfinite(x) & np.isfinite(y)
+    x, y = np.where(valid, x, 0.0), np.where(valid, y, 0.0)
+    ends = np.arange(1, valid.shape[1] + 1)
+    starts = np.clip(ends - window, 0, None)
+
+    def window_sums(values):
+        cumulative = np.zeros((values.shape[0], values.shape[1] + 1))
+        np.cumsum(values, axis=1, out=cumulative[:, 1:])
+        return cumulative[:, ends] - cumulative[:, starts]
+
+    n = window_sums(valid.astype(float))
+    sx, sy = window_sums(x), window_sums(y)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cov = window_sums(x * y) - sx * sy / n
+        var_x = window_sums(x * x) - sx ** 2 / n
+        var_y = window_sums(y * y) - sy ** 2 / n
+        corr = cov / np.sqrt(var_x * var_y)
+    corr[(n < min_periods) | ~np.isfinite(corr)] = np.nan
+    return np.clip(corr, -1, 1)
+
+
+class OutbreakWeatherCorrelation:
+    """Case counts per province x disease next to the weather at the province's nearest station.
+
+    Cases come from the TimeIndex, weather from the daily means of the WeatherHistory,
+    both summed or averaged per period (`freq`: "W" weeks, "M" months) over the span
+    both cover. For every pair, `lagged[measure]` holds the correlation with the
+    weather 0..MAX_LAG periods earlier, `best_lag[measure]` the lag with the largest
+    absolute correlation, and `rolling[measure]` the rolling correlation at that lag.
+    """
+
+    def __init__(self, freq, periods, groups, cases, weather, lagged=None, best_lag=None, rolling=None):
+        self.freq = freq
+        self.periods = periods      # period start dates
+        self.groups = groups        # province, disease_code, station per row
+        self.cases = cases          # (groups, periods) case totals
+        self.weather = weather      # measure -> (groups, periods) station means, NaN without data
+        if lagged is None:
+            lagged, best_lag, rolling = {}, {}, {}
+            for measure, values in weather.items():
+                lagged[measure] = lagged_correlations(values, cases, MAX_LAG[freq])
+                scored = np.where(np.isfinite(lagged[measure]), np.abs(lagged[measure]), -1)
+                best_lag[measure] = scored.argmax(axis=1)
+                rolling[measure] = rolling_correlations(
+                    shift_rows(values, best_lag[measure]), cases, ROLLING_WINDOW[freq])
+        self.lagged, self.best_lag, self.rolling = lagged, best_lag, rolling
+
+    @classmethod
+    def build(cls, time_index, weather_history, stations, freq='W'):
+        daily = weather_history.rollups['daily']
+        start = max(time_index.first_day, daily['timestamp'].min()) if len(daily) else None
+        end = min(time_index.last_day, daily['timestamp'].max()) if len(daily) else None
+        if start is None or start > end:
+            return cls.empty(freq)
+
+        periods = pd.period_range(start, end, freq=freq)
+        edges = periods.start_time.append(pd.DatetimeIndex([periods[-1].end_time.normalize() + pd.Timedelta(days=1)]))
+
+        # Pairs with a province and at least one case in the span, each tied to its province's station
+        station_of = stations.assign(time_index.province_centers)['station']
+        groups = time_index.groups.assign(station=time_index.groups['province'].map(station_of).astype(object))
+        cases = time_index.periodic(edges)
+        keep = (groups['station'].notna() & groups['disease_code'].notna()).to_numpy() & (cases.sum(axis=1) > 0)
+        groups, cases = groups[keep].reset_index(drop=True), cases[keep]
+
+        # Mean of the daily means per station and period, one row per pair
+        period = np.searchsorted(edges, daily['timestamp'].to_numpy(), side='right') - 1
+        in_span = (period >= 0) & (period < len(periods))
+        weather = {}
+        for measure in MEASURES:
+            table = (
+                daily.loc[in_span, ['region', f"{measure}_mean"]]
+                .assign(period=period[in_span])
+                .groupby(['region', 'period'])[f"{measure}_mean"].mean()
+                .unstack()
+                .reindex(columns=range(len(periods)))
+            )
+            weather[measure] = table.reindex(groups['station']).to_numpy(dtype=float)
+
+        return cls(freq, periods.start_time, groups, cases.astype(float), weather)
+
+    @classmethod
+    def empty(cls, freq='W'):
+        groups = pd.DataFrame({'province': [], 'disease_code': [], 'station': []}, dtype=object)
+        return cls(freq, pd.DatetimeIndex([]), groups, np.zeros((0, 0)),
+                   {measure: np.zeros((0, 0)) for measure in MEASURES})
+
+    def to_shared(self):
+        """Frames and arrays a worker can map to get these correlations back (see from_shared)."""
+        parts = {'periods': self.periods.to_numpy(), 'groups': self.groups, 'cases': self.cases}
+        for measure in self.weather:
+            parts.update({
+                f"weather.{measure}": self.weather[measure],
+                f"lagged.{measure}": self.lagged[measure],
+                f"best_lag.{measure}": self.best_lag[measure],
+                f"rolling.{measure}": self.rolling[measure],
+            })
+        return parts
+
+    @classmethod
+    def from_shared(cls, freq, parts):
+        results = [{measure: parts[f"{kind}.{measure}"] for measure in MEASURES}
+                   for kind in ['weather', 'lagged', 'best_lag', 'rolling']]
+        return cls(freq, pd.DatetimeIndex(parts['periods']), parts['groups'], parts['cases'], *results)
+
+    def __len__(self):
+        return len(self.periods)
+
+    def rows(self, disease):
+        """Positions of the pairs of `disease`, in province order."""
+        matches = self.groups.index[self.groups['disease_code'] == disease]
+        return matches[np.argsort(self.groups.loc[matches, 'province'].astype(str).to_numpy(), kind='stable')]
+
+    def strongest(self, disease, measure):
+        """Province whose lagged correlation for `disease` is strongest, or None."""
+        rows = self.rows(disease)
+        if not len(rows):
+            return None
+        scores = np.nan_to_num(np.abs(self.lagged[measure][rows]), nan=-1).max(axis=1)
+        return self.groups.loc[rows[scores.argmax()], 'province']
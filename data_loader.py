@@ -1,54 +1,488 @@
 import os
 import json
+import time
+import hashlib
+import shutil
+import logging
+import tempfile
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
 import gspread
 from dotenv import load_dotenv
-from gspread_dataframe import get_as_dataframe
+from gspread.utils import rowcol_to_a1
+from pandas.io.parsers import TextParser
 from oauth2client.service_account import ServiceAccountCredentials
 
 # Load environment variables from .env
 load_dotenv()
 
-def load_data_from_gsheets():
+logger = logging.getLogger(__name__)
+
+WORKSHEETS = ["laos_data", "laos_regions", "weather_data", "news_data", "neighbours_data"]
+# Worksheets overwritten in place, whose column A stays the same: the column that changes with every rewrite
+WATCHED_COLUMNS = {'weather_data': 'timestamp'}
+
+# "auto" starts from a fresh snapshot and falls back to it when Sheets is down,
+# "gsheets" always fetches, "snapshot" never touches the network (tests, offline),
+# "shared" attaches to the dataset a coordinator process publishes (gunicorn workers).
+DATA_SOURCE = os.getenv("DATA_SOURCE", "auto")
+SNAPSHOT_DIR = os.getenv("DATA_SNAPSHOT_DIR", "data/snapshot")
+SNAPSHOT_MAX_AGE = int(os.getenv("DATA_SNAPSHOT_MAX_AGE", 3600))  # seconds
+SHARED_DIR = os.getenv("DATASET_SHARED_DIR") or os.path.join(
+    "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir(), "laos_disease_stats")
+
+
+# ---------------------- Sources ---------------------------------------------
+
+class GoogleSheetsSource:
+    """Raw worksheets of the `disease_stats` spreadsheet."""
+
+    def __init__(self, spreadsheet_name="disease_stats"):
+        self.spreadsheet_name = spreadsheet_name
+        self._spreadsheet = None
+        self.fingerprints = {}
+
+    def spreadsheet(self):
+        if self._spreadsheet is None:
+            # Read the JSON string from .env and parse it
+            credentials_json = os.getenv("GOOGLE_CREDENTIALS_JSON")
+            if not credentials_json:
+                raise ValueError("Missing GOOGLE_CREDENTIALS_JSON in environment.")
+
+            # Convert JSON string to dictionary
+            credentials_dict = json.loads(credentials_json)
+
+            # --- Auth & Setup ---
+            scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
+            credentials = ServiceAccountCredentials.from_json_keyfile_dict(credentials_dict, scope)
+            client = gspread.authorize(credentials)
+            self._spreadsheet = client.open(self.spreadsheet_name)
+        return self._spreadsheet
+
+    def fetch(self, names=WORKSHEETS):
+        spreadsheet = self.spreadsheet()
+        frames = {}
+        for name in names:
+            values = spreadsheet.worksheet(name).get_all_values()
+            frames[name] = _frame_from_values(values[0], values[1:])
+            self.fingerprints[name] = _fingerprint(values[0], _column(values))
+            watched = _watched_index(name, values[0])
+            if watched is not None:
+                self.fingerprints[name].update(
+                    watched_column=rowcol_to_a1(1, watched + 1).rstrip("1"),
+                    watched_hash=_hash_cells(_column(values, watched)),
+                )
+        return frames
+
+    def changes(self):
+        """Compare column A of every worksheet (one API call) against the last fetch.
+
+        Returns {name: ('append' | 'full', column)} for the worksheets that changed.
+        Rows appended below unchanged data are 'append'; anything else is 'full'.
+        Worksheets rewritten in place also have their WATCHED_COLUMNS compared, in the
+        same call; other edits outside column A are only picked up by a full fetch.
+        """
+        watched = [(name, known['watched_column']) for name, known in self.fingerprints.items()
+                   if 'watched_column' in known]
+        response = self.spreadsheet().values_batch_get(
+            [f"'{name}'!A:A" for name in WORKSHEETS] + [f"'{name}'!{col}:{col}" for name, col in watched])
+        value_ranges = response['valueRanges']
+        rewritten = {
+            name for (name, _), value_range in zip(watched, value_ranges[len(WORKSHEETS):])
+            if _hash_cells(_column(value_range.get('values', []))) != self.fingerprints[name]['watched_hash']
+        }
+        # Fingerprints from before the column was watched (an older snapshot) need one full read
+        rewritten.update(
+            name for name, known in self.fingerprints.items()
+            if 'watched_column' not in known and _watched_index(name, known['header']) is not None
+        )
+        changes = {}
+        for name, value_range in zip(WORKSHEETS, value_ranges):
+            column = _column(value_range.get('values', []))
+            known = self.fingerprints.get(name)
+            if known is None or name in rewritten:
+                changes[name] = ('full', column)
+            elif len(column) - 1 == known['rows'] and _hash_cells(column) == known['column_hash']:
+                continue
+            elif len(column) - 1 > known['rows'] and _hash_cells(column[:known['rows'] + 1]) == known['column_hash']:
+                changes[name] = ('append', column)
+            else:
+                changes[name] = ('full', column)
+        return changes
+
+    def fetch_appended(self, name, column):
+        known = self.fingerprints[name]
+        header = known['header']
+        first_row, last_row = known['rows'] + 2, len(column)
+        values = self.spreadsheet().worksheet(name).get_values(f"{first_row}:{last_row}")
+        self.fingerprints[name] = dict(known, **_fingerprint(header, column))
+        return _frame_from_values(header, values)
+
+
+def _frame_from_values(header, rows):
+    # Same parsing get_as_dataframe applies to the raw cell values
+    rows = [row + [''] * (len(header) - len(row)) for row in rows]
+    return TextParser([header] + rows, header=0).read().dropna(how='all')
+
+
+def _column(values, index=0):
+    cells = [row[index] if len(row) > index else '' for row in values]
+    while cells and not cells[-1]:
+        cells.pop()
+    return cells
+
+
+def _watched_index(name, header):
+    header = [cell.strip() for cell in header]
+    return header.index(WATCHED_COLUMNS[name]) if WATCHED_COLUMNS.get(name) in header else None
+
+
+def _hash_cells(cells):
+    return hashlib.sha1("\x1f".join(cells).encode()).hexdigest()
+
+
+def _fingerprint(header, column):
+    return {'header': header, 'rows': len(column) - 1, 'column_hash': _hash_cells(column)}
+
+
+def frame_hash(df):
+    """Hash of every cell of a prepared worksheet, to tell a re-read that changed from one that did not."""
+    return hashlib.sha1(pd.util.hash_pandas_object(df, index=False).values.tobytes()).hexdigest()
+
+
+class SnapshotSource:
+    """Parquet snapshot of the prepared worksheets, one file per worksheet."""
+
+    def __init__(self, path=SNAPSHOT_DIR):
+        self.path = path
+
+    def _file(self, name):
+        return os.path.join(self.path, f"{name}.parquet")
+
+    def _meta_file(self):
+        return os.path.join(self.path, "meta.json")
+
+    def meta(self):
+        try:
+            with open(self._meta_file(), "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def exists(self):
+        return self.meta() is not None
+
+    def age(self):
+        meta = self.meta()
+        return None if meta is None else time.time() - meta['written_at']
+
+    def is_fresh(self, max_age=SNAPSHOT_MAX_AGE):
+        age = self.age()
+        return age is not None and age <= max_age
+
+    def fetch(self):
+        return {name: pd.read_parquet(self._file(name)) for name in WORKSHEETS}
+
+    def write(self, frames, fingerprints=None):
+        os.makedirs(self.path, exist_ok=True)
+        for name in WORKSHEETS:
+            tmp = self._file(name) + ".tmp"
+            _parquet_safe(frames[name]).to_parquet(tmp, index=False)
+            os.replace(tmp, self._file(name))
+
+        # meta.json goes last so a half-written snapshot is never picked up as fresh
+        tmp = self._meta_file() + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({
+                'written_at': time.time(),
+                'rows': {name: len(frames[name]) for name in WORKSHEETS},
+                'fingerprints': fingerprints or {},
+            }, f)
+        os.replace(tmp, self._meta_file())
+
+
+class SharedDatasetSource:
+    """Versioned Arrow IPC files that worker processes memory-map instead of loading.
+
+    A coordinator publishes every dataset version to `<path>/<version>/<worksheet>.arrow`
+    and then points `<path>/CURRENT` at it. Readers map the files, so numeric and date
+    columns share the page cache across processes instead of being copied per worker.
+    """
+
+    KEEP_VERSIONS = 3
+
+    def __init__(self, path=SHARED_DIR):
+        self.path = path
 
-    # Read the JSON string from .env and parse it
-    credentials_json = os.getenv("GOOGLE_CREDENTIALS_JSON")
-    if not credentials_json:
-        raise ValueError("Missing GOOGLE_CREDENTIALS_JSON in environment.")
+    def _current_file(self):
+        return os.path.join(self.path, "CURRENT")
 
-    # Convert JSON string to dictionary
-    credentials_dict = json.loads(credentials_json)
+    def current(self):
+        try:
+            with open(self._current_file(), "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
 
-    # --- Auth & Setup ---
-    scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
-    credentials = ServiceAccountCredentials.from_json_keyfile_dict(credentials_dict, scope)
-    client = gspread.authorize(credentials)
-    spreadsheet = client.open("disease_stats")
+    def wait(self, timeout=120, poll=0.5):
+        deadline = time.time() + timeout
+        while (current := self.current()) is None:
+            if time.time() > deadline:
+                raise TimeoutError(f"No dataset published in {self.path} after {timeout}s")
+            time.sleep(poll)
+        return current
 
-    # --- Read Sheets ---
-    laos_data = get_as_dataframe(spreadsheet.worksheet("laos_data")).dropna(how='all')
-    laos_regions = get_as_dataframe(spreadsheet.worksheet("laos_regions")).dropna(how='all')
-    weather_df = get_as_dataframe(spreadsheet.worksheet("weather_data")).dropna(how='all')
-    news_df = get_as_dataframe(spreadsheet.worksheet("news_data")).dropna(how='all')
-    neighbours_data = get_as_dataframe(spreadsheet.worksheet("neighbours_data")).dropna(how='all')
+    def fetch(self, version):
+        return {name: _map_arrow(os.path.join(self.path, version, f"{name}.arrow")) for name in WORKSHEETS}
 
+    def fetch_parts(self, version):
+        """Derived frames and arrays published with `version`, by name; empty if there are none.
+
+        Frames are mapped like the worksheets, arrays are read-only memory maps.
+        """
+        folder = os.path.join(self.path, version, "parts")
+        parts = {}
+        for entry in (os.scandir(folder) if os.path.isdir(folder) else []):
+            name, ext = os.path.splitext(entry.name)
+            if ext == ".npy":
+                parts[name] = np.load(entry.path, mmap_mode="r")
+            elif ext == ".arrow":
+                parts[name] = _map_arrow(entry.path)
+        return parts
+
+    def publish(self, frames, version, fingerprints=None, parts=None):
+        """Write `frames` (and the derived `parts`, frames or numeric arrays) and make them current."""
+        target = os.path.join(self.path, version)
+        if not os.path.isdir(target):
+            tmp = tempfile.mkdtemp(prefix=f".{version}-", dir=self._ensure_dir())
+            for name in WORKSHEETS:
+                _write_arrow(frames[name], os.path.join(tmp, f"{name}.arrow"))
+            os.mkdir(os.path.join(tmp, "parts"))
+            for name, part in (parts or {}).items():
+                file = os.path.join(tmp, "parts", name)
+                if isinstance(part, pd.DataFrame):
+                    _write_arrow(part, file + ".arrow")
+                else:
+                    np.save(file + ".npy", np.asarray(part), allow_pickle=False)
+            os.replace(tmp, target)
+
+        tmp = self._current_file() + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({'version': version, 'published_at': time.time(), 'fingerprints': fingerprints or {}}, f)
+        os.replace(tmp, self._current_file())
+        self._prune(keep=version)
+
+    def _ensure_dir(self):
+        os.makedirs(self.path, exist_ok=True)
+        return self.path
+
+    def _prune(self, keep):
+        # Workers that still map an older version keep reading it: unlinked files stay mapped
+        versions = sorted(
+            (entry for entry in os.scandir(self.path) if entry.is_dir() and not entry.name.startswith(".")),
+            key=lambda entry: entry.stat().st_mtime, reverse=True)
+        for entry in versions[self.KEEP_VERSIONS:]:
+            if entry.name != keep:
+                shutil.rmtree(entry.path, ignore_errors=True)
+
+
+def _map_arrow(path):
+    with pa.memory_map(path, "r") as source:
+        table = pa.ipc.open_file(source).read_all()
+    return table.to_pandas(split_blocks=True)
+
+
+def _write_arrow(df, path):
+    # One record batch: columns split across batches are copied, not mapped, by to_pandas
+    feather.write_feather(_parquet_safe(df), path, compression="uncompressed", chunksize=max(len(df), 1))
+
+
+def _parquet_safe(df):
+    # Sheets hands back object columns mixing numbers and strings; Arrow needs one type
+    df = df.reset_index(drop=True).copy()
+    for col in df.columns[df.dtypes == object]:
+        values = df[col]
+        df[col] = values.where(values.isna(), values.astype(str))
+    return df
+
+
+# ---------------------- Preparation ---------------------------------------------
+
+# Column types per worksheet, applied at load; columns not listed here are dropped.
+#   "category"  repeated labels, stored as integer codes into the distinct values
+#   "count"     whole numbers in the smallest integer type that fits (float32 if cells are blank)
+#   "float32" / "float64"
+#   "text"      free text, kept as Python strings
+#   ("date", format, ...)  parsed with the first listed format a cell matches
+ISO_DATE = ("date", "%Y-%m-%d", "%Y-%m-%d %H:%M:%S")
+SHEET_TIME = ("date", "%d/%m/%Y %H:%M", "%d/%m/%Y %H:%M:%S")
+
+SCHEMAS = {
+    'laos_data': {
+        'reported_date': ISO_DATE,
+        'location': "category",
+        'disease_code': "category",
+        'case': "count",
+    },
+    'laos_regions': {
+        'province': "category",
+        'capital': "category",
+        'latitude': "float64",
+        'longitude': "float64",
+    },
+    'weather_data': {
+        'region': "category",
+        'temperature': "float64",
+        'feels_like': "float64",
+        'humidity': "count",
+        'pressure': "count",
+        'wind_speed': "float64",
+        'visibility': "float64",
+        'description': "category",
+        'timestamp': SHEET_TIME,
+        'sunrise': SHEET_TIME,
+        'sunset': SHEET_TIME,
+    },
+    'news_data': {
+        'title': "text",
+        'main_text': "text",
+        'date': ISO_DATE,
+        'date_text': "text",
+        'image_url': "text",
+        'url': "text",
+        'tag': "category",
+    },
+    'neighbours_data': {
+        'Country': "category",
+        'Year': "count",
+        'Semester': "category",
+        'Category': "category",
+        'Disease': "category",
+        'Disease status': "category",
+    },
+}
+
+
+def apply_schema(name, df):
+    """Cast the columns of worksheet `name` to its schema and drop the others.
+
+    Columns already holding the target type are left alone, so frames read back from
+    a snapshot or concatenated after an append can be passed through again cheaply.
+    """
+    schema = SCHEMAS[name]
+    dropped = [col for col in df.columns if col not in schema]
+    if dropped:
+        logger.debug("%s: dropping unused columns %s", name, dropped)
+
+    columns = {}
+    for col, kind in schema.items():
+        if col not in df.columns:
+            logger.warning("%s: column %r missing from the sheet", name, col)
+            continue
+        columns[col] = _cast(name, col, df[col], kind)
+    return pd.DataFrame(columns, index=df.index)
+
+
+def _cast(name, col, values, kind):
+    if isinstance(kind, tuple):
+        return _parse_dates(name, col, values, kind[1:])
+    if kind == "category":
+        return values if isinstance(values.dtype, pd.CategoricalDtype) else values.astype("category")
+    if kind == "count":
+        numbers = pd.to_numeric(values, errors='coerce')
+        whole = numbers.notna().all() and (numbers % 1 == 0).all()
+        return pd.to_numeric(numbers, downcast='integer') if whole else numbers.astype("float32")
+    if kind in ("float32", "float64"):
+        return pd.to_numeric(values, errors='coerce').astype(kind)
+    return values
+
+
+def _parse_dates(name, col, values, formats):
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values
+    text = values.where(values.notna(), "").astype(str).str.strip()
+    parsed = pd.Series(pd.NaT, index=values.index, dtype="datetime64[ns]")
+    for fmt in formats:
+        pending = parsed.isna() & (text != "")
+        if not pending.any():
+            break
+        parsed[pending] = pd.to_datetime(text[pending], format=fmt, errors='coerce')
+
+    unparsed = parsed.isna() & (text != "")
+    if unparsed.any():
+        logger.warning("%s.%s: %d cells match none of %s, e.g. %r",
+                       name, col, unparsed.sum(), formats, text[unparsed].iloc[0])
+    return parsed
+
+
+def _memory_mb(df):
+    return df.memory_usage(deep=True).sum() / 2 ** 20
+
+
+def prepare_frame(name, df):
     # --- Clean Headers ---
-    for df in [laos_data, laos_regions, weather_df, news_df, neighbours_data]:
-        df.columns = df.columns.str.strip()
+    df = df.rename(columns=lambda col: str(col).strip())
+    before = _memory_mb(df)
 
-    # --- Convert Date Columns ---
-    laos_data['reported_date'] = pd.to_datetime(laos_data['reported_date'], errors='coerce')
-    news_df['date'] = pd.to_datetime(news_df['date'], errors='coerce')
-    weather_df['timestamp'] = pd.to_datetime(weather_df['timestamp'], errors='coerce', dayfirst=True)
-    weather_df['sunset'] = pd.to_datetime(weather_df['sunset'], errors='coerce', dayfirst=True)
-    weather_df['sunrise'] = pd.to_datetime(weather_df['sunrise'], errors='coerce', dayfirst=True)
+    df = apply_schema(name, df)
+    logger.info("%s: %d rows, %.1f MB -> %.1f MB", name, len(df), before, _memory_mb(df))
+    return df
 
+
+def prepare_frames(frames):
+    return {name: prepare_frame(name, df) for name, df in frames.items()}
+
+
+def merge_frames(frames, merged=None):
+    """Reports joined with their region, plus the other worksheets; `merged` is a join already made."""
     # --- Merge Region Info ---
-    laos_df = pd.merge(
-        laos_data,
-        laos_regions.rename(columns={'capital': 'location'}),
-        on='location',
-        how='left'
-    )
-
-    return laos_df, laos_regions, weather_df, news_df, neighbours_data
+    laos_regions = frames['laos_regions']
+    laos_df = merged
+    if laos_df is None:
+        laos_df = pd.merge(
+            frames['laos_data'],
+            laos_regions.rename(columns={'capital': 'location'}),
+            on='location',
+            how='left'
+        )
+        # merge falls back to object keys when the two category sets differ
+        laos_df['location'] = laos_df['location'].astype('category')
+
+    return laos_df, laos_regions, frames['weather_data'], frames['news_data'], frames['neighbours_data']
+
+
+# ---------------------- Loading ---------------------------------------------
+
+def load_frames(source=DATA_SOURCE, snapshot=None, remote=None, max_age=SNAPSHOT_MAX_AGE):
+    snapshot = snapshot or SnapshotSource()
+    remote = remote or GoogleSheetsSource()
+
+    if source == "snapshot":
+        return prepare_frames(snapshot.fetch())
+
+    if source == "auto" and snapshot.is_fresh(max_age):
+        logger.info("Loading data from snapshot %s (%.0fs old)", snapshot.path, snapshot.age())
+        remote.fingerprints.update(snapshot.meta().get('fingerprints', {}))
+        return prepare_frames(snapshot.fetch())
+
+    try:
+        frames = prepare_frames(remote.fetch())
+    except Exception:
+        if source == "auto" and snapshot.exists():
+            logger.warning("Google Sheets unreachable, using stale snapshot %s", snapshot.path, exc_info=True)
+            remote.fingerprints.update(snapshot.meta().get('fingerprints', {}))
+            return prepare_frames(snapshot.fetch())
+        raise
+
+    try:
+        snapshot.write(frames, remote.fingerprints)
+    except OSError:
+        logger.warning("Could not write snapshot to %s", snapshot.path, exc_info=True)
+
+    return frames
+
+
+def load_data_from_gsheets():
+    return merge_frames(load_frames())
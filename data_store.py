@@ -0,0 +1,332 @@
+import json
+import time
+import hashlib
+import logging
+import threading
+import numpy as np
+import pandas as pd
+
+from aggregates import CaseCube, TimeIndex, NeighbourRollup
+from news_index import NewsIndex, article_key
+from weather_history import WeatherHistory, WEATHER_HISTORY_DIR
+from weather_alerts import WeatherAlerts
+from stations import StationIndex
+from correlations import OutbreakWeatherCorrelation, FREQUENCIES
+from data_loader import (
+    DATA_SOURCE, GoogleSheetsSource, SnapshotSource, SharedDatasetSource,
+    load_frames, prepare_frame, apply_schema, merge_frames, frame_hash
+)
+
+logger = logging.getLogger(__name__)
+
+REFRESH_INTERVAL = 3600  # seconds, matches the hourly interval-refresh component
+FULL_REFRESH_EVERY = 24  # every Nth refresh re-reads every worksheet to catch in-place edits
+MIN_REFRESH_GAP = 300  # seconds, ignore refresh requests (one per open browser tab) closer than this
+SHARED_POLL_INTERVAL = 30  # seconds, how often workers look for a newly published dataset
+LOAD_RETRY_DELAYS = (5, 15, 60, 300)  # seconds between failed first loads, the last one repeats
+
+
+class Dataset:
+    """Immutable set of prepared worksheets plus the merged frames and aggregates the views use.
+
+    A Dataset is never modified after construction; a refresh builds a new one and
+    swaps it in, so a callback that grabbed `store.current` keeps a consistent view.
+    """
+
+    def __init__(self, frames, fingerprints=None, previous=None, version=None, weather_history=None, shared=None):
+        self.frames = frames
+        self.fingerprints = fingerprints or {}
+        self.version = version or _dataset_version(frames, self.fingerprints)
+        self.loaded_at = time.time()
+        # Parts a coordinator already derived (see to_shared) are mapped instead of rebuilt
+        shared = shared or {}
+
+        (self.laos_data, self.laos_regions, self.weather_df,
+         self.news_df, self.neighbours_data) = merge_frames(frames, merged=shared.get('laos_data'))
+        if shared:
+            self.cube = CaseCube.from_shared(_parts(shared, 'cube'))
+            self.time_index = TimeIndex.from_shared(_parts(shared, 'time_index'))
+        else:
+            self.cube = CaseCube.from_reports(self.laos_data)
+            self.time_index = TimeIndex.from_reports(self.laos_data)
+        self.neighbour_rollup = NeighbourRollup.from_records(self.neighbours_data)
+
+        # Nearest weather station of every outbreak location, indexed by location
+        self.stations = StationIndex.from_frames(self.weather_df, self.laos_regions)
+        location_coords = self.cube.location_coords
+        self.location_stations = self.stations.assign(
+            location_coords.set_axis(self.cube.labels['location'].take(location_coords.index).rename('location'))
+        )
+
+        # Weather observations accumulate across Datasets; the sheet only holds the latest ones
+        if weather_history is None:
+            weather_history = previous.weather_history if previous else WeatherHistory()
+        # A refresh keeps the previous weather frame when the sheet's content hash is unchanged
+        unchanged = previous is not None and self.weather_df is previous.weather_df
+        self.weather_history = weather_history if unchanged else weather_history.appended(self.weather_df)
+        # Alert rules only look at the observations the previous Dataset had not seen
+        self.weather_alerts = (previous.weather_alerts if previous else WeatherAlerts()).updated(self.weather_history)
+        # Case-weather correlations per province x disease, for each period length
+        self.correlations = {
+            freq: OutbreakWeatherCorrelation.from_shared(freq, _parts(shared, f"correlations.{freq}")) if shared
+            else OutbreakWeatherCorrelation.build(self.time_index, self.weather_history, self.stations, freq)
+            for freq in FREQUENCIES
+        }
+
+        # The news index shares the postings of unchanged articles with the previous Dataset's
+        self.news_index = NewsIndex.for_articles(self.news_df, previous.news_index if previous else None)
+        news_keys = [article_key(a) for a in self.news_df[['title', 'url']].to_dict('records')]
+        # Row of every indexed article in news_df; the first row of a repeated key, like the index
+        self._news_positions = np.full(len(self.news_index.keys), -1, dtype=np.int64)
+        for position, key in reversed(list(enumerate(news_keys))):
+            self._news_positions[self.news_index.doc_id(key)] = position
+
+    def to_shared(self):
+        """The merged reports and the aggregates built from them, as flat named frames and arrays.
+
+        A coordinator publishes these next to the worksheets, so workers map them
+        instead of each merging and aggregating its own copy.
+        """
+        parts = {'laos_data': self.laos_data}
+        for prefix, aggregate in [('cube', self.cube), ('time_index', self.time_index)] + [
+                (f"correlations.{freq}", correlation) for freq, correlation in self.correlations.items()]:
+            parts.update({f"{prefix}.{name}": part for name, part in aggregate.to_shared().items()})
+        return parts
+
+    def search_news(self, query):
+        """Positions in news_df of the articles matching `query`, best match first."""
+        return self._news_positions[self.news_index.ranked(query)]
+
+
+def _parts(shared, prefix):
+    return {name[len(prefix) + 1:]: part for name, part in shared.items() if name.startswith(prefix + ".")}
+
+
+def _dataset_version(frames, fingerprints):
+    digest = hashlib.sha1()
+    if fingerprints:
+        digest.update(json.dumps(fingerprints, sort_keys=True, default=str).encode())
+    else:
+        for name in sorted(frames):
+            digest.update(frame_hash(frames[name]).encode())
+    return digest.hexdigest()[:12]
+
+
+class DataStore:
+    """Holds the current Dataset; loads and refreshes it in a background thread.
+
+    `state` is "loading" until the first Dataset is in, "failed" while the first load
+    keeps failing (it is retried), and "ready" from then on, even if a later refresh fails.
+    """
+
+    def __init__(self, source=DATA_SOURCE, snapshot=None, remote=None, shared=None,
+                 weather_history_dir=WEATHER_HISTORY_DIR):
+        self.source = source
+        self.snapshot = snapshot or SnapshotSource()
+        self.remote = remote or GoogleSheetsSource()
+        self.shared = shared or SharedDatasetSource()
+        self.weather_history_dir = weather_history_dir
+        self._current = None
+        self._refresh_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._refreshes = 0
+        self._listeners = []
+        self.last_checked = None
+        self.state = "loading"
+        self.error = None
+        # Only a process that fetches the sheets writes the history; shared workers read it
+        if source not in ("snapshot", "shared"):
+            self.add_listener(self._save_weather_history)
+
+    @property
+    def current(self):
+        return self._current
+
+    def add_listener(self, listener):
+        """Call `listener(dataset)` for every new Dataset, before it becomes current."""
+        self._listeners.append(listener)
+
+    def _publish(self, dataset):
+        for listener in self._listeners:
+            try:
+                listener(dataset)
+            except Exception:
+                logger.exception("Dataset listener %r failed", listener)
+
+        # Single reference assignment: readers see either the old or the new Dataset
+        self._current = dataset
+        self.state = "ready"
+        self.error = None
+
+    def status(self):
+        current = self._current
+        return {
+            'state': self.state,
+            'version': current.version if current else None,
+            'loaded_at': current.loaded_at if current else None,
+            'error': self.error,
+        }
+
+    def load(self):
+        if self.source == "shared":
+            return self._attach(self.shared.wait())
+
+        frames = load_frames(self.source, snapshot=self.snapshot, remote=self.remote)
+        hashes = {name: frame_hash(df) for name, df in frames.items() if name in self.remote.fingerprints}
+        self._publish(Dataset(frames, self._fingerprints(hashes, frames), weather_history=self._weather_history()))
+        self.last_checked = time.time()
+        return self._current
+
+    def refresh(self, full=False):
+        """Fetch what changed since the last load and swap in a new Dataset.
+
+        An unchanged spreadsheet costs a single API call and returns the current Dataset.
+        """
+        if self.source == "snapshot":
+            return self._current
+        if self.source == "shared":
+            return self._attach(self.shared.current())
+
+        with self._refresh_lock:
+            current = self._current
+            if current is None or not self.remote.fingerprints:
+                return self.load()
+
+            self._refreshes += 1
+            full = full or self._refreshes % FULL_REFRESH_EVERY == 0
+            changes = self.remote.changes()
+            self.last_checked = time.time()
+            if full:
+                changes = {name: ('full', None) for name in current.frames}
+            if not changes:
+                return current
+
+            frames, hashes = dict(current.frames), {}
+            for name, (kind, column) in changes.items():
+                if kind == 'append':
+                    appended = prepare_frame(name, self.remote.fetch_appended(name, column))
+                    # Re-applied so categoricals with different category sets stay categorical
+                    frames[name] = apply_schema(name, pd.concat([frames[name], appended], ignore_index=True))
+                    hashes[name] = frame_hash(frames[name])
+                    logger.info("%s: %d rows appended", name, len(appended))
+
+            # Column A says nothing about edits elsewhere in a row: a re-read worksheet counts
+            # as changed when its content hash does
+            full_names = [name for name, (kind, _) in changes.items() if kind == 'full']
+            for name, df in self.remote.fetch(full_names).items():
+                frame = prepare_frame(name, df)
+                hashes[name] = frame_hash(frame)
+                if hashes[name] != current.fingerprints.get(name, {}).get('content_hash'):
+                    frames[name] = frame
+                    logger.info("%s: re-read %d rows", name, len(df))
+
+            fingerprints = self._fingerprints(hashes, frames)
+            version = _dataset_version(frames, fingerprints)
+            if version == current.version:
+                return current
+            dataset = Dataset(frames, fingerprints, previous=current, version=version)
+
+            try:
+                self.snapshot.write(frames, self.remote.fingerprints)
+            except OSError:
+                logger.warning("Could not write snapshot to %s", self.snapshot.path, exc_info=True)
+
+            self._publish(dataset)
+            logger.info("Dataset %s -> %s", current.version, dataset.version)
+            return dataset
+
+    def _fingerprints(self, hashes, frames):
+        """Fingerprints of the sheets as last read, with `hashes` as the content hash of those worksheets."""
+        for name, content_hash in hashes.items():
+            self.remote.fingerprints[name] = dict(self.remote.fingerprints[name], content_hash=content_hash)
+        return _with_latest_report(self.remote.fingerprints, frames)
+
+    def _attach(self, published):
+        """Switch to the dataset the coordinator published, mapping its files."""
+        with self._refresh_lock:
+            self.last_checked = time.time()
+            current = self._current
+            if published is None or (current is not None and current.version == published['version']):
+                return current
+
+            frames = self.shared.fetch(published['version'])
+            dataset = Dataset(frames, published['fingerprints'], previous=current, version=published['version'],
+                              weather_history=self._weather_history(),
+                              shared=self.shared.fetch_parts(published['version']))
+            self._publish(dataset)
+            logger.info("Attached shared dataset %s", dataset.version)
+            return dataset
+
+    def _weather_history(self):
+        """History the next Dataset extends: the current one's, or the saved one on a first load."""
+        if self._current is not None:
+            return self._current.weather_history
+        return WeatherHistory.load(self.weather_history_dir)
+
+    def _save_weather_history(self, dataset):
+        current = self._current
+        if current is not None and dataset.weather_history is current.weather_history:
+            return
+        try:
+            dataset.weather_history.save(self.weather_history_dir)
+        except OSError:
+            logger.warning("Could not write weather history to %s", self.weather_history_dir, exc_info=True)
+
+    def request_refresh(self):
+        if self.last_checked is None or time.time() - self.last_checked >= MIN_REFRESH_GAP:
+            self._wake.set()
+
+    def start(self, interval=None):
+        if self._thread is not None:
+            return
+        if interval is None:
+            interval = SHARED_POLL_INTERVAL if self.source == "shared" else REFRESH_INTERVAL
+        self._thread = threading.Thread(target=self.run_forever, args=(interval,), name="data-refresh", daemon=True)
+        self._thread.start()
+
+    def run_forever(self, interval=REFRESH_INTERVAL):
+        if self._current is None:
+            self._load_until_ready()
+        while True:
+            self._wake.wait(interval)
+            self._wake.clear()
+            try:
+                self.refresh()
+            except Exception:
+                logger.exception("Background data refresh failed")
+
+    def _load_until_ready(self):
+        attempt = 0
+        while True:
+            try:
+                return self.load()
+            except Exception as exc:
+                self.state = "failed"
+                self.error = f"{type(exc).__name__}: {exc}"
+                delay = LOAD_RETRY_DELAYS[min(attempt, len(LOAD_RETRY_DELAYS) - 1)]
+                logger.exception("Data load failed, retrying in %ds", delay)
+                attempt += 1
+                time.sleep(delay)
+
+
+def run_coordinator(source=DATA_SOURCE, shared_dir=None):
+    """Load and refresh the dataset in this process and publish every version for workers.
+
+    Started by gunicorn.conf.py; the workers run with DATA_SOURCE=shared and memory-map
+    what this process publishes instead of each fetching and holding its own copy.
+    """
+    logging.basicConfig(level=logging.INFO)
+    shared = SharedDatasetSource(shared_dir) if shared_dir else SharedDatasetSource()
+    store = DataStore(source=source, shared=shared)
+    store.add_listener(
+        lambda dataset: shared.publish(dataset.frames, dataset.version, dataset.fingerprints, dataset.to_shared()))
+    store.run_forever(REFRESH_INTERVAL)
+
+
+def _with_latest_report(fingerprints, frames):
+    fingerprints = dict(fingerprints)
+    if 'laos_data' in fingerprints:
+        latest = frames['laos_data']['reported_date'].max()
+        fingerprints['laos_data'] = dict(fingerprints['laos_data'], last_reported_date=str(latest))
+    return fingerprints
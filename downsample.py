@@ -0,0 +1,79 @@
+import os
+import numpy as np
+
+POINT_BUDGET = int(os.getenv("PLOT_POINT_BUDGET", "500"))  # most points a time-series trace sends
+
+
+def _numeric(x):
+    """Float positions of `x`, with datetimes as nanoseconds."""
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        return x.astype('datetime64[ns]').astype(np.int64).astype(float)
+    return x.astype(float)
+
+
+def lttb_indices(x, y, budget=POINT_BUDGET, groups=None):
+    """Positions of the points Largest-Triangle-Three-Buckets keeps of the series (x, y).
+
+    The first and last points are kept; the ones between are split into `budget` - 2
+    buckets of equal count, and each bucket keeps the point forming the largest
+    triangle with the point kept before it and the mean of the next bucket. Peaks and
+    dips therefore survive, unlike with every-nth-point or bucket means. `x` must be
+    sorted; series within the budget are returned whole.
+
+    With `groups`, labels whose rows are contiguous, each group is a series of its own
+    and keeps up to `budget` points. All groups advance through their buckets together,
+    so the Python loop runs once per bucket, not once per bucket and group.
+    """
+    n = len(y)
+    groups = np.zeros(n, dtype=bool) if groups is None else np.asarray(groups)
+    starts = np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]]) if n else np.zeros(0, dtype=np.int64)
+    ends = np.append(starts[1:], n)
+    long = ends - starts > budget
+    if budget < 3 or not long.any():
+        return np.arange(n)
+    x, y = _numeric(x), np.asarray(y, dtype=float)
+    starts, ends = starts[long], ends[long]
+
+    # Bucket i of each series covers edges[:, i]:edges[:, i + 1]; the last point is a bucket of its own
+    every = (ends - starts - 2) / (budget - 2)
+    edges = np.column_stack([
+        starts[:, None] + 1 + (np.arange(budget - 1) * every[:, None]).astype(np.int64), ends,
+    ])
+
+    finite = np.isfinite(y)
+
+    def bucket_sums(values):
+        cumulative = np.concatenate([[0], np.cumsum(values)])
+        return cumulative[edges[:, 1:]] - cumulative[edges[:, :-1]]
+
+    counts = bucket_sums(finite)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean_x = bucket_sums(np.where(finite, x, 0)) / counts
+        mean_y = bucket_sums(np.where(finite, y, 0)) / counts
+
+    # Candidates of every bucket, padded to the widest one
+    width = int((edges[:, 1:-1] - edges[:, :-2]).max())
+    candidates = edges[:, :-2, None] + np.arange(width)
+    valid = candidates < edges[:, 1:-1, None]
+    candidates = np.where(valid, candidates, edges[:, :-2, None])
+    cand_x, cand_y = x[candidates], y[candidates]
+
+    kept = np.empty((len(starts), budget), dtype=np.int64)
+    kept[:, 0], kept[:, -1] = starts, ends - 1
+    a = starts
+    rows = np.arange(len(starts))
+    for i in range(budget - 2):
+        xa, ya = x[a][:, None], y[a][:, None]
+        # Twice the triangle area, up to sign, for every candidate of the bucket
+        area = np.abs((xa - mean_x[:, i + 1, None]) * (cand_y[:, i] - ya)
+                      - (xa - cand_x[:, i]) * (mean_y[:, i + 1, None] - ya))
+        area = np.where(valid[:, i] & np.isfinite(area), area, -1)
+        a = candidates[rows, i, area.argmax(axis=1)]
+        kept[:, i + 1] = a
+
+    # Series within the budget keep all their rows
+    whole = np.ones(n, dtype=bool)
+    for start, end in zip(starts, ends):
+        whole[start:end] = False
+    return np.sort(np.concatenate([np.flatnonzero(whole), kept.ravel()]))
@@ -0,0 +1,32 @@
+# gunicorn.conf.py
+# 워커마다 데이터를 따로 불러오지 않도록, 코디네이터 프로세스 하나가 데이터를 불러와
+# Arrow 파일로 공유 디렉터리(/dev/shm)에 게시하고 워커들은 그 파일을 메모리 매핑해서 사용
+import os
+import multiprocessing
+
+# 코디네이터는 원래 데이터 소스를 쓰고, 워커들은 게시된 데이터셋에 붙음
+COORDINATOR_SOURCE = os.environ.get("DATA_SOURCE", "auto")
+if COORDINATOR_SOURCE == "shared":
+    COORDINATOR_SOURCE = "auto"
+os.environ["DATA_SOURCE"] = "shared"
+
+_coordinator = None
+
+
+def on_starting(server):
+    global _coordinator
+    from data_store import run_coordinator
+
+    # spawn: 마스터의 스레드/락 상태를 물려받지 않는 새 인터프리터
+    context = multiprocessing.get_context("spawn")
+    _coordinator = context.Process(
+        target=run_coordinator, args=(COORDINATOR_SOURCE,), name="dataset-coordinator", daemon=True
+    )
+    _coordinator.start()
+    server.log.info("Dataset coordinator started (pid %s, source %s)", _coordinator.pid, COORDINATOR_SOURCE)
+
+
+def on_exit(server):
+    if _coordinator is not None and _coordinator.is_alive():
+        _coordinator.terminate()
+        _coordinator.join(10)
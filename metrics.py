@@ -0,0 +1,191 @@
+"""Minimal in-process metrics rendered in the Prometheus text exposition format.
+
+Each gunicorn worker keeps its own counters; scrape every worker (or sum across them)
+to get the full picture.
+"""
+import time
+import bisect
+import threading
+import functools
+
+from dash.exceptions import PreventUpdate
+from flask import g, has_request_context
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+
+class _Metric:
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _labels(self, labels, extra=()):
+        pairs = list(zip(self.labelnames, labels)) + list(extra)
+        return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in pairs) + "}" if pairs else ""
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            lines.extend(self._samples(labels, value))
+        return lines
+
+    def _samples(self, labels, value):
+        return [f"{self.name}{self._labels(labels)} {_number(value)}"]
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+
+class Gauge(_Metric):
+    type = "gauge"
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels, amount=1):
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, *labels):
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                # per-bucket counts (last one is +Inf), sum, count
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][bisect.bisect_left(self.buckets, value)] += 1
+            state[1] += value
+            state[2] += 1
+
+    def _samples(self, labels, state):
+        counts, total, count = state
+        lines, cumulative = [], 0
+        for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += bucket_count
+            le = "+Inf" if bound == float("inf") else _number(bound)
+            lines.append(f"{self.name}_bucket{self._labels(labels, [('le', le)])} {cumulative}")
+        lines.append(f"{self.name}_sum{self._labels(labels)} {_number(total)}")
+        lines.append(f"{self.name}_count{self._labels(labels)} {count}")
+        return lines
+
+
+def _number(value):
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+REGISTRY = []
+
+callback_duration = Histogram(
+    "dash_callback_duration_seconds", "Time spent inside a Dash callback.", ["callback", "tab"], LATENCY_BUCKETS)
+callback_request_duration = Histogram(
+    "dash_callback_request_duration_seconds", "Whole callback request, including serialization.",
+    ["callback", "tab"], LATENCY_BUCKETS)
+callback_response_bytes = Histogram(
+    "dash_callback_response_bytes", "Size of the serialized callback response.", ["callback", "tab"], SIZE_BUCKETS)
+callback_errors = Counter(
+    "dash_callback_errors_total", "Callbacks that raised an exception.", ["callback", "tab"])
+callbacks_in_flight = Gauge(
+    "dash_callbacks_in_flight", "Callbacks currently running.", ["callback"])
+
+
+# LRUCaches exported on every scrape, by name; their counters live on the caches themselves
+_caches = {}
+CACHE_METRICS = (
+    ("lru_cache_items", "gauge", "Entries held by the cache.", 'items'),
+    ("lru_cache_bytes", "gauge", "Bytes held by the cache (0 when it is bounded by entries only).", 'bytes'),
+    ("lru_cache_hits_total", "counter", "Lookups answered from the cache.", 'hits'),
+    ("lru_cache_misses_total", "counter", "Lookups that found nothing.", 'misses'),
+)
+
+
+def watch_cache(name, cache):
+    """Export `cache.stats()` with the label cache=`name`; returns the cache."""
+    _caches[name] = cache
+    return cache
+
+
+def _render_caches():
+    stats = {name: cache.stats() for name, cache in sorted(_caches.items())}
+    lines = []
+    for metric, kind, documentation, key in CACHE_METRICS:
+        lines += [f"# HELP {metric} {documentation}", f"# TYPE {metric} {kind}"]
+        lines += [f'{metric}{{cache="{_escape(name)}"}} {_number(values[key])}' for name, values in stats.items()]
+    return lines
+
+
+def instrument(name, tab=None):
+    """Record latency, errors and in-flight count of a callback.
+
+    `tab(*args)` returns the tab label for the call. The labels are also left on
+    flask.g so the after-request hook can attribute the response size.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            labels = (name, tab(*args) if tab else "")
+            if has_request_context():
+                g.callback_labels = labels
+            callbacks_in_flight.inc(name)
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            except PreventUpdate:
+                raise
+            except Exception:
+                callback_errors.inc(*labels)
+                raise
+            finally:
+                callback_duration.observe(time.perf_counter() - started, *labels)
+                callbacks_in_flight.dec(name)
+        return wrapper
+    return decorator
+
+
+def start_request():
+    """Flask before_request hook."""
+    g.request_started = time.perf_counter()
+
+
+def record_response(response):
+    """Flask after_request hook: duration and size of the callback response just produced."""
+    labels = g.get("callback_labels")
+    if labels is None:
+        return response
+    if "request_started" in g:
+        callback_request_duration.observe(time.perf_counter() - g.request_started, *labels)
+    if not response.direct_passthrough:
+        callback_response_bytes.observe(len(response.get_data()), *labels)
+    return response
+
+
+def render():
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    lines.extend(_render_caches())
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,54 @@
+import hashlib
+import math
+import numpy as np
+
+from cache import LRUCache
+from metrics import watch_cache
+
+PIE_RADIUS = 0.385  # share of the icon box the pie fills, same footprint as the old matplotlib icons
+
+_icon_cache = watch_cache("pie_icon", LRUCache(max_items=1024))
+
+
+def pie_svg(values, colors, size):
+    """Inline SVG pie chart for one marker, cached by its values, colours and size."""
+    values = np.asarray(values, dtype=float)
+    size = int(round(size))
+    digest = hashlib.sha1(values.tobytes())
+    digest.update("|".join(colors).encode())
+    key = (digest.hexdigest(), size)
+    return _icon_cache.get_or_create(key, lambda: _render_pie_svg(values, colors, size))
+
+
+def _render_pie_svg(values, colors, size):
+    center = size / 2
+    radius = size * PIE_RADIUS
+    total = values.sum()
+    wedges = []
+
+    if total > 0:
+        nonzero = [(v, c) for v, c in zip(values, colors) if v > 0]
+        if len(nonzero) == 1:
+            wedges.append(
+                f'<circle cx="{center:.2f}" cy="{center:.2f}" r="{radius:.2f}" fill="{nonzero[0][1]}" '
+                f'stroke="white" stroke-width="0.5"/>'
+            )
+        else:
+            # Counter-clockwise from 3 o'clock, like matplotlib's ax.pie
+            angle = 0.0
+            for value, color in nonzero:
+                sweep = 2 * math.pi * value / total
+                x1, y1 = center + radius * math.cos(angle), center - radius * math.sin(angle)
+                angle += sweep
+                x2, y2 = center + radius * math.cos(angle), center - radius * math.sin(angle)
+                large_arc = 1 if sweep > math.pi else 0
+                wedges.append(
+                    f'<path d="M{center:.2f},{center:.2f} L{x1:.2f},{y1:.2f} '
+                    f'A{radius:.2f},{radius:.2f} 0 {large_arc} 0 {x2:.2f},{y2:.2f} Z" '
+                    f'fill="{color}" stroke="white" stroke-width="0.5"/>'
+                )
+
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{size}" height="{size}" '
+        f'viewBox="0 0 {size} {size}">{"".join(wedges)}</svg>'
+    )
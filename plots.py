@@ -1,32 +1,81 @@
 import numpy as np
 import pandas as pd
-from datetime import datetime, timedelta
 import plotly.graph_objects as go
+from plotly.subplots import make_subplots
 import json
+import html
+from functools import lru_cache
 import folium
 from folium.plugins import MarkerCluster
-import matplotlib.pyplot as plt
-from scipy.stats import gaussian_kde
+from branca.element import MacroElement
+from jinja2 import Template
+from cache import LRUCache
+from metrics import watch_cache
+from kde import binned_kde
+from downsample import lttb_indices
+
+from pie_icons import pie_svg
 
 COLORS = ["#0081a7", "#00afb9", "#f07167", "#e9c46a",
           "#264653", "#f4a261", "#e76f51", "#ef233c", "#fed9b7",
           "#f6bd60", "#84a59d", "#f95738", "#fdfcdc"]
 
+TEXT_LABEL_LIMIT = 60  # points a trace may carry value labels for
 
-def plot_disease_pie_map(data):
-    cutoff_date = datetime.today() - timedelta(days=100)
-    data = data[data['reported_date'] >= cutoff_date]
 
-    # data by province and disease
-    province_disease = data.groupby(['province', 'disease_code'])['case'].sum().unstack().fillna(0)
+def compact(values):
+    """`values` as an array, whole-number floats (counts) as integers.
 
-    # total cases per province
-    province_totals = province_disease.sum(axis=1)
+    plotly sends integer arrays in the narrowest integer type that holds them, so a
+    count takes one to four bytes instead of a float's eight.
+    """
+    values = np.asarray(values)
+    if values.dtype.kind == 'f' and len(values) and np.isfinite(values).all() and (values == np.round(values)).all():
+        return values.astype(np.int64)
+    return values
+
+
+def epoch_ms(timestamps):
+    """Datetimes as float milliseconds since the epoch.
+
+    On a date axis plotly reads these like date strings, but a float array is sent as
+    a base64 typed array, where datetime64 values would become one ISO string each.
+    """
+    return np.asarray(timestamps, dtype='datetime64[ms]').astype(float)
+
+
+@lru_cache(maxsize=1)
+def load_laos_geojson():
+    with open("data/laos.geojson", "r") as f:
+        return json.load(f)
 
-    # unique diseases for color mapping
-    diseases = province_disease.columns
-    disease_colors = {disease: COLORS[i % len(COLORS)] for i, disease in enumerate(diseases)}
 
+PIE_MARKERS_PLACEHOLDER = "PIE_MARKERS_PLACEHOLDER"
+
+
+class PieMarkers(MacroElement):
+    """Adds the markers of a JSON array, swapped in for the placeholder, to the parent cluster."""
+
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+            PIE_MARKERS_PLACEHOLDER.forEach(function (m) {
+                L.marker([m.lat, m.lon], {
+                    icon: L.divIcon({html: m.icon, iconSize: [m.size, m.size],
+                                     iconAnchor: [m.anchor, m.anchor], className: "empty"})
+                }).bindPopup(L.popup({maxWidth: 250}).setContent(m.popup))
+                  .addTo({{ this._parent.get_name() }});
+            });
+        {% endmacro %}
+    """)
+
+
+@lru_cache(maxsize=1)
+def pie_map_template():
+    """Rendered map with the Laos boundary and an empty marker cluster.
+
+    Rendering through folium costs a template compile per element, so the map is
+    rendered once and only the marker data changes between windows.
+    """
     # base map
     laos_coords = [18.0, 105.0]
     m = folium.Map(
@@ -36,8 +85,7 @@ def plot_disease_pie_map(data):
     )
 
     # GeoJSON of Laos provinces
-    with open("data/laos.geojson", "r") as f:
-        laos_geojson = json.load(f)
+    laos_geojson = load_laos_geojson()
 
     folium.GeoJson(
         laos_geojson,
@@ -57,20 +105,36 @@ def plot_disease_pie_map(data):
 
     #marker cluster for better handling of markers
     marker_cluster = MarkerCluster().add_to(m)
+    PieMarkers().add_to(marker_cluster)
 
-    # province centers
-    province_centers = (
-        data.groupby('province')
-        .agg({'latitude': 'mean', 'longitude': 'mean'})
-        .dropna()
-        .to_dict('index')
+    return m._repr_html_()
+
+
+def disease_pie_map_html(window, province_centers):
+    """Map HTML with a pie per province of the cases in `window` (TimeIndex.window rows)."""
+    # data by province and disease
+    province_disease = (
+        window.dropna(subset=['province', 'disease_code'])
+        .pivot_table(index='province', columns='disease_code', values='case', aggfunc='sum', observed=True)
+        .fillna(0)
     )
 
+    # total cases per province
+    province_totals = province_disease.sum(axis=1)
+
+    # unique diseases for color mapping
+    diseases = province_disease.columns
+    disease_colors = {disease: COLORS[i % len(COLORS)] for i, disease in enumerate(diseases)}
+
+    # province centers
+    province_centers = province_centers.to_dict('index')
+
     max_total = province_totals.max()
     min_size = 80  # minimum pie radius in pixels
     max_size = 120  # maximum pie radius in pixels
 
     #pie charts for each province
+    markers = []
     for province in province_disease.index:
         if province not in province_centers:
             continue
@@ -89,7 +153,7 @@ def plot_disease_pie_map(data):
         popup_content = f"""
         <div style='font-family: Arial, sans-serif; width: 200px;'>
             <h4 style='margin-bottom: 5px; color: #333;'>{province}</h4>
-            <p style='margin: 5px 0; font-weight: bold; font-size:12px;'>Total cases: {total_cases}</p>
+            <p style='margin: 5px 0; font-weight: bold; font-size:12px;'>Total cases: {total_cases:.0f}</p>
             <hr style='margin: 8px 0; border-color: #eee;'>
         """
 
@@ -98,55 +162,49 @@ def plot_disease_pie_map(data):
                 popup_content += f"""
                 <p style='margin: 3px 0;'>
                     <span style='color: {disease_colors[disease]}; font-size:12px; font-weight: bold;'>■</span>
-                    <span style='font-weight: bold; font-size:12px; color: {disease_colors[disease]};'>{disease}</span>: {value}
+                    <span style='font-weight: bold; font-size:12px; color: {disease_colors[disease]};'>{disease}</span>: {value:.0f}
                 </p>
                 """
 
         popup_content += "</div>"
 
-        #figure to hold the pie chart
-        fig, ax = plt.subplots(figsize=(size/10, size/10))
-        ax.pie(values,
-               colors=[disease_colors[d] for d in diseases],
-               wedgeprops={'linewidth': 0.5, 'edgecolor': 'white'})
-        ax.axis('equal')
-
-        # pie chart to a temporary file
-        plt.savefig(f'assets/temp/temp_pie_{province}.png', transparent=True, dpi=100)
-        plt.close()
+        #marker with an inline SVG pie chart icon
+        markers.append({
+            'lat': float(lat),
+            'lon': float(lon),
+            'icon': pie_svg(values, [disease_colors[d] for d in diseases], size),
+            'size': int(round(size)),
+            'anchor': int(round(size)) // 2,
+            'popup': f'<div style="width: 100.0%; height: 100.0%;">{popup_content}</div>',
+        })
 
-        #marker with pie chart icon
-        icon = folium.features.CustomIcon(f'assets/temp/temp_pie_{province}.png', icon_size=(size, size))
-        folium.Marker(
-            location=[lat, lon],
-            icon=icon,
-            popup=folium.Popup(popup_content, max_width=250)
-        ).add_to(marker_cluster)
+    # "</" is escaped so popup markup can never close the surrounding <script>
+    script = json.dumps(markers).replace("</", "<\\/")
+    return pie_map_template().replace(PIE_MARKERS_PLACEHOLDER, html.escape(script))
 
-    return m
 
-
-def plot_disease_outbreak_overtime(data, code_filter):
-    data = data.sort_values('reported_date')
-    data = data.set_index('reported_date')['case'].resample('ME').sum().reset_index()
+def plot_disease_outbreak_overtime(monthly, code_filter):
+    data = monthly.rename('case').rename_axis('reported_date').reset_index()
+    data = data.iloc[lttb_indices(data['reported_date'], data['case'])]
 
     fig = go.Figure()
 
-    x_vals = data['reported_date'].tolist()
-    y_vals = data['case'].tolist()
+    x_vals = data['reported_date'].to_numpy()
+    y_vals = compact(data['case'])
+    # Value labels only while they fit next to each other
+    labelled = len(data) <= TEXT_LABEL_LIMIT
 
     fig.add_trace(go.Scatter(
         x=x_vals,
         y=y_vals,
-        mode='markers+lines+text',
+        mode='markers+lines+text' if labelled else 'lines',
         textposition="top center",
-        text=data['case'],
+        text=y_vals if labelled else None,
         fill="tozeroy",
         line=dict(color="#00afb9"),
         fillcolor="rgba(0, 175, 185, 0.4)",
         name='Number of Cases',
-        hovertext=data['case'],
-        hoverinfo='name+text',
+        hoverinfo='name+y',
     ))
 
     fig = format_hover_layout(fig)
@@ -160,7 +218,7 @@ def plot_disease_outbreak_overtime(data, code_filter):
         yaxis=dict(
             showticklabels=False,
             showgrid=False,
-            range=[-1, max(y_vals)+2]  # set y-axis limit here
+            range=[-1, max(y_vals, default=0)+2]  # set y-axis limit here
         ),
         legend=dict(orientation="h", xanchor='center', x=0.5, y=-0.25),
         height=350,
@@ -185,49 +243,39 @@ COLORS = ["#0081a7", "#00afb9", "#f07167", "#e9c46a",
 
 
 
-def create_weather_map(weather_data, LAOS_REGIONS):
+def create_weather_map(weather_data, stations):
     """
-    Create a map visualization of weather data
+    Create a map visualization of the weather frame (indexed by region) at the station
+    coordinates in `stations` (indexed by region, with latitude, longitude and the
+    number of outbreak locations each station is nearest to)
     """
-    if not weather_data:
+    weather = weather_data.join(stations[['latitude', 'longitude', 'locations']], how='inner')
+    if weather.empty:
         return None
 
-    # Prepare data for map
-    regions = []
-    temperatures = []
-    humidity_values = []
-    lats = []
-    lons = []
-    hover_texts = []
-
-    for region, data in weather_data.items():
-        if data:
-            regions.append(region)
-            temperatures.append(data['temperature'])
-            humidity_values.append(data['humidity'])
-            coords = LAOS_REGIONS[region]
-            lats.append(coords['latitude'])
-            lons.append(coords['longitude'])
-
-            hover_text = f"""
+    temperatures = weather['temperature'].to_numpy(dtype=float)
+    hover_texts = [
+        f"""
             <b>{region}</b><br>
-            Temperature: {data['temperature']:.1f}°C<br>
-            Feels like: {data['feels_like']:.1f}°C<br>
-            Humidity: {data['humidity']}%<br>
-            Description: {data['description']}<br>
-            Wind: {data['wind_speed']:.1f} m/s
+            Temperature: {row['temperature']:.1f}°C<br>
+            Feels like: {row['feels_like']:.1f}°C<br>
+            Humidity: {row['humidity']}%<br>
+            Description: {row['description']}<br>
+            Wind: {row['wind_speed']:.1f} m/s<br>
+            Nearest station to {row['locations']:.0f} outbreak locations
             """
-            hover_texts.append(hover_text)
+        for region, row in zip(weather.index, weather.to_dict('records'))
+    ]
 
     # Create map
     fig = go.Figure()
 
     fig.add_trace(go.Scattermapbox(
-        lat=lats,
-        lon=lons,
+        lat=weather['latitude'].to_numpy(dtype=float),
+        lon=weather['longitude'].to_numpy(dtype=float),
         mode='markers+text',
         marker=dict(
-            size=[max(10, temp + 20) for temp in temperatures],  # Size based on temperature
+            size=np.maximum(10, temperatures + 20),  # Size based on temperature
             color=temperatures,
             colorscale='RdYlBu_r',
             showscale=True,
@@ -257,24 +305,14 @@ def create_weather_map(weather_data, LAOS_REGIONS):
 
 def create_weather_charts(weather_data):
     """
-    Create temperature and humidity comparison charts using go.Figure
+    Create temperature and humidity comparison charts from the weather frame (indexed by region)
     """
-    if not weather_data:
+    if weather_data.empty:
         return go.Figure(), go.Figure()
 
-    regions = []
-    temperatures = []
-    humidity_values = []
-
-    for region, data in weather_data.items():
-        if data:
-            regions.append(region)
-            temperatures.append(data['temperature'])
-            humidity_values.append(data['humidity'])
-
-    # Normalize values for coloring
-    temp_colors = np.interp(temperatures, (min(temperatures), max(temperatures)), (0, 1))
-    humidity_colors = np.interp(humidity_values, (min(humidity_values), max(humidity_values)), (0, 1))
+    regions = weather_data.index.to_numpy()
+    temperatures = weather_data['temperature'].to_numpy(dtype=float)
+    humidity_values = compact(weather_data['humidity'].to_numpy(dtype=float))
 
     # Temperature Figure
     temp_fig = go.Figure()
@@ -299,7 +337,7 @@ def create_weather_charts(weather_data):
         height=400,
         showlegend=False,
         plot_bgcolor='white',
-        yaxis=dict(range=[0, max(temperatures) * 1.15])
+        yaxis=dict(range=[0, temperatures.max() * 1.15])
     )
     temp_fig = format_hover_layout(temp_fig)
 
@@ -333,11 +371,125 @@ def create_weather_charts(weather_data):
     return temp_fig, humidity_fig
 
 
+WEATHER_METRICS = {
+    'temperature': 'Temperature (°C)',
+    'feels_like': 'Feels Like (°C)',
+    'humidity': 'Humidity (%)',
+    'pressure': 'Pressure (hPa)',
+    'wind_speed': 'Wind Speed (m/s)',
+    'visibility': 'Visibility (km)',
+}
+
+
+def create_weather_trend_chart(trend, metric, resolution):
+    """
+    Line chart of a WeatherHistory.query() result: the mean per region, and for a
+    single region the min-max range of each hourly or daily bucket as a band
+    """
+    label = WEATHER_METRICS[metric]
+    fig = go.Figure()
+    regions = trend['region'].unique()
+    # Each region's rows together, in first-seen order, then downsampled per region
+    trend = trend.iloc[np.argsort(pd.Categorical(trend['region'], categories=regions).codes, kind='stable')]
+    trend = trend.iloc[lttb_indices(trend['timestamp'], trend['mean'], groups=trend['region'])]
+
+    for i, (region, rows) in enumerate(trend.groupby('region', sort=False)):
+        x = epoch_ms(rows['timestamp'])
+        color = COLORS[i % len(COLORS)]
+        if len(regions) == 1 and resolution != 'raw':
+            fig.add_trace(go.Scatter(
+                x=x, y=rows['max'].to_numpy(), mode='lines', line=dict(width=0),
+                hoverinfo='skip', showlegend=False
+            ))
+            fig.add_trace(go.Scatter(
+                x=x, y=rows['min'].to_numpy(), mode='lines', line=dict(width=0),
+                fill='tonexty', fillcolor='rgba(0, 129, 167, 0.2)', name='Min - Max',
+                customdata=rows['max'].to_numpy(),
+                hovertemplate='%{y:.1f} - %{customdata:.1f}'
+            ))
+        fig.add_trace(go.Scatter(
+            x=x, y=rows['mean'].to_numpy(), mode='lines', name=region,
+            line=dict(color=color, width=2),
+            hovertemplate='%{y:.1f}'
+        ))
+
+    step = {'raw': 'Observations', 'hourly': 'Hourly Mean', 'daily': 'Daily Mean'}[resolution]
+    fig.update_layout(
+        title=f"{label.split(' (')[0]} Trend ({step})",
+        xaxis=dict(title='Time', type='date'),
+        yaxis_title=label,
+        plot_bgcolor='white',
+        legend=dict(orientation="h", xanchor='center', x=0.5, y=-0.25),
+    )
+    fig = format_hover_layout(fig)
+
+    return fig
+
+
+def create_correlation_heatmap(lagged, provinces, measure, period_label):
+    """Province x lag heatmap of the case-weather correlations of one disease"""
+    label = WEATHER_METRICS[measure].split(' (')[0]
+    fig = go.Figure(go.Heatmap(
+        z=lagged,
+        x=np.arange(lagged.shape[1]),
+        y=np.asarray(provinces, dtype=object),
+        zmin=-1, zmax=1, zmid=0,
+        colorscale='RdBu_r',
+        colorbar=dict(title='r', thickness=12),
+        hovertemplate=f"%{{y}}<br>{label} %{{x}} {period_label.lower()}(s) earlier<br>r = %{{z:.2f}}<extra></extra>",
+        hoverongaps=False,
+    ))
+    fig.update_layout(
+        title=f"Correlation of Cases with Earlier {label}",
+        xaxis=dict(title=f"Lag ({period_label}s)", dtick=1),
+        yaxis=dict(autorange='reversed'),
+        plot_bgcolor='white',
+        height=max(300, 120 + 24 * len(provinces)),
+        margin=dict(l=110, r=20, t=60, b=50),
+    )
+    return fig
+
+
+def create_correlation_timeline(periods, cases, weather, rolling, measure, lag, period_label, title):
+    """Cases per period against the weather `lag` periods earlier, with their rolling correlation"""
+    label = WEATHER_METRICS[measure]
+    kept = lttb_indices(periods, cases)
+    periods, cases, weather, rolling = (np.asarray(values)[kept] for values in (periods, cases, weather, rolling))
+    cases = compact(cases)
+    fig = make_subplots(rows=2, cols=1, shared_xaxes=True, row_heights=[0.7, 0.3], vertical_spacing=0.06,
+                        specs=[[{'secondary_y': True}], [{}]])
+    fig.add_trace(go.Bar(
+        x=periods, y=cases, name='Cases', marker_color='#f07167', opacity=0.7,
+        hovertemplate='%{y:.0f}'
+    ), row=1, col=1)
+    fig.add_trace(go.Scatter(
+        x=periods, y=weather, mode='lines+markers', name=f"{label.split(' (')[0]} ({lag} {period_label.lower()}(s) earlier)",
+        line=dict(color='#0081a7', width=2), hovertemplate='%{y:.1f}'
+    ), row=1, col=1, secondary_y=True)
+    fig.add_trace(go.Scatter(
+        x=periods, y=rolling, mode='lines', name='Rolling correlation',
+        line=dict(color='#264653', width=2), connectgaps=False, hovertemplate='%{y:.2f}'
+    ), row=2, col=1)
+    fig.add_hline(y=0, line=dict(color='#adb5bd', width=1), row=2, col=1)
+
+    fig.update_yaxes(title_text='Cases', row=1, col=1, secondary_y=False)
+    fig.update_yaxes(title_text=label, row=1, col=1, secondary_y=True, showgrid=False)
+    fig.update_yaxes(title_text='r', range=[-1, 1], row=2, col=1)
+    fig.update_layout(
+        title=title,
+        plot_bgcolor='white',
+        legend=dict(orientation="h", xanchor='center', x=0.5, y=-0.15),
+    )
+    fig = format_hover_layout(fig)
+    fig.update_layout(height=500)
+    return fig
+
 
 
-def plot_key_disease_distribution(data):
+
+def plot_key_disease_distribution(cube):
     # total cases per disease code
-    summary = data.groupby("disease_code")["case"].sum().reset_index()
+    summary = cube.sum("disease_code").reset_index()
 
     # Plot the pie chart
     fig = go.Figure(data=[go.Pie(
@@ -362,24 +514,16 @@ def plot_key_disease_distribution(data):
     return fig
 
 
-def key_disease_reports_overtime(data):
-    data = data.sort_values('reported_date')
-    data['reported_date'] = pd.to_datetime(data['reported_date'])
-
-    pivot_df = (
-        data.groupby(['reported_date', 'disease_code'])['case']
-        .sum()
-        .unstack(fill_value=0)
-        .resample('ME')  # Monthly end
-        .sum()
-        .reset_index()
-    )
-
-    pivot_df.columns.name = None
+def key_disease_reports_overtime(cube):
+    pivot_df = cube.monthly(by='disease_code').rename_axis('reported_date').reset_index()
 
     disease_codes = pivot_df.columns[1:]  # exclude date column
 
     cumulative = pivot_df[disease_codes].cumsum(axis=1)
+    # The same months for every layer, picked on the top of the stack, so the layers stay stacked
+    if len(disease_codes):
+        kept = lttb_indices(pivot_df['reported_date'], cumulative[disease_codes[-1]])
+        pivot_df, cumulative = pivot_df.iloc[kept], cumulative.iloc[kept]
 
     fig = go.Figure()
 
@@ -390,14 +534,14 @@ def key_disease_reports_overtime(data):
         fill_mode = 'tozeroy' if i == 0 else 'tonexty'
 
         fig.add_trace(go.Scatter(
-            x=pivot_df['reported_date'],
-            y=stacked_y,
+            x=pivot_df['reported_date'].to_numpy(),
+            y=compact(stacked_y),
             mode='lines',
             name=disease,
             fill=fill_mode,
             line=dict(width=0),
             hoverinfo='x+name+text',
-            text=pivot_df[disease],
+            text=compact(pivot_df[disease]),
             fillcolor=COLORS[i % len(COLORS)]
         ))
 
@@ -414,12 +558,11 @@ def key_disease_reports_overtime(data):
     return fig
 
 
-def key_disease_dist_overtime(data):
-    data['reported_date'] = pd.to_datetime(data['reported_date'])
-    data['year'] = data['reported_date'].dt.year
-
+def key_disease_dist_overtime(cube):
+    monthly = cube.sum(['month', 'disease_code'])
     grouped = (
-        data.groupby(['year', 'disease_code'])['case']
+        monthly.groupby([monthly.index.get_level_values('month').year.rename('year'),
+                         monthly.index.get_level_values('disease_code')])
         .sum()
         .reset_index()
     )
@@ -429,8 +572,8 @@ def key_disease_dist_overtime(data):
     fig = go.Figure()
 
     for i, disease in enumerate(pivot_df.columns):
-        x_values = pivot_df.index.astype(str).tolist()
-        y_values = pivot_df[disease].tolist()
+        x_values = pivot_df.index.astype(str).to_numpy()
+        y_values = compact(pivot_df[disease])
 
         fig.add_trace(go.Bar(
             x=x_values,
@@ -456,23 +599,32 @@ def key_disease_dist_overtime(data):
 
 
 
-def key_disease_kde_distribution(data):
-    data['reported_date'] = pd.to_datetime(data['reported_date'])
-    disease_codes = data['disease_code'].unique()
+# Densities keyed by (dataset version, disease, grid range)
+_kde_cache = watch_cache("kde", LRUCache(max_items=256))
+
+
+def key_disease_kde_distribution(data, version=None):
+    x_vals = np.linspace(data['case'].min(), data['case'].max(), 200)
 
     fig = go.Figure()
 
-    for i, disease in enumerate(disease_codes):
-        disease_data = data[data['disease_code'] == disease]['case']
-        if len(disease_data) > 0:
-            # Compute KDE
-            kde = gaussian_kde(disease_data)
-            x_vals = np.linspace(data['case'].min(), data['case'].max(), 200)
-            y_vals = kde(x_vals)
+    # Samples are only split out per disease when the density is not cached yet
+    codes, diseases = pd.factorize(data['disease_code'])
+    cases = data['case'].to_numpy(dtype=float)
+
+    for i, disease in enumerate(diseases):
+        def density(code=i):
+            return binned_kde(cases[codes == code], x_vals)
+
+        if version is None:
+            y_vals = density()
+        else:
+            y_vals = _kde_cache.get_or_create((version, disease, x_vals[0], x_vals[-1]), density)
 
+        if y_vals is not None:
             fig.add_trace(go.Scatter(
-                x=x_vals.tolist(),
-                y=y_vals.tolist(),
+                x=x_vals,
+                y=y_vals,
                 mode='lines',
                 name=disease,
                 fill='tozeroy',
@@ -493,20 +645,16 @@ def key_disease_kde_distribution(data):
     return fig
 
 
-def key_disease_wrt_location(data):
-    grouped = (
-        data.groupby(['province', 'disease_code'])['case']
-        .sum()
-        .reset_index()
-    )
+def key_disease_wrt_location(cube):
+    grouped = cube.sum(['province', 'disease_code']).reset_index()
 
     pivot_df = grouped.pivot(index='province', columns='disease_code', values='case').fillna(0)
 
     fig = go.Figure()
 
     for i, disease in enumerate(pivot_df.columns):
-        x_vals = pivot_df.index.tolist()
-        y_vals = pivot_df[disease].tolist()
+        x_vals = pivot_df.index.astype(str).to_numpy()
+        y_vals = compact(pivot_df[disease])
 
         fig.add_trace(go.Bar(
             x=x_vals,
@@ -530,29 +678,34 @@ def key_disease_wrt_location(data):
     return fig
 
 
-def plot_disease_code_map(data):
-    # Aggregate by location, disease_code, and coordinates
+def plot_disease_code_map(cube):
+    # Aggregate by location and disease_code, then attach the location coordinates
+    coords = cube.location_coords.dropna()
+    coords.index = cube.labels['location'].take(coords.index)
     grouped = (
-        data.groupby(['location', 'disease_code', 'latitude', 'longitude'])['case']
-        .sum()
+        cube.sum(['location', 'disease_code'])
         .reset_index()
+        .merge(coords, left_on='location', right_index=True)
     )
 
+    # centre on the mean report position, weighted like the raw rows were
+    reports = cube.sum('location', column='reports').reindex(coords.index, fill_value=0)
+
     fig = go.Figure()
 
     for i, disease in enumerate(grouped['disease_code'].unique()):
         df = grouped[grouped['disease_code'] == disease]
 
         fig.add_trace(go.Scattermapbox(
-            lat=df['latitude'].tolist(),
-            lon=df['longitude'].tolist(),
+            lat=df['latitude'].to_numpy(),
+            lon=df['longitude'].to_numpy(),
             mode='markers',
             marker=go.scattermapbox.Marker(
-                size=(df['case'] / df['case'].max() * 40 + 5).tolist(),  # scaled sizes
+                size=(df['case'] / df['case'].max() * 40 + 5).to_numpy(),  # scaled sizes
                 color=COLORS[i % len(COLORS)],
                 opacity=0.7
             ),
-            text=(df['location'] + "<br>Cases: " + df['case'].astype(int).astype(str)).tolist(),
+            text=(df['location'] + "<br>Cases: " + df['case'].astype(int).astype(str)).to_numpy(),
             name=disease,
             hoverinfo="text"
         ))
@@ -562,8 +715,8 @@ def plot_disease_code_map(data):
             style="carto-positron",
             zoom=4.5,
             center=dict(
-                lat=data['latitude'].mean(),
-                lon=data['longitude'].mean()
+                lat=np.average(coords['latitude'], weights=reports) if reports.sum() else None,
+                lon=np.average(coords['longitude'], weights=reports) if reports.sum() else None
             )
         ),
         margin=dict(l=0, r=0, t=40, b=0),
@@ -576,33 +729,17 @@ def plot_disease_code_map(data):
     return fig
 
 
-def disease_category_by_country(data):
-    # Group and pivot the data
-    grouped = (
-        data.groupby(['Country', 'Category'])
-        .size()
-        .reset_index(name='Count')
-        .pivot(index='Country', columns='Category', values='Count')
-        .fillna(0)
-    )
+NEIGHBOUR_CATEGORIES = ['Wild', 'Domestic']
 
-    grouped = grouped.sort_index()
 
-    fig = go.Figure()
-
-    for i, category in enumerate(['Wild', 'Domestic']):
-        if category in grouped.columns:
-            x_vals = grouped.index.tolist()
-            y_vals = grouped[category].tolist()
-
-            fig.add_trace(go.Bar(
-                x=x_vals,
-                y=y_vals,
-                name=category,
-                marker_color=COLORS[i % len(COLORS)],
-            ))
+def neighbour_chart_data(rollup):
+    """Neighbour rollup rows and figure layouts for the Neighboring Stats charts.
 
-    fig.update_layout(
+    Both charts are drawn in the browser (assets/neighbours.js) from this data, so
+    changing the countries or the year range needs no server round trip.
+    """
+    category_fig = go.Figure()
+    category_fig.update_layout(
         barmode='group',
         title='Wild vs Domestic Case Counts by Country',
         xaxis_title='Country',
@@ -612,24 +749,10 @@ def disease_category_by_country(data):
         plot_bgcolor='white',
         legend=dict(orientation='h', x=0.5, xanchor='center', y=-0.2)
     )
+    category_fig = format_hover_layout(category_fig)
 
-    fig = format_hover_layout(fig)
-    return fig
-
-
-
-def present_diseases_chart(data):
-    filtered_data = data[data['Disease status'] == 'Present']
-    disease_counts = filtered_data['Disease'].value_counts().sort_values()
-
-    fig = go.Figure(go.Bar(
-        x=disease_counts.values,
-        y=disease_counts.index,
-        orientation='h',
-        marker_color=COLORS[0 % len(COLORS)]
-    ))
-
-    fig.update_layout(
+    present_fig = go.Figure()
+    present_fig.update_layout(
         title="Reported Disease Counts in Recent Years",
         xaxis_title="Number of Cases",
         yaxis_title=None,
@@ -637,4 +760,12 @@ def present_diseases_chart(data):
         height=500
     )
 
-    return fig
+    return {
+        'rollup': rollup.records(),
+        'categories': NEIGHBOUR_CATEGORIES,
+        'colors': {'Wild': COLORS[0], 'Domestic': COLORS[1], 'Present': COLORS[0]},
+        'layouts': {
+            'category': category_fig.layout.to_plotly_json(),
+            'present': present_fig.layout.to_plotly_json(),
+        },
+    }
@@ -0,0 +1,79 @@
+"""Fingerprinted, precompressed static files.
+
+Every file under the assets folder is read once, hashed and, for text types,
+compressed with brotli and gzip at their highest levels. It is then served from
+memory at /static/<hash>.<ext>. The URL changes whenever the content does, so
+responses carry `Cache-Control: immutable` and browsers never ask for them again.
+Files with the same content share one URL and are downloaded once.
+"""
+import os
+import gzip
+import hashlib
+import mimetypes
+
+import brotli
+from flask import Response, abort, request
+
+ASSETS_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets")
+URL_PREFIX = "/static/"
+COMPRESSED_TYPES = {'.css', '.js', '.json', '.geojson', '.svg', '.html', '.txt'}
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def _build(folder):
+    files, urls = {}, {}
+    for root, _dirs, names in os.walk(folder):
+        for name in sorted(names):
+            path = os.path.join(root, name)
+            with open(path, "rb") as f:
+                data = f.read()
+            ext = os.path.splitext(name)[1].lower()
+            digest = hashlib.sha256(data).hexdigest()[:16]
+            key = f"{digest}{ext}"
+            if key not in files:
+                variants = {'identity': data}
+                if ext in COMPRESSED_TYPES:
+                    variants['br'] = brotli.compress(data, quality=11)
+                    variants['gzip'] = gzip.compress(data, compresslevel=9, mtime=0)
+                files[key] = {
+                    'digest': digest,
+                    'mimetype': mimetypes.guess_type(name)[0] or "application/octet-stream",
+                    # Only encodings that actually save bytes
+                    'variants': {enc: body for enc, body in variants.items()
+                                 if enc == 'identity' or len(body) < len(data)},
+                }
+            urls[os.path.relpath(path, folder).replace(os.sep, "/")] = URL_PREFIX + key
+    return files, urls
+
+
+_files, _urls = _build(ASSETS_FOLDER) if os.path.isdir(ASSETS_FOLDER) else ({}, {})
+
+
+def url(path):
+    """Fingerprinted URL of `path` (relative to the assets folder)."""
+    return _urls[path]
+
+
+def urls(ext):
+    """Fingerprinted URLs of the files ending in `ext`, in path order like Dash includes assets."""
+    return [value for path, value in sorted(_urls.items()) if path.endswith(ext)]
+
+
+def serve(name):
+    """Flask view for URL_PREFIX + <name>, in the best encoding the client accepts."""
+    entry = _files.get(name)
+    if entry is None:
+        abort(404)
+
+    encoding = next(
+        (enc for enc in ('br', 'gzip') if enc in entry['variants'] and request.accept_encodings.quality(enc) > 0),
+        'identity',
+    )
+    response = Response(entry['variants'][encoding], mimetype=entry['mimetype'])
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    response.headers["Vary"] = "Accept-Encoding"
+    if encoding != 'identity':
+        response.headers["Content-Encoding"] = encoding
+    # Each encoding is its own representation, with its own strong validator
+    response.set_etag(entry['digest'] if encoding == 'identity' else f"{entry['digest']}-{encoding}")
+    return response.make_conditional(request)
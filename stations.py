@@ -0,0 +1,84 @@
+import logging
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def unit_vectors(latitude, longitude):
+    """(n, 3) positions on the unit sphere; NaN rows where a coordinate is missing."""
+    lat = np.radians(np.asarray(latitude, dtype=float))
+    lon = np.radians(np.asarray(longitude, dtype=float))
+    return np.column_stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)])
+
+
+def chord_to_km(chord):
+    """Great-circle distance for a straight-line distance between two unit vectors."""
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.clip(np.asarray(chord) / 2, 0, 1))
+
+
+def _name_key(names):
+    return pd.Series(names, dtype=str).str.casefold().str.replace(r"[^0-9a-z]+", "", regex=True).to_numpy()
+
+
+class StationIndex:
+    """Weather stations (the regions of weather_data) in a KD-tree, for nearest-station joins.
+
+    Stations are stored as unit vectors on the sphere, so straight-line distances in the
+    tree rank them exactly like great-circle distances, with no latitude scaling or
+    longitude wrapping. A query of n points costs O(n log stations).
+    """
+
+    def __init__(self, stations):
+        self.stations = stations.reset_index(drop=True)  # region, latitude, longitude
+        self._tree = cKDTree(unit_vectors(self.stations['latitude'], self.stations['longitude'])) \
+            if len(self.stations) else None
+
+    @classmethod
+    def from_frames(cls, weather_df, laos_regions):
+        """Stations at the coordinates laos_regions lists for their region.
+
+        Names are compared case-, space- and punctuation-insensitively; regions
+        without a match are logged and left out.
+        """
+        regions = pd.Series(weather_df['region'].dropna().astype(str).unique())
+        coords = (
+            laos_regions.assign(key=_name_key(laos_regions['province']))
+            .drop_duplicates('key')
+            .set_index('key')[['latitude', 'longitude']]
+            .reindex(_name_key(regions))
+        )
+        stations = pd.DataFrame({
+            'region': regions.to_numpy(),
+            'latitude': coords['latitude'].to_numpy(dtype=float),
+            'longitude': coords['longitude'].to_numpy(dtype=float),
+        })
+        located = stations[['latitude', 'longitude']].notna().all(axis=1)
+        if not located.all():
+            logger.warning("No coordinates for weather regions %s", stations.loc[~located, 'region'].tolist())
+        return cls(stations[located])
+
+    def nearest(self, latitude, longitude):
+        """Row in `stations` and great-circle distance (km) of the station nearest to each point.
+
+        Points with a missing coordinate, or any point when there are no stations, get
+        -1 and NaN.
+        """
+        points = unit_vectors(latitude, longitude)
+        index = np.full(len(points), -1, dtype=np.int64)
+        distance = np.full(len(points), np.nan)
+        valid = np.isfinite(points).all(axis=1)
+        if self._tree is not None and valid.any():
+            chord, nearest = self._tree.query(points[valid], workers=-1)
+            index[valid] = nearest
+            distance[valid] = chord_to_km(chord)
+        return index, distance
+
+    def assign(self, coords):
+        """`coords` (latitude and longitude columns) with its nearest `station` and `station_km`."""
+        index, distance = self.nearest(coords['latitude'], coords['longitude'])
+        station = pd.Categorical.from_codes(index, categories=self.stations['region'])
+        return coords.assign(station=station, station_km=distance)
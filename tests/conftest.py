@@ -0,0 +1,26 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import generate_frames
+from data_loader import merge_frames
+
+# Synthetic data runs up to this date, so the date windows in the tests keep covering it
+END = pd.Timestamp("2024-12-31 12:00")
+
+
+@pytest.fixture(scope="session")
+def reports():
+    """Merged case reports from 2020 to 2024, with a few rows lacking a date, a province or a disease."""
+    laos_data = merge_frames(generate_frames(n_cases=4000, n_news=100, seed=3, end=END))[0]
+    rng = np.random.default_rng(3)
+    laos_data.loc[rng.choice(len(laos_data), 40, replace=False), 'reported_date'] = pd.NaT
+    laos_data.loc[rng.choice(len(laos_data), 40, replace=False), 'province'] = np.nan
+    laos_data.loc[rng.choice(len(laos_data), 40, replace=False), 'disease_code'] = np.nan
+    return laos_data
+
+
+@pytest.fixture(scope="session")
+def end():
+    """Last day of the synthetic data."""
+    return END
@@ -0,0 +1,135 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from aggregates import CaseCube, TimeIndex
+
+
+def _items(series):
+    """(label, value) pairs of `series` in order, for comparing against groupby results."""
+    return list(zip(series.index.tolist(), series.to_numpy(dtype=float).tolist()))
+
+
+# ---- CaseCube ----
+
+@pytest.fixture(scope="module")
+def cube(reports):
+    return CaseCube.from_reports(reports)
+
+
+@pytest.mark.parametrize("by", ['province', 'disease_code', 'location', ['province', 'disease_code']])
+def test_cube_sum_matches_groupby(cube, reports, by):
+    expected = reports.groupby(by, observed=True)['case'].sum()
+    assert _items(cube.sum(by)) == _items(expected)
+
+
+def test_cube_counts_reports(cube, reports):
+    expected = reports.groupby('disease_code', observed=True).size()
+    assert _items(cube.sum('disease_code', column='reports')) == _items(expected)
+
+
+def test_cube_monthly_matches_resample(cube, reports):
+    expected = reports.set_index('reported_date')['case'].resample('ME').sum()
+    assert _items(cube.monthly()) == _items(expected)
+
+
+def test_cube_monthly_by_disease_matches_pivot(cube, reports):
+    expected = (
+        reports.dropna(subset=['disease_code'])
+        .pivot_table(index='reported_date', columns='disease_code', values='case', aggfunc='sum', observed=True)
+        .resample('ME').sum()
+    )
+    actual = cube.monthly(by='disease_code')
+    assert list(actual.columns) == list(expected.columns)
+    assert (actual.index == expected.index).all()
+    assert (actual.to_numpy(dtype=float) == expected.to_numpy(dtype=float)).all()
+
+
+def test_cube_subset_filters_labels(cube, reports):
+    diseases = list(reports['disease_code'].dropna().unique()[:2]) + ["not a disease"]
+    expected = reports[reports['disease_code'].isin(diseases)].groupby('province', observed=True)['case'].sum()
+    assert _items(cube.subset(disease_code=diseases).sum('province')) == _items(expected)
+
+
+
+# ---- TimeIndex ----
+
+# Windows within the reports' 2020-2024 span (see conftest.END)
+WINDOWS = [(None, None), ("2023-03-10", "2023-09-05"), ("2023-06-01", "2023-06-01"), ("2024-12-01", None)]
+
+
+def _by_group(frame):
+    """{(province, disease_code): (case, reports)} with missing labels as None."""
+    labels = frame[['province', 'disease_code']].astype(object).where(frame[['province', 'disease_code']].notna(), None)
+    return dict(zip(map(tuple, labels.to_numpy().tolist()), zip(frame['case'].tolist(), frame['reports'].tolist())))
+
+
+def _in_window(reports, start, end):
+    day = reports['reported_date'].dt.normalize()
+    keep = day.notna()
+    if start is not None:
+        keep &= day >= pd.Timestamp(start)
+    if end is not None:
+        keep &= day <= pd.Timestamp(end)
+    return reports[keep]
+
+
+@pytest.fixture(scope="module")
+def time_index(reports):
+    return TimeIndex.from_reports(reports)
+
+
+@pytest.mark.parametrize("start, end", WINDOWS)
+def test_window_matches_filtered_groupby(time_index, reports, start, end):
+    expected = (
+        _in_window(reports, start, end)
+        .groupby(['province', 'disease_code'], dropna=False, observed=True)['case']
+        .agg(case='sum', reports='size')
+        .reset_index()
+    )
+    assert len(expected)
+    assert _by_group(time_index.window(start, end)) == _by_group(expected)
+
+
+def test_window_after_the_last_report_is_empty(time_index, end):
+    assert time_index.window(end + pd.Timedelta(days=1)).empty
+    assert time_index.monthly(end + pd.Timedelta(days=1)).empty
+
+
+def test_window_filters_labels(time_index, reports):
+    provinces = list(reports['province'].dropna().unique()[:3])
+    diseases = list(reports['disease_code'].dropna().unique()[:2])
+    selected = reports[reports['province'].isin(provinces) & reports['disease_code'].isin(diseases)]
+    expected = (
+        _in_window(selected, "2023-02-01", None)
+        .groupby(['province', 'disease_code'], observed=True)['case']
+        .agg(case='sum', reports='size')
+        .reset_index()
+    )
+    actual = time_index.window("2023-02-01", provinces=provinces, diseases=diseases)
+    assert len(expected)
+    assert _by_group(actual) == _by_group(expected)
+
+
+@pytest.mark.parametrize("start, end", WINDOWS)
+def test_time_index_monthly_matches_resample(time_index, reports, start, end):
+    expected = _in_window(reports, start, end).set_index('reported_date')['case'].resample('ME').sum()
+    assert len(expected)
+    assert _items(time_index.monthly(start, end)) == _items(expected)
+
+
+def test_periodic_matches_sums_between_edges(time_index, reports):
+    edges = pd.date_range(time_index.first_day - pd.Timedelta(days=10), time_index.last_day, freq='W-MON')
+    dated = reports[reports['reported_date'].notna()]
+    period = np.searchsorted(edges, dated['reported_date'].dt.normalize().to_numpy(), side='right') - 1
+    in_range = (period >= 0) & (period < len(edges) - 1)
+    sums = (
+        dated[in_range].assign(period=period[in_range])
+        .groupby(['province', 'disease_code', 'period'], dropna=False, observed=True)['case'].sum()
+    )
+    expected = np.zeros((len(time_index.groups), len(edges) - 1))
+    rows = {key: row for row, key in enumerate(_by_group(time_index.groups.assign(case=0, reports=0)))}
+    for (province, disease, column), total in sums.items():
+        key = (None if pd.isna(province) else province, None if pd.isna(disease) else disease)
+        expected[rows[key], column] = total
+    assert np.array_equal(time_index.periodic(edges), expected)
@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from correlations import (
+    MAX_LAG, MIN_PERIODS, ROLLING_WINDOW, OutbreakWeatherCorrelation,
+    lagged_correlations, pearson_rows, rolling_correlations, shift_rows,
+)
+
+
+@pytest.fixture(scope="module")
+def pairs():
+    """Weather-like and case-like rows (40 x 60) with gaps, flat stretches and short rows."""
+    rng = np.random.default_rng(13)
+    x = rng.normal(25, 4, (40, 60))
+    y = rng.poisson(2, (40, 60)).astype(float)
+    x[rng.random(x.shape) < 0.1] = np.nan
+    y[rng.random(y.shape) < 0.05] = np.nan
+    y[3] = 0.0           # no variation at all
+    y[4, 20:45] = 0.0    # no variation in some windows
+    x[5, 4:] = np.nan    # too few periods
+    y[6] = 0.5 * x[6] + 1  # perfectly correlated where both are known
+    return x, y
+
+
+# pandas warns while correlating the rows without variation
+flat_rows = pytest.mark.filterwarnings("ignore:invalid value encountered:RuntimeWarning")
+
+
+def _rows(a):
+    return [pd.Series(row) for row in a]
+
+
+@flat_rows
+def test_pearson_rows_matches_pandas_corr(pairs):
+    x, y = pairs
+    expected = [sx.corr(sy, min_periods=MIN_PERIODS) for sx, sy in zip(_rows(x), _rows(y))]
+    assert pearson_rows(x, y) == pytest.approx(expected, nan_ok=True, abs=1e-12)
+
+
+@flat_rows
+@pytest.mark.parametrize("max_lag", [0, 3, 8, 70])
+def test_lagged_correlations_match_shifted_pandas_corr(pairs, max_lag):
+    x, y = pairs
+    expected = np.full((len(x), max_lag + 1), np.nan)
+    for i, (sx, sy) in enumerate(zip(_rows(x), _rows(y))):
+        for lag in range(min(max_lag, x.shape[1] - 1) + 1):
+            expected[i, lag] = sy.corr(sx.shift(lag), min_periods=MIN_PERIODS)
+    assert lagged_correlations(x, y, max_lag) == pytest.approx(expected, nan_ok=True, abs=1e-12)
+
+
+def test_shift_rows_matches_pandas_shift(pairs):
+    x, _ = pairs
+    lags = np.arange(len(x)) % 9
+    expected = np.array([sx.shift(lag).to_numpy() for sx, lag in zip(_rows(x), lags)])
+    assert np.array_equal(shift_rows(x, lags), expected, equal_nan=True)
+
+
+@pytest.mark.parametrize("window", [6, 12, 100])
+def test_rolling_correlations_match_pandas_rolling_corr(pairs, window):
+    x, y = pairs
+    expected = np.array([
+        sx.rolling(window, min_periods=MIN_PERIODS).corr(sy).to_numpy()
+        for sx, sy in zip(_rows(x), _rows(y))
+    ])
+    # pandas leaves windows without variation at +-inf or NaN; they have no correlation
+    expected[~np.isfinite(expected)] = np.nan
+    assert rolling_correlations(x, y, window) == pytest.approx(expected, nan_ok=True, abs=1e-9)
+
+
+@pytest.mark.parametrize("freq", ['W', 'M'])
+def test_best_lag_and_rolling_follow_the_lagged_correlations(pairs, freq):
+    x, y = pairs
+    groups = pd.DataFrame({'province': [f"P{i}" for i in range(len(x))], 'disease_code': "ND", 'station': "S"})
+    periods = pd.period_range("2024-01-01", periods=x.shape[1], freq=freq).start_time
+    correlation = OutbreakWeatherCorrelation(freq, periods, groups, y, {'temperature': x, 'humidity': -x})
+
+    for measure, values in correlation.weather.items():
+        lagged = correlation.lagged[measure]
+        assert np.array_equal(lagged, lagged_correlations(values, y, MAX_LAG[freq]), equal_nan=True)
+        best = correlation.best_lag[measure]
+        for row, lag in enumerate(best):
+            scores = np.abs(lagged[row])
+            assert lag == (np.nanargmax(scores) if np.isfinite(scores).any() else 0)
+        expected = rolling_correlations(shift_rows(values, best), y, ROLLING_WINDOW[freq])
+        assert np.array_equal(correlation.rolling[measure], expected, equal_nan=True)
+
+    assert correlation.strongest("ND", 'temperature') == "P6"
+    assert correlation.strongest("XX", 'temperature') is None
@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from downsample import lttb_indices
+
+
+def _reference_lttb(x, y, budget):
+    """Textbook LTTB over one series, one bucket at a time."""
+    n = len(y)
+    if n <= budget or budget < 3:
+        return list(range(n))
+    every = (n - 2) / (budget - 2)
+    edges = [1 + int(i * every) for i in range(budget - 1)] + [n]
+    kept = [0]
+    for i in range(budget - 2):
+        following = [j for j in range(edges[i + 1], edges[i + 2]) if np.isfinite(y[j])]
+        mean_x = np.mean([x[j] for j in following]) if following else np.nan
+        mean_y = np.mean([y[j] for j in following]) if following else np.nan
+        a, best, best_area = kept[-1], edges[i], -1.0
+        for j in range(edges[i], edges[i + 1]):
+            area = abs((x[a] - mean_x) * (y[j] - y[a]) - (x[a] - x[j]) * (mean_y - y[a]))
+            if np.isfinite(area) and area > best_area:
+                best, best_area = j, area
+        kept.append(best)
+    return kept + [n - 1]
+
+
+def _series(n, seed, gaps=0.0):
+    rng = np.random.default_rng(seed)
+    x = np.sort(rng.uniform(0, 1000, n))
+    y = np.cumsum(rng.normal(0, 1, n))
+    y[rng.choice(n, max(1, n // 200), replace=False)] += 40  # spikes LTTB must keep
+    y[rng.random(n) < gaps] = np.nan
+    return x, y
+
+
+@pytest.mark.parametrize("n, budget", [(1000, 50), (1003, 500), (5000, 7), (501, 500), (10, 3)])
+@pytest.mark.parametrize("gaps", [0.0, 0.05])
+def test_matches_the_reference(n, budget, gaps):
+    x, y = _series(n, seed=n, gaps=gaps)
+    assert lttb_indices(x, y, budget).tolist() == _reference_lttb(x, y, budget)
+
+
+def test_keeps_isolated_spikes():
+    rng = np.random.default_rng(1)
+    y = rng.normal(0, 0.1, 20_000)
+    spikes = np.arange(1000, 20_000, 1500)
+    y[spikes] += np.where(np.arange(len(spikes)) % 2, 40, -40)
+    assert np.isin(spikes, lttb_indices(np.arange(20_000), y, 500)).all()
+
+
+def test_datetimes_match_nanosecond_positions():
+    x, y = _series(2000, seed=2)
+    times = pd.Timestamp("2024-01-01") + pd.to_timedelta(x, unit='h')
+    expected = _reference_lttb(times.asi8.astype(float), y, 100)
+    assert lttb_indices(times.to_numpy(), y, 100).tolist() == expected
+
+
+@pytest.mark.parametrize("n, budget", [(0, 500), (500, 500), (1000, 2)])
+def test_within_budget_keeps_everything(n, budget):
+    x, y = _series(max(n, 1), seed=3)
+    assert lttb_indices(x[:n], y[:n], budget).tolist() == list(range(n))
+
+
+def test_groups_are_downsampled_separately():
+    sizes = [3000, 40, 1200, 101, 100]
+    series = [_series(size, seed=size) for size in sizes]
+    x = np.concatenate([sx for sx, _ in series])
+    y = np.concatenate([sy for _, sy in series])
+    groups = np.repeat(["a", "b", "c", "d", "e"], sizes)
+
+    expected, offset = [], 0
+    for sx, sy in series:
+        expected += [offset + i for i in _reference_lttb(sx, sy, 100)]
+        offset += len(sx)
+    assert lttb_indices(x, y, 100, groups=groups).tolist() == expected
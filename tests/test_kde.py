@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+from scipy.stats import gaussian_kde
+
+from kde import binned_kde
+
+rng = np.random.default_rng(5)
+SAMPLES = {
+    'case counts': rng.poisson(3, 2000).astype(float),
+    'skewed': rng.lognormal(1, 1, 500),
+    'bimodal': np.concatenate([rng.normal(-5, 1, 300), rng.normal(5, 0.3, 100)]),
+    'few': np.array([1.0, 2.0, 2.0, 7.0]),
+}
+
+
+def _grid(samples, margin=0.0):
+    return np.linspace(samples.min() - margin, samples.max() + margin, 200)
+
+
+@pytest.mark.parametrize("name", SAMPLES)
+def test_matches_gaussian_kde(name):
+    samples = SAMPLES[name]
+    grid = _grid(samples, margin=3)
+    expected = gaussian_kde(samples)(grid)
+    assert np.abs(binned_kde(samples, grid) - expected).max() < 1e-3 * expected.max()
+
+
+def test_explicit_bandwidth_matches_gaussian_kde():
+    samples = SAMPLES['skewed']
+    grid = _grid(samples)
+    expected = gaussian_kde(samples, bw_method=0.5 / np.std(samples, ddof=1))(grid)
+    assert np.abs(binned_kde(samples, grid, bandwidth=0.5) - expected).max() < 1e-3 * expected.max()
+
+
+def test_missing_samples_are_left_out():
+    samples = SAMPLES['few']
+    grid = _grid(samples)
+    assert np.array_equal(binned_kde(np.append(samples, [np.nan, np.inf]), grid), binned_kde(samples, grid))
+
+
+@pytest.mark.parametrize("samples", [[], [4.0], [4.0, np.nan], [2.0, 2.0, 2.0]])
+def test_undefined_density_is_none(samples):
+    assert binned_kde(samples, np.linspace(0, 5, 10)) is None
@@ -0,0 +1,113 @@
+import math
+import re
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from news_index import NewsIndex, TITLE_WEIGHT, article_key
+
+WORDS = ["avian", "avianflu", "bird", "birds", "flu", "fever", "african", "swine", "laos", "lao", "dengue", "cattle"]
+QUERIES = ["bird", "b", "avian", "la", "african swine", "Bird FLU", "dengue laos fever", "zebra", "bird zebra", "", "!!"]
+
+
+def _articles(n, seed, start=0):
+    rng = np.random.default_rng(seed)
+    return [{
+        'title': " ".join(rng.choice(WORDS, 4)).capitalize(),
+        'main_text': " ".join(rng.choice(WORDS, rng.integers(5, 40))),
+        'url': f"https://example.org/{i}",
+    } for i in range(start, start + n)]
+
+
+def _reference_scores(articles, query, k1=1.2, b=0.75):
+    """BM25 with prefix-matched query terms, by brute force over every article."""
+    counts = {}
+    for article in articles:
+        key = article_key(article)
+        if key not in counts:
+            tf = Counter(re.findall(r"\w+", article['main_text'].lower()))
+            for token in re.findall(r"\w+", article['title'].lower()):
+                tf[token] += TITLE_WEIGHT
+            counts[key] = tf
+    n_docs = len(counts)
+    average = np.mean([sum(tf.values()) for tf in counts.values()])
+    df = Counter(token for tf in counts.values() for token in tf)
+
+    terms = list(dict.fromkeys(re.findall(r"\w+", query.lower())))
+    scores = {}
+    for key, tf in counts.items():
+        matches = [[token for token in tf if token.startswith(term)] for term in terms]
+        if not terms or not all(matches):
+            continue
+        norm = k1 * (1 - b + b * sum(tf.values()) / average)
+        scores[key] = sum(
+            math.log(1 + (n_docs - df[token] + 0.5) / (df[token] + 0.5)) * tf[token] * (k1 + 1) / (tf[token] + norm)
+            for tokens in matches for token in tokens
+        )
+    return scores
+
+
+def _assert_matches_reference(index, articles, query):
+    expected = _reference_scores(articles, query)
+    found = index.search(query)
+    assert sorted(found) == sorted(expected)
+    # Best first; keys with equal scores may come in any order
+    ranked_scores = [expected[key] for key in found]
+    assert ranked_scores == pytest.approx(sorted(ranked_scores, reverse=True))
+
+
+@pytest.fixture(scope="module")
+def articles():
+    return _articles(300, seed=1)
+
+
+@pytest.mark.parametrize("query", QUERIES)
+def test_search_matches_brute_force_bm25(articles, query):
+    _assert_matches_reference(NewsIndex.for_articles(pd.DataFrame(articles)), articles, query)
+
+
+def test_search_limit_keeps_the_best(articles):
+    index = NewsIndex.for_articles(pd.DataFrame(articles))
+    assert index.search("bird flu", limit=5) == index.search("bird flu")[:5]
+
+
+@pytest.mark.parametrize("query", QUERIES)
+def test_updated_index_matches_a_fresh_one(articles, query):
+    index = NewsIndex.for_articles(pd.DataFrame(articles))
+    before = index.search(query)
+
+    # Some articles dropped, some edited under the same key, some added
+    changed = articles[20:] + _articles(40, seed=2, start=1000)
+    changed[3] = dict(changed[3], main_text="dengue dengue cattle")
+    changed[7] = dict(changed[7], main_text="")
+    updated = index.updated(changed)
+
+    _assert_matches_reference(updated, changed, query)
+    assert sorted(updated.search(query)) == sorted(NewsIndex().updated(changed).search(query))
+    # The index the previous dataset holds is left as it was
+    assert index.search(query) == before
+
+
+def test_edited_article_is_found_by_its_new_text(articles):
+    index = NewsIndex.for_articles(pd.DataFrame(articles))
+    edited = [dict(article) for article in articles]
+    edited[0]['main_text'] = "zebra"
+    updated = index.updated(edited)
+    assert updated.search("zebra") == [article_key(edited[0])]
+    assert index.search("zebra") == []
+    assert len(updated) == len(index)
+
+
+def test_unchanged_articles_return_the_same_index(articles):
+    index = NewsIndex.for_articles(pd.DataFrame(articles))
+    assert index.updated([dict(article) for article in articles]) is index
+
+
+def test_first_article_of_a_repeated_key_is_indexed():
+    first = {'title': "Same", 'main_text': "dengue", 'url': "https://example.org/same"}
+    index = NewsIndex().updated([first, dict(first, main_text="cattle")])
+    assert len(index) == 1
+    assert index.search("dengue") == [article_key(first)]
+    assert index.search("cattle") == []
@@ -0,0 +1,145 @@
+import re
+
+import pytest
+
+from benchmarks.synthetic import generate_frames
+from data_loader import GoogleSheetsSource, SnapshotSource
+from data_store import DataStore
+
+
+class FakeSpreadsheet:
+    """The gspread calls GoogleSheetsSource makes, over in-memory cell values, recording each one."""
+
+    def __init__(self, sheets):
+        self.sheets = sheets  # name -> rows of cell strings, header first
+        self.calls = []
+
+    def worksheet(self, name):
+        return FakeWorksheet(self, name)
+
+    def values_batch_get(self, ranges):
+        self.calls.append(('batch', len(ranges)))
+        value_ranges = []
+        for cell_range in ranges:
+            name, column = re.fullmatch(r"'(.+)'!([A-Z]+):\2", cell_range).groups()
+            index = ord(column) - ord('A')
+            value_ranges.append({'values': [[row[index]] if len(row) > index else [] for row in self.sheets[name]]})
+        return {'valueRanges': value_ranges}
+
+
+class FakeWorksheet:
+    def __init__(self, spreadsheet, name):
+        self.spreadsheet, self.name = spreadsheet, name
+
+    def get_all_values(self):
+        self.spreadsheet.calls.append(('all', self.name))
+        return [list(row) for row in self.spreadsheet.sheets[self.name]]
+
+    def get_values(self, rows):
+        self.spreadsheet.calls.append(('rows', self.name, rows))
+        first, last = map(int, rows.split(":"))
+        return [list(row) for row in self.spreadsheet.sheets[self.name][first - 1:last]]
+
+
+@pytest.fixture
+def spreadsheet(end):
+    frames = generate_frames(n_cases=200, n_news=10, n_neighbours=50, seed=9, raw=True, end=end)
+    return FakeSpreadsheet({
+        name: [list(frame.columns)] + frame.astype(str).to_numpy().tolist() for name, frame in frames.items()
+    })
+
+
+def _store(spreadsheet, path):
+    remote = GoogleSheetsSource()
+    remote._spreadsheet = spreadsheet
+    return DataStore(source="auto", snapshot=SnapshotSource(str(path / "snapshot")), remote=remote,
+                     weather_history_dir=str(path / "weather"))
+
+
+@pytest.fixture
+def store(spreadsheet, tmp_path):
+    store = _store(spreadsheet, tmp_path)
+    store.load()
+    spreadsheet.calls.clear()
+    return store
+
+
+def test_unchanged_refresh_costs_one_call(store, spreadsheet):
+    current = store.current
+    assert store.refresh() is current
+    assert spreadsheet.calls == [('batch', 6)]  # column A of every worksheet, plus weather_data's timestamps
+
+
+def test_append_fetches_only_the_new_rows(store, spreadsheet):
+    current = store.current
+    rows = spreadsheet.sheets['laos_data']
+    rows += [list(row) for row in rows[1:4]]
+
+    dataset = store.refresh()
+    assert spreadsheet.calls == [('batch', 6), ('rows', 'laos_data', "202:204")]
+    assert dataset.version != current.version
+    assert len(dataset.frames['laos_data']) == len(current.frames['laos_data']) + 3
+    assert dataset.frames['news_data'] is current.frames['news_data']
+
+    spreadsheet.calls.clear()
+    assert store.refresh() is dataset
+    assert spreadsheet.calls == [('batch', 6)]
+
+
+def test_edit_outside_column_a_is_found_by_a_full_refresh(store, spreadsheet):
+    current = store.current
+    case = spreadsheet.sheets['laos_data'][0].index('case')
+    spreadsheet.sheets['laos_data'][5][case] = "999"
+
+    # Column A is unchanged, so an ordinary refresh does not notice
+    assert store.refresh() is current
+    dataset = store.refresh(full=True)
+    assert ('all', 'laos_data') in spreadsheet.calls
+    assert dataset.version != current.version
+    assert dataset.laos_data['case'].sum() == current.laos_data['case'].sum() - float(
+        current.frames['laos_data']['case'].iloc[4]) + 999
+    # Worksheets whose content did not change keep their frames
+    assert dataset.frames['news_data'] is current.frames['news_data']
+
+
+def test_deleted_row_triggers_a_full_read(store, spreadsheet):
+    current = store.current
+    del spreadsheet.sheets['laos_data'][10]
+
+    dataset = store.refresh()
+    assert spreadsheet.calls == [('batch', 6), ('all', 'laos_data')]
+    assert dataset.version != current.version
+    assert len(dataset.frames['laos_data']) == len(current.frames['laos_data']) - 1
+
+
+def test_weather_rewrite_triggers_a_full_read(store, spreadsheet):
+    current = store.current
+    rows = spreadsheet.sheets['weather_data']
+    timestamp, temperature = rows[0].index('timestamp'), rows[0].index('temperature')
+    for row in rows[1:]:
+        row[timestamp], row[temperature] = "01/01/2025 09:00", "31.5"
+
+    dataset = store.refresh()
+    assert spreadsheet.calls == [('batch', 6), ('all', 'weather_data')]
+    assert dataset.version != current.version
+    assert (dataset.weather_df['temperature'] == 31.5).all()
+    assert len(dataset.weather_history) > len(current.weather_history)
+
+
+def test_version_depends_only_on_content(store, spreadsheet, tmp_path):
+    original = store.current
+    assert store.refresh(full=True) is original
+
+    cell = spreadsheet.sheets['news_data'][3]
+    title, cell[0] = cell[0], "Edited title"
+    edited = store.refresh(full=True)
+    assert edited.version != original.version
+    cell[0] = title
+    assert store.refresh(full=True).version == original.version
+
+    # A store starting afresh from the sheets, or from the snapshot they left, agrees
+    assert _store(spreadsheet, tmp_path / "other").load().version == original.version
+    restarted = _store(spreadsheet, tmp_path)
+    spreadsheet.calls.clear()
+    assert restarted.load().version == original.version
+    assert spreadsheet.calls == []
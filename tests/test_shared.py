@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import generate_frames, generate_weather_observations
+from correlations import FREQUENCIES
+from data_loader import SharedDatasetSource
+from data_store import Dataset
+from weather_history import WeatherHistory
+
+
+def assert_cubes_equal(actual, expected):
+    pd.testing.assert_frame_equal(actual.frame, expected.frame)
+    pd.testing.assert_frame_equal(actual.location_coords, expected.location_coords)
+    for dim, labels in expected.labels.items():
+        pd.testing.assert_index_equal(actual.labels[dim], labels)
+    pd.testing.assert_series_equal(actual.sum('province'), expected.sum('province'))
+    pd.testing.assert_frame_equal(actual.monthly(by='disease_code'), expected.monthly(by='disease_code'))
+
+
+def assert_time_indexes_equal(actual, expected):
+    assert actual.first_day == expected.first_day
+    np.testing.assert_array_equal(actual.cases, expected.cases)
+    np.testing.assert_array_equal(actual.reports, expected.reports)
+    pd.testing.assert_frame_equal(actual.groups, expected.groups)
+    pd.testing.assert_frame_equal(actual.province_centers, expected.province_centers)
+    pd.testing.assert_frame_equal(actual.window("2024-01-01"), expected.window("2024-01-01"))
+
+
+def assert_correlations_equal(actual, expected):
+    assert actual.freq == expected.freq
+    pd.testing.assert_index_equal(actual.periods, expected.periods)
+    pd.testing.assert_frame_equal(actual.groups, expected.groups)
+    np.testing.assert_array_equal(actual.cases, expected.cases)
+    for results in ['weather', 'lagged', 'best_lag', 'rolling']:
+        for measure, values in getattr(expected, results).items():
+            np.testing.assert_array_equal(getattr(actual, results)[measure], values)
+
+
+@pytest.fixture(scope="module")
+def dataset(end):
+    frames = generate_frames(n_cases=3000, n_news=50, seed=5, end=end)
+    history = WeatherHistory().appended(generate_weather_observations(days=200, hours=6, seed=5, end=end))
+    return Dataset(frames, weather_history=history)
+
+
+def test_aggregates_round_trip_in_memory(dataset):
+    assert_cubes_equal(type(dataset.cube).from_shared(dataset.cube.to_shared()), dataset.cube)
+    assert_time_indexes_equal(type(dataset.time_index).from_shared(dataset.time_index.to_shared()), dataset.time_index)
+    for freq, correlation in dataset.correlations.items():
+        assert len(correlation.groups), "correlations should not be empty"
+        assert_correlations_equal(type(correlation).from_shared(freq, correlation.to_shared()), correlation)
+
+
+def test_workers_map_what_the_coordinator_published(dataset, tmp_path):
+    source = SharedDatasetSource(str(tmp_path))
+    source.publish(dataset.frames, dataset.version, dataset.fingerprints, parts=dataset.to_shared())
+    assert source.current()['version'] == dataset.version
+
+    parts = source.fetch_parts(dataset.version)
+    assert set(parts) == set(dataset.to_shared())
+    mapped = [part for part in parts.values() if isinstance(part, np.ndarray)]
+    assert mapped and not any(part.flags.writeable for part in mapped)
+
+    worker = Dataset(source.fetch(dataset.version), dataset.fingerprints, version=dataset.version,
+                     weather_history=dataset.weather_history, shared=parts)
+    pd.testing.assert_frame_equal(worker.laos_data, dataset.laos_data)
+    assert_cubes_equal(worker.cube, dataset.cube)
+    assert_time_indexes_equal(worker.time_index, dataset.time_index)
+    for freq in FREQUENCIES:
+        assert_correlations_equal(worker.correlations[freq], dataset.correlations[freq])
+    pd.testing.assert_frame_equal(worker.location_stations, dataset.location_stations)
+
+
+def test_nothing_published_gives_no_parts(tmp_path):
+    assert SharedDatasetSource(str(tmp_path)).fetch_parts("missing") == {}
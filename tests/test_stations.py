@@ -0,0 +1,79 @@
+import logging
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from stations import EARTH_RADIUS_KM, StationIndex
+
+
+def _haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+def _stations(n, seed, lat=(-80, 80), lon=(-180, 180)):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'region': [f"Station {i}" for i in range(n)],
+        'latitude': rng.uniform(*lat, n),
+        'longitude': rng.uniform(*lon, n),
+    })
+
+
+@pytest.mark.parametrize("lat, lon", [((13.9, 22.5), (100.1, 107.7)), ((-89, 89), (-180, 180))],
+                         ids=['laos', 'globe'])
+def test_nearest_matches_brute_force_haversine(lat, lon):
+    stations = _stations(60, seed=1, lat=lat, lon=lon)
+    points = _stations(500, seed=2, lat=lat, lon=lon)
+    index, distance = StationIndex(stations).nearest(points['latitude'], points['longitude'])
+
+    all_distances = _haversine_km(points['latitude'].to_numpy()[:, None], points['longitude'].to_numpy()[:, None],
+                                  stations['latitude'].to_numpy()[None, :], stations['longitude'].to_numpy()[None, :])
+    assert np.array_equal(index, all_distances.argmin(axis=1))
+    assert distance == pytest.approx(all_distances.min(axis=1), abs=1e-6)
+
+
+def test_nearest_across_the_antimeridian():
+    stations = pd.DataFrame({'region': ["East", "West"], 'latitude': [0.0, 0.0], 'longitude': [179.5, -170.0]})
+    index, distance = StationIndex(stations).nearest([0.0], [-179.9])
+    assert index.tolist() == [0]
+    assert distance[0] == pytest.approx(_haversine_km(0, -179.9, 0, 179.5))
+
+
+def test_missing_coordinates_have_no_station():
+    index, distance = StationIndex(_stations(5, seed=3)).nearest([10.0, np.nan, 20.0], [100.0, 101.0, np.nan])
+    assert index[1:].tolist() == [-1, -1] and np.isnan(distance[1:]).all()
+    assert index[0] >= 0 and np.isfinite(distance[0])
+
+
+def test_no_stations():
+    index, distance = StationIndex(_stations(0, seed=4)).nearest([10.0], [100.0])
+    assert index.tolist() == [-1] and np.isnan(distance).all()
+
+
+def test_from_frames_matches_names_loosely(caplog):
+    weather_df = pd.DataFrame({'region': ["Vientiane Capital", "luang prabang", "Atlantis", "Vientiane Capital", None]})
+    laos_regions = pd.DataFrame({
+        'province': ["Luang-Prabang", "VIENTIANE  CAPITAL", "Attapeu"],
+        'latitude': [19.9, 17.97, 14.8],
+        'longitude': [102.1, 102.6, 106.8],
+    })
+    with caplog.at_level(logging.WARNING, logger="stations"):
+        index = StationIndex.from_frames(weather_df, laos_regions)
+
+    assert index.stations.to_dict('records') == [
+        {'region': "Vientiane Capital", 'latitude': 17.97, 'longitude': 102.6},
+        {'region': "luang prabang", 'latitude': 19.9, 'longitude': 102.1},
+    ]
+    assert "Atlantis" in caplog.text
+
+
+def test_assign_labels_each_point_with_its_station():
+    stations = pd.DataFrame({'region': ["North", "South"], 'latitude': [20.0, 15.0], 'longitude': [102.0, 106.0]})
+    coords = pd.DataFrame({'latitude': [19.0, 14.5, np.nan], 'longitude': [101.0, 106.2, 104.0]}, index=["a", "b", "c"])
+    assigned = StationIndex(stations).assign(coords)
+    assert assigned['station'].tolist()[:2] == ["North", "South"] and pd.isna(assigned.loc["c", 'station'])
+    assert assigned['station_km'].iloc[:2].to_numpy() == pytest.approx(
+        _haversine_km(np.array([19.0, 14.5]), np.array([101.0, 106.2]), np.array([20.0, 15.0]), np.array([102.0, 106.0])))
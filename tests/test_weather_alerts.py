@@ -0,0 +1,115 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from weather_alerts import ALERT_RULES, RETENTION, WeatherAlerts, evaluate
+from weather_history import WeatherHistory
+
+REGIONS = ["Attapeu", "Bokeo", "Vientiane"]
+
+
+@pytest.fixture(scope="module")
+def observations():
+    """Ten days of irregular observations per region, swinging past every rule now and then."""
+    rng = np.random.default_rng(11)
+    frames = []
+    for region in REGIONS:
+        stamps = pd.Timestamp("2024-04-01") + pd.to_timedelta(np.cumsum(rng.integers(15, 120, 250)), unit='min')
+        hour = stamps.hour.to_numpy()
+        frames.append(pd.DataFrame({
+            'region': region,
+            'timestamp': stamps,
+            'temperature': 24 + 12 * np.sin((hour - 9) / 24 * 2 * np.pi) + rng.normal(0, 3, len(stamps)),
+            'feels_like': 30.0,
+            'humidity': rng.uniform(60, 99, len(stamps)).round(),
+            'pressure': 1005 + np.cumsum(rng.normal(0, 1.5, len(stamps))).round(),
+            'wind_speed': rng.gamma(2, 2.5, len(stamps)),
+            'visibility': 10.0,
+        }))
+    return pd.concat(frames, ignore_index=True).sort_values(['timestamp', 'region'], ignore_index=True)
+
+
+def _reference_fired(rows, rule):
+    """(fired, value) per row of one region's `rows` (a list of dicts in time order), rule by rule."""
+    results, run_start = [], None
+    for i, row in enumerate(rows):
+        value = row[rule['metric']]
+        if rule['kind'] == 'rate':
+            within = pd.Timedelta(rule['within'])
+            earliest = next(other for other in rows[:i + 1] if other['timestamp'] >= row['timestamp'] - within)
+            value -= earliest[rule['metric']]
+            fired = value <= rule['change'] if rule['change'] < 0 else value >= rule['change']
+        else:
+            fired = value > rule['above'] if 'above' in rule else value < rule['below']
+            if rule['kind'] == 'duration':
+                run_start = (run_start or row['timestamp']) if fired else None
+                fired = fired and row['timestamp'] - run_start >= pd.Timedelta(rule['for'])
+        results.append((bool(fired), float(value)))
+    return results
+
+
+@pytest.fixture(scope="module")
+def reference_episodes(observations):
+    """Episodes found by walking every region's rows rule by rule."""
+    episodes = []
+    for region, frame in observations.groupby('region'):
+        rows = frame.sort_values('timestamp').to_dict('records')
+        for rule in ALERT_RULES:
+            episode = None
+            for row, (fired, value) in zip(rows, _reference_fired(rows, rule)):
+                if not fired:
+                    episode = None
+                    continue
+                if episode is None:
+                    episode = {'rule': rule['name'], 'region': region, 'started': row['timestamp']}
+                    episodes.append(episode)
+                episode.update(last_seen=row['timestamp'], value=value)
+    episodes = pd.DataFrame(episodes)
+    return episodes[episodes['last_seen'] >= observations['timestamp'].max() - RETENTION]
+
+
+def _sorted(episodes):
+    return episodes.sort_values(['rule', 'region', 'started'], ignore_index=True)
+
+
+def test_every_rule_fires_somewhere(reference_episodes):
+    assert set(reference_episodes['rule']) == {rule['name'] for rule in ALERT_RULES}
+
+
+def test_evaluate_matches_a_row_by_row_loop(observations):
+    frame = observations.sort_values(['region', 'timestamp'], ignore_index=True)
+    results = evaluate(frame)
+    for rule in ALERT_RULES:
+        expected = [result for _, rows in frame.groupby('region')
+                    for result in _reference_fired(rows.to_dict('records'), rule)]
+        fired, values = results[rule['name']]
+        assert fired.tolist() == [flag for flag, _ in expected], rule['name']
+        assert values.to_numpy(dtype=float) == pytest.approx([value for _, value in expected]), rule['name']
+
+
+def test_episodes_match_runs_of_firing_rows(observations, reference_episodes):
+    alerts = WeatherAlerts().updated(WeatherHistory().appended(observations))
+    pd.testing.assert_frame_equal(_sorted(alerts.episodes), _sorted(reference_episodes),
+                                  check_dtype=False)
+
+
+def test_incremental_updates_match_one_shot(observations):
+    history, alerts = WeatherHistory(), WeatherAlerts()
+    # Refreshes twice a day, each seeing the sheet's last two days
+    for now in pd.date_range("2024-04-01", observations['timestamp'].max() + pd.Timedelta(hours=12), freq='12h'):
+        timestamps = observations['timestamp']
+        history = history.appended(observations[(timestamps < now) & (timestamps >= now - pd.Timedelta(days=2))])
+        alerts = alerts.updated(history)
+
+    one_shot = WeatherAlerts().updated(WeatherHistory().appended(observations))
+    pd.testing.assert_frame_equal(_sorted(alerts.episodes), _sorted(one_shot.episodes))
+    assert alerts.updated(history) is alerts
+
+
+def test_recent_marks_episodes_still_firing(observations):
+    alerts = WeatherAlerts().updated(WeatherHistory().appended(observations))
+    recent = alerts.recent()
+    latest = observations.groupby('region')['timestamp'].max()
+    assert (recent['last_seen'] >= recent['region'].map(latest) - pd.Timedelta(hours=24)).all()
+    assert (recent['active'] == (recent['last_seen'] == recent['region'].map(latest))).all()
+    assert len(alerts.messages()) == len(recent)
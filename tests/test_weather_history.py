@@ -0,0 +1,107 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from weather_history import METRICS, RETENTION, ROLLUPS, WeatherHistory
+
+REGIONS = ["Attapeu", "Bokeo", "Vientiane"]
+
+
+@pytest.fixture(scope="module")
+def observations():
+    """Irregular observations over 20 days, with a few repeated (region, timestamp) rows."""
+    rng = np.random.default_rng(7)
+    stamps = pd.Timestamp("2024-03-01 00:07") + pd.to_timedelta(np.cumsum(rng.integers(10, 90, 1500)), unit='min')
+    frame = pd.DataFrame({
+        'region': rng.choice(REGIONS, len(stamps)),
+        'timestamp': stamps,
+        **{metric: rng.normal(30, 5, len(stamps)).round(2) for metric in METRICS},
+    })
+    repeats = frame.sample(30, random_state=1).assign(temperature=-1.0)
+    return pd.concat([frame, repeats], ignore_index=True)
+
+
+def _deduplicated(observations):
+    return observations.drop_duplicates(['region', 'timestamp'], keep='last')
+
+
+def _reference_rollup(observations, freq):
+    grouped = (
+        _deduplicated(observations).assign(timestamp=observations['timestamp'].dt.floor(freq))
+        .groupby(['region', 'timestamp'])[METRICS].agg(['min', 'mean', 'max'])
+    )
+    grouped.columns = [f"{metric}_{stat}" for metric, stat in grouped.columns]
+    return grouped.reset_index()
+
+
+def _sorted(frame):
+    return frame.sort_values(['region', 'timestamp'], ignore_index=True)
+
+
+@pytest.fixture(scope="module")
+def history(observations):
+    return WeatherHistory().appended(observations)
+
+
+@pytest.fixture(scope="module")
+def incremental(observations):
+    """History fed the way refreshes see the sheet: overlapping day-by-day snapshots."""
+    history = WeatherHistory()
+    timestamps = observations['timestamp']
+    for day in pd.date_range(timestamps.min().floor('D'), timestamps.max(), freq='D'):
+        snapshot = observations[(timestamps >= day - pd.Timedelta(days=2)) & (timestamps < day + pd.Timedelta(days=1))]
+        history = history.appended(snapshot)
+    return history
+
+
+def test_appended_keeps_the_last_of_repeated_observations(history, observations):
+    expected = _deduplicated(observations)[['region', 'timestamp'] + METRICS]
+    latest = expected['timestamp'].max()
+    expected = expected[expected['timestamp'] >= latest - RETENTION['raw']]
+    pd.testing.assert_frame_equal(_sorted(history.raw), _sorted(expected))
+    assert history.raw['timestamp'].is_monotonic_increasing
+
+
+@pytest.mark.parametrize("name", ROLLUPS)
+@pytest.mark.parametrize("build", ['history', 'incremental'])
+def test_rollups_match_groupby_of_floored_timestamps(request, observations, name, build):
+    history = request.getfixturevalue(build)
+    expected = _reference_rollup(observations, ROLLUPS[name])
+    pd.testing.assert_frame_equal(_sorted(history.rollups[name]), _sorted(expected))
+    assert history.rollups[name]['timestamp'].is_monotonic_increasing
+
+
+def test_incremental_raw_matches_one_shot(history, incremental):
+    pd.testing.assert_frame_equal(incremental.raw, history.raw)
+
+
+def test_older_observations_are_not_appended(history, observations):
+    assert history.appended(observations) is history
+    older = observations.nsmallest(10, 'timestamp').assign(temperature=100.0)
+    assert history.appended(older) is history
+
+
+def test_query_picks_the_finest_resolution_that_holds_the_window(history):
+    latest = history.latest
+    assert history.query('temperature')[1] == 'raw'
+    assert history.query('temperature', latest - pd.Timedelta(days=10), latest)[1] == 'hourly'
+    assert history.query('temperature', latest - pd.Timedelta(days=60), latest)[1] == 'daily'
+    # Raw observations older than their retention are gone, so even a short window is served hourly
+    assert history.resolution_for(latest - pd.Timedelta(days=19), latest - pd.Timedelta(days=18)) == 'hourly'
+
+
+def test_query_returns_the_rollup_window(history, observations):
+    start, end = pd.Timestamp("2024-03-05 10:00"), pd.Timestamp("2024-03-08 18:00")
+    frame, resolution = history.query('humidity', start, end, regions=["Bokeo"])
+    assert resolution == 'hourly'
+
+    expected = _reference_rollup(observations, 'h')
+    expected = expected[(expected['region'] == "Bokeo") & expected['timestamp'].between(start, end)]
+    expected = expected[['region', 'timestamp', 'humidity_min', 'humidity_mean', 'humidity_max']]
+    pd.testing.assert_frame_equal(frame, expected.set_axis(frame.columns, axis=1).reset_index(drop=True))
+
+
+def test_raw_query_has_equal_min_mean_and_max(history):
+    frame, resolution = history.query('pressure')
+    assert resolution == 'raw'
+    assert len(frame) and (frame['min'] == frame['max']).all() and (frame['mean'] == frame['max']).all()
@@ -0,0 +1,188 @@
+import pandas as pd
+
+# Alert rules, evaluated per region over its observations in time order.
+#   "threshold"  an observation above `above` or below `below`
+#   "duration"   the threshold held by every observation for at least `for`
+#   "rate"       the metric changed by `change` or more (in its sign's direction) within `within`
+# `message` is formatted with the region, the rule fields and the observed `value`
+# (the metric, or for "rate" rules the change).
+ALERT_RULES = [
+    {'name': 'high_temperature', 'kind': 'threshold', 'metric': 'temperature', 'above': 35,
+     'message': "🔥 High Temperature Alert: {region} - {value:.1f}°C"},
+    {'name': 'low_temperature', 'kind': 'threshold', 'metric': 'temperature', 'below': 10,
+     'message': "🧊 Low Temperature Alert: {region} - {value:.1f}°C"},
+    {'name': 'high_humidity', 'kind': 'threshold', 'metric': 'humidity', 'above': 90,
+     'message': "💧 High Humidity Alert: {region} - {value:.0f}%"},
+    {'name': 'strong_wind', 'kind': 'threshold', 'metric': 'wind_speed', 'above': 10,
+     'message': "💨 Strong Wind Alert: {region} - {value:.1f} m/s"},
+    {'name': 'sustained_heat', 'kind': 'duration', 'metric': 'temperature', 'above': 33, 'for': '6h',
+     'message': "🌡️ Sustained Heat: {region} - above {above}°C for {for}, now {value:.1f}°C"},
+    {'name': 'temperature_drop', 'kind': 'rate', 'metric': 'temperature', 'change': -8, 'within': '3h',
+     'message': "📉 Sudden Temperature Drop: {region} - {value:+.1f}°C within {within}"},
+    {'name': 'pressure_drop', 'kind': 'rate', 'metric': 'pressure', 'change': -4, 'within': '3h',
+     'message': "🌀 Rapid Pressure Drop: {region} - {value:+.0f} hPa within {within}"},
+]
+
+# Observations before the first new one that are re-read for "duration" and "rate" rules,
+# beyond the longest rule window, to cover the gap between two observations
+CONTEXT_MARGIN = pd.Timedelta(days=1)
+RETENTION = pd.Timedelta(days=14)  # alerts last seen longer ago than this are dropped
+
+
+def evaluate(observations, rules=ALERT_RULES):
+    """Firing flag and observed value of every rule for each row of `observations`.
+
+    `observations` must be sorted by region and timestamp. Returns {rule name:
+    (fired, value)} with boolean and float Series aligned with its rows.
+    """
+    region, timestamp = observations['region'], observations['timestamp']
+    first_of_region = region.ne(region.shift())
+    results = {}
+    for rule in rules:
+        values = observations[rule['metric']]
+        if rule['kind'] == 'rate':
+            values = values - _earliest_within(observations, rule['metric'], pd.Timedelta(rule['within']))
+            fired = values <= rule['change'] if rule['change'] < 0 else values >= rule['change']
+        else:
+            fired = values > rule['above'] if 'above' in rule else values < rule['below']
+            if rule['kind'] == 'duration':
+                started = _run_starts(fired, timestamp, first_of_region)
+                fired &= timestamp - started >= pd.Timedelta(rule['for'])
+        results[rule['name']] = (fired, values)
+    return results
+
+
+def _run_starts(condition, timestamp, first_of_region):
+    """Timestamp of the first row of each unbroken run of `condition` within a region (NaT elsewhere)."""
+    run = (~condition | first_of_region).cumsum()
+    return timestamp.where(condition).groupby(run).transform('min')
+
+
+def _earliest_within(observations, metric, within):
+    """`metric` at the earliest observation of the same region no more than `within` before each row."""
+    since = observations[['region', 'timestamp']].assign(since=observations['timestamp'] - within)
+    earliest = pd.merge_asof(
+        since.reset_index().sort_values('since'),
+        observations[['region', 'timestamp', metric]].sort_values('timestamp'),
+        left_on='since', right_on='timestamp', by='region', direction='forward', suffixes=('', '_earliest'),
+    )
+    return earliest.set_index('index')[metric].reindex(observations.index)
+
+
+class WeatherAlerts:
+    """Alert episodes raised by ALERT_RULES over a WeatherHistory, updated as it grows.
+
+    An episode is an unbroken run of observations of one region firing one rule,
+    kept once as (rule, region, started, last_seen, value) however many observations
+    it spans; `value` is the one observed last. Like WeatherHistory, instances are
+    never modified: `updated` returns a new one.
+    """
+
+    def __init__(self, episodes=None, checked=None, rules=ALERT_RULES):
+        self.episodes = _empty_episodes() if episodes is None else episodes
+        self.checked = pd.Series(dtype='datetime64[ns]') if checked is None else checked  # region -> last evaluated
+        self.rules = rules
+
+    def updated(self, history):
+        """Alerts after evaluating the observations of `history` newer than the last ones checked.
+
+        Only the new rows, plus enough earlier rows of their regions for the duration
+        and rate windows, are evaluated.
+        """
+        raw = history.raw
+        checked = raw['region'].map(self.checked)
+        is_new = checked.isna() | (raw['timestamp'] > checked)
+        if not is_new.any():
+            return self
+
+        new = raw[is_new]
+        regions = new['region'].unique()
+        first_new = new.groupby('region')['timestamp'].min()
+        context_start = raw['region'].map(first_new) - self._lookback()
+        frame = (
+            raw[raw['region'].isin(regions) & (raw['timestamp'] >= context_start)]
+            .sort_values(['region', 'timestamp'], kind='stable')
+        )
+        is_new = is_new.reindex(frame.index)
+        first_of_region = frame['region'].ne(frame['region'].shift())
+
+        fired_rows = []
+        for name, (fired, values) in evaluate(frame, self.rules).items():
+            started = _run_starts(fired, frame['timestamp'], first_of_region)
+            rows = fired & is_new
+            fired_rows.append(pd.DataFrame({
+                'rule': name,
+                'region': frame['region'][rows],
+                'started': started[rows],
+                'timestamp': frame['timestamp'][rows],
+                'value': values[rows].astype(float),
+            }))
+        fired = pd.concat(fired_rows, ignore_index=True)
+
+        # A run that began before the new rows continues the episode already recorded for it,
+        # which may have started before the re-read context did
+        if len(fired) and len(self.episodes):
+            latest = self.episodes.sort_values('started').groupby(['rule', 'region']).last()
+            keys = pd.MultiIndex.from_frame(fired[['rule', 'region']])
+            open_started = latest['started'].reindex(keys).to_numpy()
+            open_last_seen = latest['last_seen'].reindex(keys).to_numpy()
+            continues = (fired['started'] < fired['region'].map(first_new)).to_numpy() \
+                & (open_last_seen >= fired['started'].to_numpy())
+            fired.loc[continues, 'started'] = open_started[continues]
+
+        new_episodes = (
+            fired.groupby(['rule', 'region', 'started'], sort=False)
+            .agg(last_seen=('timestamp', 'max'), value=('value', 'last'))
+            .reset_index()
+        )
+        episodes = self.episodes if new_episodes.empty else new_episodes if self.episodes.empty else (
+            pd.concat([self.episodes, new_episodes], ignore_index=True)
+            .groupby(['rule', 'region', 'started'], sort=False)
+            .agg(last_seen=('last_seen', 'max'), value=('value', 'last'))
+            .reset_index()
+        )
+        episodes = episodes[episodes['last_seen'] >= raw['timestamp'].max() - RETENTION]
+
+        checked = pd.concat([self.checked, new.groupby('region')['timestamp'].max()])
+        checked = checked[~checked.index.duplicated(keep='last')]
+        return WeatherAlerts(episodes.reset_index(drop=True), checked, self.rules)
+
+    def _lookback(self):
+        windows = [pd.Timedelta(rule.get('for') or rule.get('within') or 0) for rule in self.rules]
+        return max(windows, default=pd.Timedelta(0)) + CONTEXT_MARGIN
+
+    def recent(self, since=pd.Timedelta(hours=24)):
+        """Episodes last seen within `since` of each region's latest observation, newest first.
+
+        `active` marks the ones that still held at the latest observation.
+        """
+        latest = self.episodes['region'].map(self.checked)
+        recent = self.episodes[self.episodes['last_seen'] >= latest - since]
+        return (
+            recent.assign(active=recent['last_seen'] == latest[recent.index])
+            .sort_values(['active', 'last_seen', 'started'], ascending=False)
+            .reset_index(drop=True)
+        )
+
+    def messages(self, since=pd.Timedelta(hours=24)):
+        """Alert texts of the recent episodes, ended ones with the time they were last seen."""
+        rules = {rule['name']: rule for rule in self.rules}
+        messages = []
+        for episode in self.recent(since).to_dict('records'):
+            text = rules[episode['rule']]['message'].format(**rules[episode['rule']], **episode)
+            if episode['active']:
+                text += f" (since {episode['started']:%d %b %H:%M})"
+            else:
+                text += f" (ended {episode['last_seen']:%d %b %H:%M})"
+            messages.append(text)
+        return messages
+
+
+def _empty_episodes():
+    return pd.DataFrame({
+        'rule': pd.Series(dtype=str),
+        'region': pd.Series(dtype=str),
+        'started': pd.Series(dtype='datetime64[ns]'),
+        'last_seen': pd.Series(dtype='datetime64[ns]'),
+        'value': pd.Series(dtype=float),
+    })
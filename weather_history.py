@@ -0,0 +1,208 @@
+import os
+import logging
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+WEATHER_HISTORY_DIR = os.getenv("WEATHER_HISTORY_DIR", "data/weather_history")
+
+METRICS = ['temperature', 'feels_like', 'humidity', 'pressure', 'wind_speed', 'visibility']
+STATS = ['min', 'mean', 'max']
+
+# Rollup bucket and how long each resolution is kept, relative to the latest observation
+ROLLUPS = {'hourly': 'h', 'daily': 'D'}
+RETENTION = {
+    'raw': pd.Timedelta(days=14),
+    'hourly': pd.Timedelta(days=180),
+    'daily': None,  # kept forever, a few thousand rows per region and decade
+}
+# Longest window each resolution serves before the next coarser one takes over
+MAX_SPAN = {'raw': pd.Timedelta(days=2), 'hourly': pd.Timedelta(days=31)}
+
+
+class WeatherHistory:
+    """Append-only weather observations per region, with hourly and daily min/mean/max rollups.
+
+    `raw` holds one row per region and observation `timestamp`; the rollups hold one row
+    per region and bucket start with `<metric>_min`, `_mean` and `_max` columns. All three
+    are sorted by timestamp. An observation is only appended when it is newer than the
+    last one stored for its region, so re-reading the same sheet is a no-op. Instances
+    are never modified: `appended` returns a new history, like a refresh returns a new Dataset.
+    """
+
+    def __init__(self, raw=None, hourly=None, daily=None):
+        self.raw = _empty_raw() if raw is None else raw
+        self.rollups = {
+            'hourly': _empty_rollup() if hourly is None else hourly,
+            'daily': _empty_rollup() if daily is None else daily,
+        }
+
+    def __len__(self):
+        return len(self.raw)
+
+    @property
+    def latest(self):
+        """Timestamp of the newest observation, or None for an empty history."""
+        return self.raw['timestamp'].iloc[-1] if len(self.raw) else None
+
+    # ---- Persistence ----
+
+    @classmethod
+    def load(cls, path=WEATHER_HISTORY_DIR):
+        frames = {}
+        for name in ['raw'] + list(ROLLUPS):
+            file = os.path.join(path, f"{name}.parquet")
+            try:
+                frames[name] = pd.read_parquet(file)
+            except FileNotFoundError:
+                frames[name] = None
+            except Exception:
+                logger.warning("Could not read weather history %s, starting it afresh", file, exc_info=True)
+                frames[name] = None
+        history = cls(frames['raw'], frames['hourly'], frames['daily'])
+        logger.info("Weather history: %d observations, %d hourly, %d daily rows",
+                    len(history.raw), len(history.rollups['hourly']), len(history.rollups['daily']))
+        return history
+
+    def save(self, path=WEATHER_HISTORY_DIR):
+        os.makedirs(path, exist_ok=True)
+        for name, frame in [('raw', self.raw)] + list(self.rollups.items()):
+            file = os.path.join(path, f"{name}.parquet")
+            frame.to_parquet(file + ".tmp", index=False)
+            os.replace(file + ".tmp", file)
+
+    # ---- Appending ----
+
+    def appended(self, observations):
+        """History with the rows of `observations` (a weather_data frame) that are new.
+
+        Only the rollup buckets the new rows fall into are recomputed, then every
+        resolution is trimmed to its retention. Returns self when nothing is new.
+        """
+        new = _observations(observations)
+        if len(self.raw):
+            last = self.raw.groupby('region')['timestamp'].max()
+            known = new['region'].map(last)
+            new = new[known.isna() | (new['timestamp'] > known)]
+        if new.empty:
+            return self
+
+        regions = new['region'].unique()
+        raw = _merge_tail(self.raw, new, new['timestamp'].min(), regions=[])
+
+        # Stored rows of these regions are all older than the new ones, so the buckets from
+        # the first new observation on can be rebuilt from raw alone
+        rollups = {}
+        for name, freq in ROLLUPS.items():
+            start = new['timestamp'].min().floor(freq)
+            recent = raw.iloc[raw['timestamp'].searchsorted(start):]
+            fresh = _rollup(recent[recent['region'].isin(regions)], freq)
+            rollups[name] = _merge_tail(self.rollups[name], fresh, start, regions)
+
+        history = WeatherHistory(raw, rollups['hourly'], rollups['daily'])
+        return history._trimmed()
+
+    def _trimmed(self):
+        latest = self.latest
+
+        def trim(frame, name):
+            if RETENTION[name] is None or frame.empty:
+                return frame
+            first = frame['timestamp'].searchsorted(latest - RETENTION[name])
+            return frame.iloc[first:].reset_index(drop=True) if first else frame
+
+        return WeatherHistory(
+            trim(self.raw, 'raw'),
+            trim(self.rollups['hourly'], 'hourly'),
+            trim(self.rollups['daily'], 'daily'),
+        )
+
+    # ---- Queries ----
+
+    def resolution_for(self, start, end):
+        """Finest resolution that still holds `start` and keeps the window to a few hundred points."""
+        latest = self.latest
+        for name in ['raw', 'hourly']:
+            kept_from = None if latest is None else latest - RETENTION[name]
+            if end - start <= MAX_SPAN[name] and (kept_from is None or start >= kept_from):
+                return name
+        return 'daily'
+
+    def query(self, metric, start=None, end=None, regions=None, resolution=None):
+        """Min/mean/max of `metric` per region and timestamp between `start` and `end`.
+
+        Returns (frame, resolution) where frame has region, timestamp, min, mean and
+        max columns. Raw observations have min == mean == max. `start` and `end`
+        default to the last day of observations.
+        """
+        end = self.latest if end is None else pd.Timestamp(end)
+        if end is None:
+            return pd.DataFrame(columns=['region', 'timestamp'] + STATS), 'raw'
+        start = end - pd.Timedelta(days=1) if start is None else pd.Timestamp(start)
+        resolution = resolution or self.resolution_for(start, end)
+
+        frame = self.raw if resolution == 'raw' else self.rollups[resolution]
+        timestamps = frame['timestamp']
+        window = frame.iloc[timestamps.searchsorted(start):timestamps.searchsorted(end, side='right')]
+        if regions is not None:
+            window = window[window['region'].isin(regions)]
+
+        if resolution == 'raw':
+            values = window[metric]
+            result = pd.DataFrame({'region': window['region'], 'timestamp': window['timestamp'],
+                                   'min': values, 'mean': values, 'max': values})
+        else:
+            result = window[['region', 'timestamp'] + [f"{metric}_{stat}" for stat in STATS]]
+            result = result.set_axis(['region', 'timestamp'] + STATS, axis=1)
+        return result.reset_index(drop=True), resolution
+
+
+def _observations(weather_df):
+    new = (
+        weather_df.reindex(columns=['region', 'timestamp'] + METRICS)
+        .dropna(subset=['region', 'timestamp'])
+        .astype({'region': str, **{metric: float for metric in METRICS}})
+        .drop_duplicates(['region', 'timestamp'], keep='last')
+    )
+    return _sorted(new)
+
+
+def _rollup(raw, freq):
+    grouped = (
+        raw.assign(timestamp=raw['timestamp'].dt.floor(freq))
+        .groupby(['region', 'timestamp'], sort=False)[METRICS]
+        .agg(STATS)
+    )
+    grouped.columns = [f"{metric}_{stat}" for metric, stat in grouped.columns]
+    return grouped.reset_index()
+
+
+def _sorted(frame):
+    return frame.sort_values(['timestamp', 'region'], kind='stable', ignore_index=True)
+
+
+def _merge_tail(frame, rows, start, regions):
+    """`frame` with its rows of `regions` from `start` on replaced by `rows`, still sorted.
+
+    Only the part from `start` on is re-sorted; everything before it is kept as is.
+    """
+    split = frame['timestamp'].searchsorted(start)
+    head, tail = frame.iloc[:split], frame.iloc[split:]
+    tail = _sorted(pd.concat([tail[~tail['region'].isin(regions)], rows], ignore_index=True))
+    return pd.concat([head, tail], ignore_index=True) if len(head) else tail
+
+
+def _empty_raw():
+    return pd.DataFrame({
+        'region': pd.Series(dtype=str),
+        'timestamp': pd.Series(dtype='datetime64[ns]'),
+        **{metric: pd.Series(dtype=float) for metric in METRICS},
+    })
+
+
+def _empty_rollup():
+    return pd.DataFrame({
+        'region': pd.Series(dtype=str),
+        'timestamp': pd.Series(dtype='datetime64[ns]'),
+        **{f"{metric}_{stat}": pd.Series(dtype=float) for metric in METRICS for stat in STATS},
+    })